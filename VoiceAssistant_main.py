@@ -5,16 +5,14 @@ import os
 import platform
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='savin.log'
-)
 logger = logging.getLogger('Savin')
 
+from intents import route, smalltalk_router
+from metrics import chat_answers
+
 try:
-    from chat import get_chat_response
+    from chat import (LLM_DEADLINE, LLM_MAX_QUEUED, cached_chat_response, error_message, ollama_client,
+                      stream_chat_within)
     OLLAMA_AVAILABLE = True
     logger.info("Ollama chat module loaded successfully")
 except ImportError:
@@ -50,97 +48,260 @@ CONFUSIONS = [
     "I'm not following. Can you explain in a different way?"
 ]
 
-def process_voice_command(query):
+def process_voice_command(query, match=None, session_id=None):
     """
     Process natural language commands from the user and determine the appropriate action.
     
     Args:
         query (str): The user's voice command or text input
+        match (IntentMatch): The routed intent, if already computed
+        session_id (str): The conversation the command belongs to, if any
         
     Returns:
         str: The response to the user's command
     """
+    return answer_voice_command(query, match, session_id)['response']
+
+def answer_voice_command(query, match=None, session_id=None, deadline=None):
+    """
+    Process a command like process_voice_command, saying what answered it.
+    
+    Args:
+        query (str): The user's voice command or text input
+        match (IntentMatch): The routed intent, if already computed
+        session_id (str): The conversation the command belongs to, if any
+        deadline (float): Seconds the language model gets to start answering;
+            see answer_chat
+        
+    Returns:
+        dict: The response and its source: "builtin", "llm", "cache" or "rules"
+    """
     logger.info(f"Processing command: {query}")
     
-    # Convert to lowercase for easier matching
-    query = query.lower().strip()
+    response = builtin_response(query, match)
+    if response is not None:
+        return answered(response, 'builtin')
     
-    # Handle greetings
-    if any(word in query for word in ["hello", "hi", "hey", "greetings"]):
-        return random.choice(GREETINGS)
+    # For general chit-chat or unknown commands, provide a friendly response
+    return answer_chat(query, session_id, deadline)
+
+def stream_voice_command(query, match=None, session_id=None, answer=None):
+    """
+    Streaming variant of process_voice_command.
     
-    # Handle farewells
-    elif any(word in query for word in ["bye", "goodbye", "see you", "farewell"]):
-        return random.choice(FAREWELLS)
+    Built-in commands are answered in a single chunk; everything else is
+    streamed from the language model as it is generated.
     
-    # Handle time queries
-    elif "time" in query:
-        current_time = datetime.datetime.now().strftime("%I:%M %p")
-        return f"The current time is {current_time}."
+    Args:
+        query (str): The user's voice command or text input
+        match (IntentMatch): The routed intent, if already computed
+        session_id (str): The conversation the command belongs to, if any
+        answer (dict): Receives the "source" of the response, if given
+        
+    Yields:
+        str: Chunks of the response to the user's command
+    """
+    logger.info(f"Processing command (streaming): {query}")
     
-    # Handle date queries
-    elif "date" in query or "day" in query:
-        today = datetime.datetime.now().strftime("%A, %B %d, %Y")
-        return f"Today is {today}."
+    response = builtin_response(query, match)
+    if response is not None:
+        if answer is not None:
+            answer['source'] = 'builtin'
+        chat_answers.inc('builtin')
+        yield response
+        return
     
-    # Handle weather queries (placeholder - would need API integration)
-    elif "weather" in query:
-        return "I don't have access to real-time weather data right now, but I can help you with other things."
+    yield from stream_simple_response(query, session_id, answer)
+
+def current_time_response():
+    current_time = datetime.datetime.now().strftime("%I:%M %p")
+    return f"The current time is {current_time}."
+
+def current_date_response():
+    today = datetime.datetime.now().strftime("%A, %B %d, %Y")
+    return f"Today is {today}."
+
+# Responses for intents that don't need the language model
+BUILTIN_RESPONSES = {
+    "greeting": lambda: random.choice(GREETINGS),
+    "farewell": lambda: random.choice(FAREWELLS),
+    "time": current_time_response,
+    "date": current_date_response,
+    # Placeholder - would need API integration
+    "weather": lambda: "I don't have access to real-time weather data right now, but I can help you with other things.",
+    "identity": lambda: "I'm Savin, your personal AI assistant. I can help you with opening apps, setting reminders, taking notes, and having conversations.",
+    "capabilities": lambda: "I can open applications for you, set reminders, take notes, tell you the time and date, and have a friendly conversation. Just tell me what you need!",
+    # Action intents are carried out by app.py; acknowledge them when called directly
+    "open_app": lambda: "I'll open that for you right away.",
+    "set_reminder": lambda: "I'd be happy to set a reminder for you. What would you like me to remind you about?",
+    "take_note": lambda: "I'll take a note for you. What would you like me to write down?",
+    "search_notes": lambda: "I'll look through your notes. What should I search for?",
+}
+
+def builtin_response(query, match=None):
+    """
+    Answer commands that don't need the language model.
     
-    # Handle basic questions about the assistant
-    elif "who are you" in query or "your name" in query:
-        return "I'm Savin, your personal AI assistant. I can help you with opening apps, setting reminders, taking notes, and having conversations."
+    Args:
+        query (str): The user's voice command or text input
+        match (IntentMatch): The routed intent, if already computed
+        
+    Returns:
+        str or None: The response, or None if the query should go to chat
+    """
+    match = match or route(query)
+    respond = BUILTIN_RESPONSES.get(match.intent)
+    return respond() if respond else None
+
+def answered(response, source):
+    """Package a response with the path that produced it."""
+    chat_answers.inc(source)
+    return {'response': response, 'source': source}
+
+def llm_usable():
+    """
+    Check whether a generation is worth waiting for.
     
-    # Handle capability questions
-    elif "what can you do" in query or "help me" in query or "your capabilities" in query:
-        return "I can open applications for you, set reminders, take notes, tell you the time and date, and have a friendly conversation. Just tell me what you need!"
+    Busy slots alone are not enough to give up, since batches and finishing
+    background generations can fill them all: the request queues and the
+    deadline bounds its wait. Only a queue that is already LLM_MAX_QUEUED
+    deep is skipped at once.
+    """
+    if not OLLAMA_AVAILABLE:
+        return False
+    if ollama_client.waiting >= LLM_MAX_QUEUED:
+        logger.info(f"{ollama_client.waiting} requests already waiting for Ollama; "
+                    f"answering without the language model")
+        return False
+    return True
+
+def fallback_response(query):
+    """
+    Answer without the language model: from the response cache if this
+    query was answered before, otherwise from the rule-based responses.
     
-    # Determine if this is a command we should handle directly
-    if "open" in query:
-        # This will be handled by the dedicated function in openapps.py
-        # Just return a conversational acknowledgment
-        return "I'll open that for you right away."
+    Args:
+        query (str): The user's input
+        
+    Returns:
+        dict: The response and its source, "cache" or "rules"
+    """
+    cached = cached_chat_response(query) if OLLAMA_AVAILABLE else None
+    if cached is not None:
+        return answered(cached, 'cache')
+    return answered(rule_based_response(query), 'rules')
+
+def answer_chat(query, session_id=None, deadline=None):
+    """
+    Answer general conversation within the latency budget.
     
-    elif any(phrase in query for phrase in ["set a reminder", "remind me", "create a reminder"]):
-        # This will be handled by the dedicated function in reminder.py
-        return "I'd be happy to set a reminder for you. What would you like me to remind you about?"
+    The language model gets until the deadline (SAVIN_LLM_DEADLINE) to
+    start answering. If it is saturated, fails or is too slow, the reply
+    comes from fallback_response at once; a slow generation keeps running in
+    the background so its answer is cached for next time.
     
-    elif any(phrase in query for phrase in ["take a note", "write this down", "make a note", "write a note"]):
-        # This will be handled by the dedicated function in textRead.py
-        return "I'll take a note for you. What would you like me to write down?"
+    Callers with their own deadline (batches, which nobody is waiting on
+    word by word) bound their own concurrency, so they queue behind busy
+    slots instead of being turned away when the queue is deep.
     
-    else:
-        # For general chit-chat or unknown commands, provide a friendly response
-        return simple_response(query)
+    Args:
+        query (str): The user's input
+        session_id (str): The conversation the input belongs to, if any
+        deadline (float): Seconds to wait for the first chunk, or None for
+            SAVIN_LLM_DEADLINE
+        
+    Returns:
+        dict: The response and its source: "llm", "cache" or "rules"
+    """
+    if OLLAMA_AVAILABLE:
+        cached = cached_chat_response(query, session_id)
+        if cached is not None:
+            return answered(cached, 'cache')
+    usable = llm_usable() if deadline is None else OLLAMA_AVAILABLE
+    if usable:
+        try:
+            text = "".join(stream_chat_within(query, session_id, deadline or LLM_DEADLINE, check_cache=False))
+            if text:
+                return answered(text, 'llm')
+        except Exception as e:
+            logger.warning(f"Answering without the language model: {e}")
+    return fallback_response(query)
 
-def simple_response(query):
+def simple_response(query, session_id=None):
     """
     Provide a simple rule-based response for general conversation.
     
     Args:
         query (str): The user's input
+        session_id (str): The conversation the input belongs to, if any
         
     Returns:
         str: A response to the user
     """
+    return answer_chat(query, session_id)['response']
+
+def stream_simple_response(query, session_id=None, answer=None):
+    """
+    Streaming variant of simple_response.
+    
+    Args:
+        query (str): The user's input
+        session_id (str): The conversation the input belongs to, if any
+        answer (dict): Receives the "source" of the response, if given
+        
+    Yields:
+        str: Chunks of the response to the user
+    """
+    answer = {} if answer is None else answer
     if OLLAMA_AVAILABLE:
+        cached = cached_chat_response(query, session_id)
+        if cached is not None:
+            answer.update(answered(cached, 'cache'))
+            yield cached
+            return
+    if llm_usable():
+        streamed = False
         try:
-            return get_chat_response(query)
+            for chunk in stream_chat_within(query, session_id, check_cache=False):
+                if not streamed:
+                    streamed = True
+                    answer['source'] = 'llm'
+                    chat_answers.inc('llm')
+                yield chunk
+            if streamed:
+                return
         except Exception as e:
-            logger.error(f"Error getting Ollama response: {e}")
-            # Fall back to rule-based responses
-    query = query.lower()
+            if streamed:
+                # Part of the answer is already out; say what went wrong
+                yield error_message(e)
+                return
+            logger.warning(f"Answering without the language model: {e}")
+    fallback = fallback_response(query)
+    answer.update(fallback)
+    yield fallback['response']
+
+def rule_based_response(query):
+    """
+    Provide a keyword-based response when the language model is unavailable.
+    
+    Args:
+        query (str): The user's input
+        
+    Returns:
+        str: A response to the user
+    """
+    intent = smalltalk_router.match(query).intent
     
     # Check if user is asking how the assistant is
-    if any(phrase in query for phrase in ["how are you", "how's it going", "how do you do"]):
+    if intent == "how_are_you":
         return "I'm doing well, thank you for asking! How can I help you today?"
     
     # Check if user is expressing gratitude
-    elif any(word in query for word in ["thanks", "thank you", "appreciate"]):
+    elif intent == "thanks":
         return "You're welcome! I'm happy to help."
     
     # Check if user is asking about capabilities
-    elif any(phrase in query for phrase in ["can you", "are you able to"]):
+    elif intent == "ability_question":
         return "I can help you open applications, set reminders, take notes, and more. Just let me know what you need!"
     
     # Default response for unknown queries
@@ -154,6 +315,9 @@ def simple_response(query):
 
 # If run directly, test the module
 if __name__ == "__main__":
+    from log_setup import configure_logging
+    configure_logging()
+    
     test_queries = [
         "Hello there",
         "What time is it?",
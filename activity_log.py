@@ -0,0 +1,328 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger('ActivityLog')
+
+# Directory holding the log segments, relative to the working directory like
+# the activity_log.json file it replaces
+ACTIVITY_LOG_DIR = "activity_log"
+LEGACY_LOG_FILE = "activity_log.json"
+
+SEGMENT_MAX_BYTES = int(os.environ.get("SAVIN_ACTIVITY_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+FLUSH_INTERVAL = float(os.environ.get("SAVIN_ACTIVITY_FLUSH_INTERVAL", "1.0"))
+MAX_BATCH = 512
+MAX_PAGE_SIZE = 1000
+
+# Entries waiting for the writer; when full, new entries are dropped rather
+# than blocking the request that logged them
+QUEUE_SIZE = int(os.environ.get("SAVIN_ACTIVITY_QUEUE_SIZE", "10000"))
+
+class ActivityLog:
+    """
+    Append-only, line-delimited activity log.
+
+    Entries are queued by request threads and written in batches by a single
+    writer thread, which fsyncs on an interval and starts a new segment file
+    once the current one reaches the size limit. Reads stream the segments
+    line by line and page through them with an opaque cursor.
+    """
+
+    def __init__(self, directory=ACTIVITY_LOG_DIR, segment_max_bytes=SEGMENT_MAX_BYTES,
+                 flush_interval=FLUSH_INTERVAL, queue_size=QUEUE_SIZE):
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._migrate_lock = threading.Lock()
+        self._migrated = False
+        self._file = None
+        self._segment = None
+        # Entries lost to a full queue or a failed write
+        self.dropped = 0
+
+    # Writing
+
+    def append(self, entry):
+        """
+        Queue an entry for writing without blocking on disk.
+
+        If the writer has fallen so far behind that the queue is full, the
+        entry is dropped and counted instead.
+
+        Args:
+            entry (dict): JSON-serializable activity record
+
+        Returns:
+            bool: True if the entry was queued
+        """
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Activity log queue full; {self.dropped} entries dropped so far")
+            return False
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._migrate_legacy_log()
+            segments = self._segments()
+            self._open_segment(segments[-1] if segments else 1)
+            self._thread = threading.Thread(target=self._writer, name="activity-log-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+            logger.info(f"Activity log writer started in {self.directory}")
+
+    def _segment_path(self, number):
+        return self.directory / f"activity-{number:06d}.jsonl"
+
+    def _segments(self):
+        numbers = []
+        for path in self.directory.glob("activity-*.jsonl"):
+            try:
+                numbers.append(int(path.stem.split("-")[1]))
+            except ValueError:
+                continue
+        return sorted(numbers)
+
+    def _open_segment(self, number):
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self._segment = number
+        self._file = open(self._segment_path(number), 'ab')
+
+    def _writer(self):
+        last_sync = time.monotonic()
+        dirty = False
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_sync))
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+
+            # Drain whatever else is already waiting into the same write
+            while batch and len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            lines = [json.dumps(entry).encode("utf-8") + b"\n" for entry in batch if entry is not None]
+            try:
+                if lines:
+                    self._file.write(b"".join(lines))
+                    self._file.flush()
+                    dirty = True
+                    if self._file.tell() >= self.segment_max_bytes:
+                        self._open_segment(self._segment + 1)
+                        dirty = False
+                        last_sync = time.monotonic()
+                if dirty and (stop or time.monotonic() - last_sync >= self.flush_interval):
+                    os.fsync(self._file.fileno())
+                    dirty = False
+                    last_sync = time.monotonic()
+            except Exception as e:
+                self.dropped += len(lines)
+                logger.error(f"Error writing activity log: {str(e)}")
+
+            if not batch:
+                last_sync = time.monotonic()
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """Block until every queued entry has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write out pending entries, fsync and stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            # The writer keeps draining, so room for the sentinel opens up
+            self._queue.put(None, timeout=5)
+        except queue.Full:
+            logger.error("Activity log writer is not draining; closing without it")
+        self._thread.join(timeout=5)
+        if self._file:
+            self._file.close()
+
+    def _migrate_legacy_log(self):
+        # Bring entries from the old single JSON array file into the first
+        # segment; runs once, before the first read or write
+        with self._migrate_lock:
+            if self._migrated:
+                return
+            self._migrated = True
+            legacy = Path(LEGACY_LOG_FILE)
+            if not legacy.exists() or self._segments():
+                return
+            try:
+                with open(legacy, 'r') as f:
+                    entries = json.load(f)
+                self.directory.mkdir(parents=True, exist_ok=True)
+                with open(self._segment_path(1), 'w') as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry) + "\n")
+                legacy.rename(legacy.with_suffix(".json.migrated"))
+                logger.info(f"Migrated {len(entries)} entries from {legacy}")
+            except Exception as e:
+                logger.error(f"Could not migrate {legacy}: {str(e)}")
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "max_queued": self._queue.maxsize, "dropped": self.dropped}
+
+    # Reading
+
+    def _parse_cursor(self, cursor):
+        # A cursor is "segment:offset", with offset at the start of a line
+        parts = cursor.split(":")
+        if len(parts) != 2 or not all(part.isdigit() for part in parts):
+            raise ValueError(f"Malformed cursor: {cursor!r}")
+        segment, offset = int(parts[0]), int(parts[1])
+        if offset:
+            try:
+                with open(self._segment_path(segment), 'rb') as f:
+                    f.seek(offset - 1)
+                    at_line_start = f.read(1) == b"\n"
+            except FileNotFoundError:
+                raise ValueError(f"Cursor points to a missing segment: {cursor!r}") from None
+            if not at_line_start:
+                raise ValueError(f"Cursor does not point to an entry: {cursor!r}")
+        return segment, offset
+
+    def read(self, cursor=None, limit=100, activity_type=None, since=None, until=None):
+        """
+        Read one page of entries, oldest first.
+
+        Args:
+            cursor (str): Position returned by a previous call, or None to start
+                at the beginning
+            limit (int): Maximum number of entries to return
+            activity_type (str): Only return entries of this type
+            since (str): Only return entries at or after this ISO timestamp
+            until (str): Only return entries before this ISO timestamp
+
+        Returns:
+            tuple: (entries, next_cursor), where next_cursor is None once the
+            end of the log has been reached
+
+        Raises:
+            ValueError: If the cursor or limit is malformed
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        self._migrate_legacy_log()
+        segments = self._segments() if self.directory.exists() else []
+        if not segments:
+            return [], None
+
+        segment, offset = segments[0], 0
+        if cursor:
+            segment, offset = self._parse_cursor(cursor)
+
+        entries = []
+        for position, number in enumerate(segments):
+            if number < segment:
+                continue
+            if number > segment:
+                offset = 0
+
+            # Skip whole segments that end before the requested time range
+            if since and offset == 0 and position + 1 < len(segments):
+                next_first = self._first_timestamp(segments[position + 1])
+                if next_first and next_first <= since:
+                    continue
+
+            with open(self._segment_path(number), 'rb') as f:
+                f.seek(offset)
+                while True:
+                    line = f.readline()
+                    if not line or not line.endswith(b"\n"):
+                        # End of segment, or a batch still being written
+                        break
+                    offset = f.tell()
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+                    timestamp = entry.get("timestamp", "")
+                    if until and timestamp >= until:
+                        return entries, None
+                    if since and timestamp < since:
+                        continue
+                    if activity_type and entry.get("type") != activity_type:
+                        continue
+
+                    entries.append(entry)
+                    if len(entries) >= limit:
+                        return entries, f"{number}:{offset}"
+
+            segment = number
+
+        return entries, None
+
+    def _first_timestamp(self, number):
+        try:
+            with open(self._segment_path(number), 'rb') as f:
+                return json.loads(f.readline()).get("timestamp")
+        except Exception:
+            return None
+
+# Shared log used by the activity endpoints
+activity_log = ActivityLog()
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import datetime
+    import tempfile
+
+    log = ActivityLog(tempfile.mkdtemp(), segment_max_bytes=4096)
+    start = time.perf_counter()
+    for i in range(1000):
+        log.append({
+            "timestamp": datetime.datetime.now().isoformat(),
+            "type": "command" if i % 2 else "page_view",
+            "details": {"n": i}
+        })
+    print(f"Queued 1000 entries in {(time.perf_counter() - start) * 1000:.2f}ms")
+    log.flush()
+    print(f"Segments: {log._segments()}")
+
+    cursor, pages, total = None, 0, 0
+    while True:
+        entries, cursor = log.read(cursor, limit=100, activity_type="command")
+        pages += 1
+        total += len(entries)
+        if cursor is None:
+            break
+    print(f"Read {total} command entries in {pages} pages")
+
+    for bad in ("1:-5", "1:abc", "1:3", "999:10"):
+        try:
+            log.read(bad)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+    log.close()
@@ -1,153 +1,671 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context, g
 import os
 import logging
 from flask_cors import CORS
-from PIL import Image, ImageDraw
-import io
 import json
 import datetime
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from log_setup import configure_logging, logging_stats, new_request_id, request_id_var
+
+# Configure logging once for the process, before our modules start logging
+configure_logging()
 
 # Import our custom modules
-from VoiceAssistant_main import process_voice_command, simple_response
+from VoiceAssistant_main import answer_voice_command, answer_chat, stream_voice_command, BUILTIN_RESPONSES
+from intents import route
+from app_index import app_index
+from launcher import app_launcher
 from openapps import open_app
-from reminder import set_reminder_with_details
-from textRead import write_in_notepad
-
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='savin_app.log'
-)
+from reminder import (set_reminder_with_details, upcoming_reminders, cancel_reminder, skip_reminder, snooze_reminder,
+                      scheduler as reminder_scheduler, start_reminder_checker)
+from textRead import write_in_notepad, search_notes
+from notes_store import notes_store
+from notes_search import notes_index
+from activity_log import activity_log
+from health import health_probe
+from response_cache import response_cache
+from sessions import chat_sessions
+from warmup import model_warmer
+from model_router import model_router
+from singleflight import async_generations, generations
+from speculation import speculations
+from metrics import registry, stage, track_request, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from lifecycle import lifecycle
+from static_assets import web_assets
+
 logger = logging.getLogger('SavinApp')
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Batch limits; override through the environment when deploying
+BATCH_MAX_ITEMS = int(os.environ.get("SAVIN_BATCH_MAX_ITEMS", "500"))
+# Threads answering batched language-model queries; more would only wait
+# for Ollama's generation slots
+BATCH_WORKERS = int(os.environ.get("SAVIN_BATCH_WORKERS", os.environ.get("SAVIN_OLLAMA_MAX_CONCURRENT", "4")))
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch")
+# Seconds a batched query waits for the language model to start answering.
+# Nobody is listening live, so it gets the read timeout rather than the
+# interactive deadline
+BATCH_LLM_DEADLINE = float(os.environ.get("SAVIN_BATCH_LLM_DEADLINE",
+                                          os.environ.get("SAVIN_OLLAMA_READ_TIMEOUT", "120")))
+# Longest snooze the reminder API accepts, in minutes
+MAX_SNOOZE_MINUTES = 24 * 60
+
+@app.before_request
+def assign_request_id():
+    # Tag every log record written while handling this request
+    g.request_id = request.headers.get('X-Request-ID') or new_request_id()
+    request_id_var.set(g.request_id)
+
+@app.before_request
+def ensure_services():
+    # Entry points start the services explicitly; this covers WSGI servers
+    # that import the app themselves, in the worker that serves the request
+    if not lifecycle.started:
+        lifecycle.start()
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '-')
+    return response
+
+@app.teardown_request
+def clear_request_id(error=None):
+    request_id_var.set("-")
+
+# Background services, started once by the serving process (see lifecycle)
+# Keep the Ollama health state fresh in the background
+lifecycle.register("health_probe", health_probe.start, health_probe.stop)
+# Load the chat models now rather than on the first query
+lifecycle.register("model_warmer", model_warmer.start, model_warmer.stop)
+# Fire reminders when they fall due
+lifecycle.register("reminders", start_reminder_checker, reminder_scheduler.stop)
+# Index installed applications so "open ..." can resolve fuzzy names
+lifecycle.register("app_index", app_index.refresh_in_background)
+# Load the notes search index before the first search needs it
+lifecycle.register("notes_index", notes_index.load_in_background)
+lifecycle.register("batch_pool", stop=lambda: batch_pool.shutdown(wait=False, cancel_futures=True))
+# Read the built web UI into memory before the first page load
+lifecycle.register("web_assets", web_assets.load)
+
+def asset_response(asset):
+    """
+    Serve a web UI asset from memory.
+
+    Args:
+        asset (Asset): The page or a fingerprinted file
+
+    Returns:
+        Response: The precompressed variant the client accepts, or a 304
+        if its cached copy is current
+    """
+    status, headers, body = asset.respond(request.headers.get('Accept-Encoding', ''),
+                                          request.headers.get('If-None-Match'))
+    return Response(body, status=status, headers=headers)
+
 @app.route('/')
 def index():
     try:
-        return render_template('index.html')
+        return asset_response(web_assets.index())
     except Exception as e:
         logger.error(f"Error serving index.html: {e}")
         return "Error loading the application. Check logs for details.", 500
-@app.route('/api/process_command', methods=['POST'])
-def api_process_command():
-    try:
-        data = request.json
-        query = data.get('query', '')
+
+@app.route('/assets/<path:name>')
+def static_asset(name):
+    asset = web_assets.get(name)
+    if asset is None:
+        return "Not found", 404
+    return asset_response(asset)
+def handle_direct_command(query, match=None):
+    """
+    Handle commands that perform an action on this machine.
+    
+    Args:
+        query (str): The user's command
+        match (IntentMatch): The routed intent, if already computed
         
-        if not query:
-            return jsonify({'response': "I couldn't hear you. Please try again."})
-        logger.info(f"Received query: {query}")
+    Returns:
+        dict or None: The response payload, or None if the query is not an
+        app, reminder or note command
+    """
+    match = match or route(query)
+    
+    # Handle opening applications
+    if match.intent == "open_app":
+        app_name = match.slots.get("app")
+        if app_name:
+            with stage("open_app"):
+                result = open_app(app_name)
+            if result:
+                return {'response': f"Opening {app_name}"}
+            else:
+                return {'response': f"I couldn't find or open {app_name}. Can you try with a different application?"}
+        else:
+            return {'response': "Which app would you like me to open?"}
+    # Handle reminders
+    elif match.intent == "set_reminder":
+        time_str = match.slots.get("when")
+        message = match.slots.get("message")
         
-        # Extract command type
-        query_lower = query.lower()
+        if time_str and message:
+            with stage("set_reminder"):
+                return set_reminder_with_details(time_str, message)
+        else:
+            return {
+                'response': "I'd like to set a reminder for you. Please tell me when and what to remind you about. For example, 'Remind me to call mom at 5pm'."
+            }
+    # Handle note taking
+    elif match.intent == "take_note":
+        note_text = match.slots.get("text")
         
-        # Handle opening applications
-        if "open" in query_lower:
-            app_name = query_lower.replace("open", "").strip()
-            if app_name:
-                result = open_app(app_name)
-                if result:
-                    return jsonify({'response': f"Opening {app_name}"})
-                else:
-                    return jsonify({'response': f"I couldn't find or open {app_name}. Can you try with a different application?"})
+        if note_text:
+            with stage("write_note"):
+                success = write_in_notepad(note_text)
+            if success:
+                return {'response': f"I've written your note: {note_text}"}
             else:
-                return jsonify({'response': "Which app would you like me to open?"})
-        # Handle reminders
-        elif "remind me" in query_lower or "set a reminder" in query_lower or "reminder" in query_lower:
-            # Try to extract time and message from the query
-            time_parts = ["at", "in", "on", "for", "tomorrow", "today"]
-            time_str = None
-            message = None
+                return {'response': "I had trouble writing that note. Could you try again?"}
+        else:
+            return {'response': "What would you like me to write down?"}
+    # Handle note search
+    elif match.intent == "search_notes":
+        terms = match.slots.get("terms")
+        
+        if terms:
+            with stage("search_notes"):
+                results = search_notes(terms, limit=3)
+            if not results:
+                return {'response': f"I couldn't find any notes about {terms}.", 'notes': []}
+            best = results[0]
+            when = datetime.datetime.fromisoformat(best['timestamp']).strftime("%B %d")
+            count = "one note" if len(results) == 1 else f"{len(results)} notes"
+            return {
+                'response': f"I found {count}. The best match is from {when}: {best['snippet']}",
+                'notes': results
+            }
+        else:
+            return {'response': "What should I look for in your notes?"}
+    
+    return None
+
+def sse_event(data, event=None):
+    """Format a payload as a server-sent event."""
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+def json_object():
+    """Return the request's JSON body, or None if it is missing or not an object."""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
+def bad_json_response():
+    """The 400 response for a body that is not a JSON object."""
+    return jsonify({'error': "Expected a JSON object body"}), 400
+
+def route_command(query, tracked):
+    """Match a query to its intent, recording the time taken and the intent."""
+    with stage("intent"):
+        match = route(query)
+    tracked.intent = match.intent
+    return match
+
+@app.route('/api/process_command', methods=['POST'])
+def api_process_command():
+    data = json_object()
+    if data is None:
+        return bad_json_response()
+    with track_request("process_command") as tracked:
+        try:
+            query = data.get('query', '')
             
-            for part in time_parts:
-                if part in query_lower:
-                    split_query = query_lower.split(part, 1)
-                    if len(split_query) > 1:
-                        time_str = part + split_query[1]
-                        message = split_query[0].replace("remind me", "").replace("set a reminder", "").replace("reminder", "").strip()
-                        break
+            if not query:
+                return jsonify({'response': "I couldn't hear you. Please try again."})
+            logger.info(f"Received query: {query}")
             
-            if time_str and message:
-                result = set_reminder_with_details(time_str, message)
-                return jsonify(result)
-            else:
-                return jsonify({
-                    'response': "I'd like to set a reminder for you. Please tell me when and what to remind you about. For example, 'Remind me to call mom at 5pm'."
-                })
-        # Handle note taking
-        elif "write" in query_lower or "note" in query_lower or "take a note" in query_lower:
-            note_text = query_lower
-            for prefix in ["write", "note", "take a note", "write a note", "type"]:
-                note_text = note_text.replace(prefix, "").strip()
+            match = route_command(query, tracked)
+            result = handle_direct_command(query, match)
+            if result is not None:
+                return jsonify(dict(result, source='action'))
             
-            if note_text:
-                success = write_in_notepad(note_text)
-                if success:
-                    return jsonify({'response': f"I've written your note: {note_text}"})
-                else:
-                    return jsonify({'response': "I had trouble writing that note. Could you try again?"})
-            else:
-                return jsonify({'response': "What would you like me to write down?"})
+            # Process general voice commands
+            return jsonify(answer_voice_command(query, match, data.get('session_id')))
                 
-        # Process general voice commands
+        except Exception as e:
+            tracked.status = "error"
+            logger.error(f"Error processing command: {e}")
+            return jsonify({'response': "I encountered an error processing your request. Please try again."})
+
+def parse_batch(data):
+    """
+    Validate a batch request body.
+    
+    Args:
+        data (dict): {"queries": [...], "session_id": ...}; each query is a
+            string or a {"query", "session_id"} object
+        
+    Returns:
+        list: (query, session_id) pairs in request order
+        
+    Raises:
+        ValueError: If the body is not a usable batch
+    """
+    queries = data.get('queries') if isinstance(data, dict) else None
+    if not isinstance(queries, list) or not queries:
+        raise ValueError("Expected a non-empty 'queries' list")
+    if len(queries) > BATCH_MAX_ITEMS:
+        raise ValueError(f"At most {BATCH_MAX_ITEMS} queries per batch")
+    
+    default_session = data.get('session_id')
+    items = []
+    for entry in queries:
+        if isinstance(entry, dict):
+            items.append((str(entry.get('query') or ''), entry.get('session_id', default_session)))
         else:
-            response = process_voice_command(query)
-            return jsonify({'response': response})
-            
-    except Exception as e:
-        logger.error(f"Error processing command: {e}")
-        return jsonify({'response': "I encountered an error processing your request. Please try again."})
+            items.append((str(entry or ''), default_session))
+    return items
 
-@app.route('/api/simple_response', methods=['POST'])
-def api_simple_response():
-    try:
-        data = request.json
-        query = data.get('query', '')
+def run_batch_item(index, query, session_id, match=None):
+    """
+    Answer one batched query the way /api/process_command would.
+    
+    Args:
+        index (int): Position of the query in the batch
+        query (str): The command
+        session_id (str): The conversation it belongs to, if any
+        match (IntentMatch): The routed intent, if already computed
+        
+    Returns:
+        dict: The response payload plus index, intent, source, status and timing
+    """
+    start = time.perf_counter()
+    item = {'index': index, 'query': query}
+    with track_request("process_command_batch") as tracked:
+        try:
+            if not query:
+                result = {'response': "I couldn't hear you. Please try again."}
+            else:
+                match = match or route_command(query, tracked)
+                tracked.intent = match.intent
+                result = handle_direct_command(query, match)
+                if result is None:
+                    result = answer_voice_command(query, match, session_id, BATCH_LLM_DEADLINE)
+                else:
+                    result = dict(result, source='action')
+            item.update(result, status='ok')
+        except Exception as e:
+            tracked.status = "error"
+            logger.error(f"Error processing batched command {index}: {e}")
+            item.update(response="I encountered an error processing your request. Please try again.",
+                        status='error')
+        item['intent'] = tracked.intent
+    item['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return item
+
+def iter_batch(items):
+    """
+    Answer batched queries, yielding each result as it completes.
+    
+    Queries answered locally (built-in replies, apps, reminders and notes)
+    run inline in request order, so their side effects happen in the order
+    they were spoken. Queries that need the language model run
+    concurrently on the batch pool, each with BATCH_LLM_DEADLINE to start.
+    
+    Args:
+        items (list): (query, session_id) pairs from parse_batch
         
+    Yields:
+        dict: Results from run_batch_item, in completion order
+    """
+    futures = []
+    try:
+        for index, (query, session_id) in enumerate(items):
+            match = None
+            if query:
+                with stage("intent"):
+                    match = route(query)
+            if match is not None and match.intent not in BUILTIN_RESPONSES:
+                # Each task gets its own copy so the request id follows it
+                futures.append(batch_pool.submit(contextvars.copy_context().run,
+                                                 run_batch_item, index, query, session_id, match))
+            else:
+                yield run_batch_item(index, query, session_id, match)
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # The client went away: don't start generations nobody will read
+        for future in futures:
+            future.cancel()
+
+def batch_summary(results, start):
+    return {
+        'count': len(results),
+        'errors': sum(1 for item in results if item['status'] != 'ok'),
+        'duration_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
+
+@app.route('/api/process_command/batch', methods=['POST'])
+def api_process_command_batch():
+    """
+    Process a list of commands, e.g. replayed from an offline device.
+    
+    Results come back in request order, each with its own status and timing.
+    """
+    start = time.perf_counter()
+    try:
+        items = parse_batch(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    logger.info(f"Received batch of {len(items)} commands")
+    results = sorted(iter_batch(items), key=lambda item: item['index'])
+    return jsonify(dict(batch_summary(results, start), results=results))
+
+@app.route('/api/process_command/batch/stream', methods=['POST'])
+def api_process_command_batch_stream():
+    """
+    Server-sent-events variant of /api/process_command/batch.
+    
+    Emits one "data" event per command as soon as it completes, carrying its
+    index in the batch, followed by a "done" event with the totals.
+    """
+    start = time.perf_counter()
+    try:
+        items = parse_batch(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    logger.info(f"Received streaming batch of {len(items)} commands")
+    
+    def generate():
+        results = []
+        for item in iter_batch(items):
+            results.append(item)
+            yield sse_event(item)
+        yield sse_event(batch_summary(results, start), event='done')
+    
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+@app.route('/api/process_command/stream', methods=['POST'])
+def api_process_command_stream():
+    """
+    Server-sent-events variant of /api/process_command.
+    
+    Emits one "data" event per chunk of the response as soon as it is
+    available, followed by a "done" event carrying the full text and what
+    answered it.
+    """
+    data = json_object()
+    if data is None:
+        return bad_json_response()
+    query = data.get('query', '')
+    session_id = data.get('session_id')
+    
+    def generate():
         if not query:
-            return jsonify({'response': "I couldn't understand that. Please try again."})
-            
-        response = simple_response(query)
-        return jsonify({'response': response})
+            text = "I couldn't hear you. Please try again."
+            yield sse_event({'text': text})
+            yield sse_event({'response': text}, event='done')
+            return
+        
+        logger.info(f"Received streaming query: {query}")
+        parts = []
+        answer = {}
+        with track_request("process_command_stream") as tracked:
+            try:
+                match = route_command(query, tracked)
+                result = handle_direct_command(query, match)
+                if result is not None:
+                    answer['source'] = 'action'
+                    chunks = [result['response']]
+                else:
+                    chunks = stream_voice_command(query, match, session_id, answer)
+                for chunk in chunks:
+                    parts.append(chunk)
+                    yield sse_event({'text': chunk})
+            except Exception as e:
+                tracked.status = "error"
+                logger.error(f"Error streaming command: {e}")
+                text = "I encountered an error processing your request. Please try again."
+                parts.append(text)
+                yield sse_event({'text': text})
+        yield sse_event({'response': ''.join(parts), 'source': answer.get('source')}, event='done')
+    
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+@app.route('/api/speculate', methods=['POST'])
+def api_speculate():
+    """
+    Start on an interim speech transcript while the user is still speaking.
+    
+    Queries bound for the language model start generating at once; the
+    final request for the same text picks the generation up. Commands and
+    built-in replies are only routed, never carried out early. An empty
+    transcript drops the session's speculation.
+    """
+    data = json_object()
+    if data is None:
+        return bad_json_response()
+    try:
+        transcript = str(data.get('transcript') or '').strip()
+        session_id = data.get('session_id')
+        
+        if not transcript:
+            return jsonify({'speculating': False, 'cancelled': speculations.cancel(session_id)})
+        
+        with stage("intent"):
+            match = route(transcript)
+        if match.intent in BUILTIN_RESPONSES:
+            speculations.cancel(session_id)
+            return jsonify({'speculating': False, 'reason': 'command', 'intent': match.intent})
+        return jsonify(dict(speculations.update(session_id, transcript), intent=match.intent))
         
     except Exception as e:
-        logger.error(f"Error generating simple response: {e}")
-        return jsonify({'response': "I had trouble processing that. Could you try again?"})
+        logger.error(f"Error speculating on transcript: {e}")
+        return jsonify({'speculating': False, 'reason': 'error'})
+
+@app.route('/api/simple_response', methods=['POST'])
+def api_simple_response():
+    data = json_object()
+    if data is None:
+        return bad_json_response()
+    with track_request("simple_response") as tracked:
+        try:
+            query = data.get('query', '')
+            
+            if not query:
+                return jsonify({'response': "I couldn't understand that. Please try again."})
+            
+            tracked.intent = "chat"
+            return jsonify(answer_chat(query, data.get('session_id')))
+            
+        except Exception as e:
+            tracked.status = "error"
+            logger.error(f"Error generating simple response: {e}")
+            return jsonify({'response': "I had trouble processing that. Could you try again?"})
 
 @app.route('/api/status', methods=['GET'])
 def api_status():
     """
-    Check if the Ollama API is running
+    Report liveness and the cached Ollama health state gathered by the
+    background probe; cheap enough to poll. Detailed counters are served by
+    /api/diagnostics.
     """
     try:
-        # Import the Ollama module
-        try:
-            from chat import chat_with_ollama
-            # Try a simple query to check if Ollama is working
-            response = chat_with_ollama("test", model="mistral")
-            ollama_status = "running"
-        except ImportError:
-            ollama_status = "not_installed"
-        except Exception:
-            ollama_status = "error"
-            
-        return jsonify({
-            'status': 'running',
-            'ollama_status': ollama_status,
-            'time': datetime.datetime.now().isoformat()
-        })
+        return jsonify(dict(
+            health_probe.snapshot(),
+            status='running',
+            time=datetime.datetime.now().isoformat()
+        ))
     except Exception as e:
         logger.error(f"Error checking status: {e}")
         return jsonify({'status': 'error', 'message': str(e)})
 
+@app.route('/api/diagnostics', methods=['GET'])
+def api_diagnostics():
+    """
+    Report the internal counters of every subsystem, for debugging
+    """
+    try:
+        return jsonify(dict(
+            health=health_probe.snapshot(),
+            models=model_warmer.snapshot(),
+            model_tiers=model_router.stats(),
+            response_cache=response_cache.stats(),
+            sessions=chat_sessions.stats(),
+            speculation=speculations.stats(),
+            singleflight={'threads': generations.stats(), 'event_loop': async_generations.stats()},
+            app_index=app_index.stats(),
+            activity_log=activity_log.stats(),
+            lifecycle=lifecycle.snapshot(),
+            web_assets=web_assets.stats(),
+            logging=logging_stats(),
+            time=datetime.datetime.now().isoformat()
+        ))
+    except Exception as e:
+        logger.error(f"Error collecting diagnostics: {e}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def api_end_session(session_id):
+    """
+    Forget a conversation so the next message starts afresh
+    """
+    return jsonify({'success': chat_sessions.reset(session_id)})
+
+@app.route('/metrics', methods=['GET'])
+def api_metrics():
+    """
+    Expose per-stage latency histograms, request counts by intent, error
+    counts and in-flight gauges in Prometheus text format.
+    """
+    return Response(registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/launches', methods=['GET'])
+def api_launches():
+    """
+    Report recently launched applications with their PID, spawn latency and
+    exit status.
+    """
+    try:
+        limit = int(request.args.get('limit', 50))
+        return jsonify({'launches': app_launcher.launches(limit), 'stats': app_launcher.stats()})
+    except ValueError as e:
+        return jsonify({'error': f"Invalid limit: {e}"}), 400
+
+@app.route('/api/notes', methods=['GET'])
+def api_notes():
+    """
+    List notes: the newest ones by default, or those created between the
+    since and until ISO timestamps.
+    """
+    try:
+        limit = int(request.args.get('limit', 20))
+        with_text = request.args.get('text', 'true').lower() != 'false'
+        since = request.args.get('since')
+        until = request.args.get('until')
+        if since or until:
+            notes = notes_store.range(since=since, until=until, limit=limit, with_text=with_text)
+        else:
+            notes = notes_store.recent(limit, with_text=with_text)
+        return jsonify({'notes': notes, 'count': notes_store.count()})
+    except ValueError as e:
+        return jsonify({'error': f"Invalid limit or timestamp: {e}"}), 400
+    except Exception as e:
+        logger.error(f"Error listing notes: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/notes/search', methods=['GET'])
+def api_search_notes():
+    """
+    Search notes by BM25 relevance; the last query word also matches as a
+    prefix. Returns ranked notes with snippets.
+    """
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'error': 'Missing query parameter q'}), 400
+    try:
+        limit = int(request.args.get('limit', 10))
+        start = time.perf_counter()
+        results = notes_index.search(query, limit=max(1, min(limit, 100)))
+        took_ms = (time.perf_counter() - start) * 1000
+        return jsonify({'results': results, 'took_ms': round(took_ms, 2)})
+    except ValueError as e:
+        return jsonify({'error': f"Invalid limit: {e}"}), 400
+    except Exception as e:
+        logger.error(f"Error searching notes: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/notes/<int:note_id>', methods=['GET'])
+def api_note(note_id):
+    note = notes_store.get(note_id)
+    if note is None:
+        return jsonify({'status': 'error', 'message': 'No such note'}), 404
+    return jsonify(note)
+
+@app.route('/api/reminders', methods=['GET'])
+def api_reminders():
+    """
+    List upcoming reminder occurrences, expanding recurring ones over the
+    requested window (days, default 7).
+    """
+    try:
+        days = float(request.args.get('days', 7))
+        limit = int(request.args.get('limit', 100))
+        return jsonify({'reminders': upcoming_reminders(days=days, limit=limit)})
+    except ValueError as e:
+        return jsonify({'error': f"Invalid days or limit: {e}"}), 400
+    except Exception as e:
+        logger.error(f"Error listing reminders: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reminders/<int:reminder_id>', methods=['DELETE'])
+def api_cancel_reminder(reminder_id):
+    if cancel_reminder(reminder_id):
+        return jsonify({'status': 'success'})
+    return jsonify({'status': 'error', 'message': 'No such reminder'}), 404
+
+@app.route('/api/reminders/<int:reminder_id>/skip', methods=['POST'])
+def api_skip_reminder(reminder_id):
+    reminder = skip_reminder(reminder_id)
+    if reminder is None:
+        return jsonify({'status': 'error', 'message': 'No such reminder'}), 404
+    return jsonify({'status': 'success', 'reminder': reminder})
+
+@app.route('/api/reminders/<int:reminder_id>/snooze', methods=['POST'])
+def api_snooze_reminder(reminder_id):
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}  # No body snoozes for the default ten minutes
+    if not isinstance(data, dict):
+        return bad_json_response()
+    minutes = data.get('minutes', 10)
+    if isinstance(minutes, str) and minutes.strip().isdigit():
+        minutes = int(minutes)
+    # bool is an int subclass, so check the exact type
+    if type(minutes) is not int or not 0 < minutes <= MAX_SNOOZE_MINUTES:
+        return jsonify({'status': 'error',
+                        'message': f'minutes must be a whole number from 1 to {MAX_SNOOZE_MINUTES}'}), 400
+    reminder = snooze_reminder(reminder_id, minutes)
+    if reminder is None:
+        return jsonify({'status': 'error', 'message': 'No such reminder'}), 404
+    return jsonify({'status': 'success', 'reminder': reminder})
+
 @app.route('/api/log_activity', methods=['POST'])
 def log_activity():
+    data = json_object()
+    if data is None:
+        return bad_json_response()
     try:
-        data = request.json
         activity_type = data.get('type', 'unspecified')
         details = data.get('details', {})
         
@@ -158,26 +676,9 @@ def log_activity():
             'details': details
         }
         
-        # Append to activity log file
-        with open('activity_log.json', 'a+') as f:
-            # Check if file is empty
-            f.seek(0)
-            content = f.read().strip()
-            if not content:
-                json.dump([log_entry], f)
-            else:
-                f.seek(0)
-                try:
-                    existing_logs = json.load(f)
-                    existing_logs.append(log_entry)
-                    f.seek(0)
-                    f.truncate()
-                    json.dump(existing_logs, f)
-                except json.JSONDecodeError:
-                    # If file is corrupted, start fresh
-                    f.seek(0)
-                    f.truncate()
-                    json.dump([log_entry], f)
+        # Queue for the background writer; nothing touches the disk here
+        if not activity_log.append(log_entry):
+            return jsonify({'status': 'error', 'message': 'Activity log is backed up; entry dropped'}), 503
         
         return jsonify({'status': 'success'})
         
@@ -187,13 +688,27 @@ def log_activity():
 
 @app.route('/api/get_activity_log', methods=['GET'])
 def get_activity_log():
+    """
+    Page through the activity log.
+    
+    Query parameters: cursor (from the previous page), limit, type, and
+    since/until ISO timestamps.
+    
+    Responds with {"entries": [...], "next_cursor": str or null}; pass
+    next_cursor back as cursor for the following page. This replaces the
+    bare list of every entry the endpoint returned before the log was paged.
+    """
     try:
-        if os.path.exists('activity_log.json'):
-            with open('activity_log.json', 'r') as f:
-                logs = json.load(f)
-                return jsonify(logs)
-        else:
-            return jsonify([])
+        entries, next_cursor = activity_log.read(
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', 100),
+            activity_type=request.args.get('type'),
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        )
+        return jsonify({'entries': entries, 'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'error': f"Invalid cursor or limit: {e}"}), 400
     except Exception as e:
         logger.error(f"Error retrieving activity log: {e}")
         return jsonify({'error': str(e)}), 500
@@ -203,4 +718,8 @@ if __name__ == '__main__':
     port = 5000
     logger.info(f"Starting Savin Assistant application on http://localhost:{port}")
     print(f"Starting Savin Assistant application on http://localhost:{port}")
+    # The debug reloader's first process only watches for changes and runs
+    # the server in a child (WERKZEUG_RUN_MAIN set); start services there
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        lifecycle.start()
     app.run(debug=True, port=port)
\ No newline at end of file
@@ -0,0 +1,512 @@
+import json
+import logging
+import os
+import platform
+import re
+import shlex
+import threading
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+from pathlib import Path
+
+logger = logging.getLogger('AppIndex')
+
+# File caching the scanned directories between runs
+INDEX_FILE = "app_index.json"
+INDEX_VERSION = 1
+
+# Seconds a lookup miss waits before the directories are checked again
+REFRESH_INTERVAL = float(os.environ.get("SAVIN_APP_INDEX_REFRESH", "30"))
+# Lowest score a fuzzy match needs to be used
+MIN_SCORE = 0.75
+# Candidates, ranked by shared trigrams, that get an edit-distance check
+MAX_CANDIDATES = 12
+# Trigram overlap below which a candidate is not worth an edit-distance check
+MIN_OVERLAP = 0.3
+# Seconds a lookup waits for the first background scan before giving up
+LOAD_WAIT = float(os.environ.get("SAVIN_APP_INDEX_WAIT", "1.0"))
+
+# Executables on $PATH that must never be launched from a voice command,
+# however exactly they are named
+SYSTEM_COMMANDS = {
+    "shutdown", "reboot", "poweroff", "halt", "init", "telinit", "systemctl", "loginctl", "logoff",
+    "kill", "killall", "killall5", "pkill", "xkill", "taskkill", "tskill",
+    "rm", "rmdir", "dd", "shred", "mkfs", "fdisk", "sfdisk", "parted", "wipefs", "format", "diskpart",
+    "mount", "umount", "swapoff", "chmod", "chown", "sudo", "su", "doas", "pkexec", "runas",
+}
+
+# Words people add around an application name ("open the files app")
+NOISE_WORDS = {"the", "app", "application", "program", "my"}
+
+# Field codes a .desktop Exec line may contain; they stand for files or URLs
+# passed by a file manager and are dropped when launching by name
+_FIELD_CODE = re.compile(r"^%[fFuUdDnNickvm]$")
+_NON_ALNUM = re.compile(r"[^a-z0-9+]+")
+
+def get_index_file_path():
+    """Get the full path to the application index cache file."""
+    savin_dir = Path.home() / ".savin"
+
+    # Create directory if it doesn't exist
+    if not savin_dir.exists():
+        savin_dir.mkdir(exist_ok=True)
+
+    return savin_dir / INDEX_FILE
+
+def normalize_name(name):
+    """
+    Reduce an application name to lowercase words without punctuation or filler.
+
+    Args:
+        name (str): A spoken or installed application name
+
+    Returns:
+        str: The normalized name, e.g. "Files App" -> "files"
+    """
+    words = _NON_ALNUM.sub(" ", name.lower()).split()
+    kept = [word for word in words if word not in NOISE_WORDS]
+    return " ".join(kept or words)
+
+def trigrams(text):
+    """Get the set of character trigrams of a padded string."""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit=None):
+    """
+    Levenshtein distance between two strings.
+
+    Args:
+        a (str): First string
+        b (str): Second string
+        limit (int): Stop early and return limit + 1 once the distance is
+            known to exceed this
+
+    Returns:
+        int: The number of single-character edits turning a into b
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def default_sources():
+    """
+    Get the directories to scan on this platform.
+
+    Returns:
+        list: (kind, directory) pairs, highest precedence first
+    """
+    system = platform.system()
+    sources = []
+
+    if system == "Linux":
+        data_home = os.environ.get("XDG_DATA_HOME") or str(Path.home() / ".local" / "share")
+        data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+        for base in [data_home] + data_dirs.split(":") + [
+            str(Path.home() / ".local/share/flatpak/exports/share"),
+            "/var/lib/flatpak/exports/share",
+            "/var/lib/snapd/desktop",
+        ]:
+            if base:
+                sources.append(("desktop", os.path.join(base, "applications")))
+
+    elif system == "Darwin":  # macOS
+        for directory in [str(Path.home() / "Applications"), "/Applications",
+                          "/Applications/Utilities", "/System/Applications",
+                          "/System/Applications/Utilities"]:
+            sources.append(("bundle", directory))
+
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        # sbin holds system administration tools, not applications
+        if directory and os.path.basename(os.path.normpath(directory)) != "sbin":
+            sources.append(("path", directory))
+
+    # Keep the first occurrence of each directory
+    seen = set()
+    return [(kind, d) for kind, d in sources if not (d in seen or seen.add(d))]
+
+def is_system_command(name):
+    """Whether an executable name is a system administration tool, e.g. "shutdown" or "mkfs.ext4"."""
+    return name.lower().split(".")[0] in SYSTEM_COMMANDS
+
+def parse_desktop_entry(path):
+    """
+    Read the launcher fields of a .desktop file.
+
+    Args:
+        path (str): Path to the .desktop file
+
+    Returns:
+        dict or None: The entry, or None if it is not a launchable application
+    """
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    if in_entry:
+                        break
+                    in_entry = line == "[Desktop Entry]"
+                    continue
+                if in_entry and "=" in line and not line.startswith("#"):
+                    key, value = line.split("=", 1)
+                    # Localized keys like Name[de] are skipped
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+
+    app_id = os.path.basename(path)
+    if fields.get("Hidden", "").lower() == "true":
+        # Hides the entry of the same id in lower-precedence directories
+        return {"id": app_id, "hidden": True}
+    if fields.get("Type", "Application") != "Application" or "Exec" not in fields:
+        return None
+
+    try:
+        argv = [arg.replace("%%", "%") for arg in shlex.split(fields["Exec"]) if not _FIELD_CODE.match(arg)]
+    except ValueError:
+        return None
+    if not argv:
+        return None
+
+    names = [fields.get("Name", ""), fields.get("GenericName", ""), os.path.basename(argv[0])]
+    names += [keyword for keyword in fields.get("Keywords", "").split(";") if keyword]
+    return {
+        "id": app_id,
+        "name": fields.get("Name") or app_id[:-len(".desktop")],
+        "argv": argv,
+        "names": [name for name in names if name],
+        # NoDisplay entries can still be opened, but lose ties to visible ones
+        "visible": fields.get("NoDisplay", "").lower() != "true",
+    }
+
+def scan_directory(kind, directory):
+    """
+    List the applications in one directory.
+
+    Args:
+        kind (str): "desktop", "bundle" or "path"
+        directory (str): The directory to scan
+
+    Returns:
+        list: Application entries
+    """
+    entries = []
+    pathext = {ext.lower() for ext in os.environ.get("PATHEXT", "").split(";") if ext}
+    try:
+        with os.scandir(directory) as it:
+            for item in it:
+                name = item.name
+                if kind == "desktop":
+                    if name.endswith(".desktop"):
+                        entry = parse_desktop_entry(item.path)
+                        if entry:
+                            entries.append(entry)
+                elif kind == "bundle":
+                    if name.endswith(".app"):
+                        app = name[:-len(".app")]
+                        entries.append({"id": name, "name": app, "argv": ["open", "-a", app],
+                                        "names": [app], "visible": True})
+                else:
+                    stem, ext = os.path.splitext(name)
+                    if pathext:
+                        # Windows: only files with an executable extension
+                        if ext.lower() not in pathext:
+                            continue
+                        name = stem
+                    try:
+                        if not item.is_file() or (not pathext and not os.access(item.path, os.X_OK)):
+                            continue
+                    except OSError:
+                        continue
+                    entries.append({"id": name, "name": name, "argv": [item.path],
+                                    "names": [name], "visible": False})
+    except OSError:
+        return []
+    return entries
+
+class ApplicationIndex:
+    """
+    Index of installed applications with fuzzy name lookup.
+
+    The index is built from .desktop entries (or .app bundles on macOS) and
+    the executables on $PATH. Each scanned directory is cached on disk with
+    its mtime, so a refresh only rescans the directories that changed.
+
+    Every application is reachable under several normalized aliases (its
+    name, generic name, keywords and executable). Lookups try an exact alias
+    first, then rank aliases by shared character trigrams and confirm the
+    best few with edit distance, so "calc" or "files app" resolve without
+    touching the filesystem. Only launchers and the built-in tables are
+    matched fuzzily: a bare executable on $PATH needs its exact name, and
+    system administration tools are never indexed, so a misheard command
+    cannot resolve to something like shutdown.
+    """
+
+    def __init__(self, path=None, sources=None, refresh_interval=REFRESH_INTERVAL):
+        self.path = Path(path) if path else None
+        self.sources = sources
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        # directory -> {"kind", "mtime", "entries"}
+        self._dirs = {}
+        self._static = {}
+        self._loaded = False
+        self._ready = threading.Event()
+        self._loader = None
+        self._last_refresh = 0.0
+
+        # Lookup structures, swapped in as one tuple on every rebuild:
+        # (alias -> app, aliases by position, trigram count per position,
+        #  trigram -> positions)
+        self._index = ({}, [], [], {})
+
+        self.last_refresh_ms = None
+        self.last_rescanned = 0
+
+    def add_aliases(self, apps):
+        """
+        Register applications known without scanning, such as built-in tables.
+
+        Args:
+            apps (dict): Application name -> argument list
+        """
+        with self._lock:
+            for name, argv in apps.items():
+                self._static[name] = {"id": name, "name": name, "argv": list(argv),
+                                      "names": [name], "visible": True, "static": True}
+            if self._loaded:
+                self._rebuild()
+
+    def refresh(self):
+        """
+        Rescan every source directory whose mtime has changed.
+
+        Returns:
+            int: The number of directories rescanned
+        """
+        with self._lock:
+            start = time.perf_counter()
+            if not self._loaded:
+                self._load()
+
+            sources = self.sources if self.sources is not None else default_sources()
+            current = {}
+            rescanned = 0
+            for kind, directory in sources:
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+                cached = self._dirs.get(directory)
+                if cached and cached["kind"] == kind and cached["mtime"] == mtime:
+                    current[directory] = cached
+                else:
+                    current[directory] = {"kind": kind, "mtime": mtime, "entries": scan_directory(kind, directory)}
+                    rescanned += 1
+
+            changed = rescanned or list(current) != list(self._dirs)
+            self._dirs = current
+            if changed or not self._loaded:
+                self._rebuild()
+            self._loaded = True
+            self._ready.set()
+            self._last_refresh = time.monotonic()
+            self.last_rescanned = rescanned
+            self.last_refresh_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        if changed:
+            logger.info(f"Application index refreshed: {rescanned} directories rescanned, "
+                        f"{len(self._index[0])} names in {self.last_refresh_ms}ms")
+            self.save()
+        return rescanned
+
+    def refresh_in_background(self):
+        """Build or refresh the index without blocking the caller."""
+        with self._lock:
+            if self._loader is not None and self._loader.is_alive():
+                return
+            self._loader = threading.Thread(target=self.refresh, name="app-index", daemon=True)
+            self._loader.start()
+
+    def _rebuild(self):
+        # Earlier directories take precedence for the same desktop id, and
+        # application launchers beat bare executables for the same alias
+        apps = [(app, True) for app in self._static.values()]
+        hidden = set()
+        seen_ids = set()
+        for directory in self._dirs.values():
+            for entry in directory["entries"]:
+                if directory["kind"] == "desktop":
+                    if entry["id"] in seen_ids:
+                        continue
+                    seen_ids.add(entry["id"])
+                    if entry.get("hidden"):
+                        hidden.add(entry["id"])
+                        continue
+                elif directory["kind"] == "path" and is_system_command(entry["id"]):
+                    continue
+                # Bare executables can only be opened by their exact name
+                apps.append((entry, directory["kind"] != "path"))
+
+        aliases = {}
+        for app, fuzzy in apps:
+            rank = (not app.get("static"), not app["visible"])
+            for name in app["names"]:
+                alias = normalize_name(name)
+                if alias and (alias not in aliases or rank < aliases[alias][0]):
+                    aliases[alias] = (rank, app, fuzzy)
+
+        alias_list = [alias for alias, (_, _, fuzzy) in aliases.items() if fuzzy]
+        gram_counts = []
+        postings = defaultdict(list)
+        for position, alias in enumerate(alias_list):
+            grams = trigrams(alias)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(position)
+
+        self._index = (
+            {alias: app for alias, (_, app, _) in aliases.items()},
+            alias_list,
+            gram_counts,
+            {gram: tuple(positions) for gram, positions in postings.items()},
+        )
+
+    def lookup(self, name):
+        """
+        Find the installed application best matching a spoken name.
+
+        Args:
+            name (str): The application name, e.g. "calc" or "files app"
+
+        Returns:
+            dict or None: The application ("name", "argv", "score"), or None
+            if nothing is close enough or the index is still being built
+        """
+        if not self._loaded:
+            # Never scan on the caller's thread; wait briefly for the background scan
+            self.refresh_in_background()
+            if not self._ready.wait(LOAD_WAIT):
+                logger.warning(f"Application index is still loading; not resolving {name!r}")
+                return None
+
+        result = self._match(name)
+        if result is None and time.monotonic() - self._last_refresh >= self.refresh_interval:
+            # Something may have been installed since the last scan
+            if self.refresh():
+                result = self._match(name)
+        return result
+
+    def _match(self, name):
+        query = normalize_name(name)
+        if not query:
+            return None
+
+        aliases, alias_list, gram_counts, postings = self._index
+        app = aliases.get(query)
+        if app is not None:
+            return {"name": app["name"], "argv": list(app["argv"]), "alias": query, "score": 1.0}
+
+        # Rank aliases by the number of trigrams they share with the query
+        grams = trigrams(query)
+        counts = Counter(chain.from_iterable(postings.get(gram, ()) for gram in grams))
+        if not counts:
+            return None
+
+        best = (0.0, None)
+        for position, shared in counts.most_common(MAX_CANDIDATES):
+            alias = alias_list[position]
+            if len(query) >= 3 and alias.startswith(query):
+                # "calc" -> "calculator": prefixes are strong evidence
+                score = 0.8 + 0.2 * len(query) / len(alias)
+            else:
+                score = 2 * shared / (len(grams) + gram_counts[position])
+                if MIN_OVERLAP <= score < MIN_SCORE or MIN_OVERLAP <= score < best[0]:
+                    # Typos share few trigrams; confirm the close ones by edit
+                    # distance, giving up as soon as they cannot win
+                    longest = max(len(query), len(alias))
+                    limit = int((1 - max(MIN_SCORE, best[0])) * longest)
+                    score = max(score, 1 - edit_distance(query, alias, limit) / longest)
+            if score > best[0] or (score == best[0] and best[1] is not None and len(alias) < len(best[1])):
+                best = (score, alias)
+
+        if best[0] < MIN_SCORE:
+            return None
+        app = aliases[best[1]]
+        return {"name": app["name"], "argv": list(app["argv"]), "alias": best[1], "score": round(best[0], 3)}
+
+    def stats(self):
+        """
+        Get index size and refresh timing.
+
+        Returns:
+            dict: Directory, application name and refresh counters
+        """
+        return {
+            "directories": len(self._dirs),
+            "names": len(self._index[0]),
+            "fuzzy_names": len(self._index[1]),
+            "last_refresh_ms": self.last_refresh_ms,
+            "last_rescanned": self.last_rescanned,
+        }
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+            if stored.get("version") == INDEX_VERSION:
+                self._dirs = stored["directories"]
+        except (json.JSONDecodeError, OSError, AttributeError, KeyError) as e:
+            logger.error(f"Could not load application index: {e}. Rebuilding it.")
+
+    def save(self):
+        """Write the scanned directories to disk atomically."""
+        if not self.path:
+            return
+
+        with self._lock:
+            stored = {"version": INDEX_VERSION, "directories": self._dirs}
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(stored, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error(f"Error saving application index: {str(e)}")
+
+# Shared index used by openapps
+app_index = ApplicationIndex(path=get_index_file_path())
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import timeit
+
+    app_index.add_aliases({"calculator": ["gnome-calculator"], "files": ["nautilus"]})
+    start = time.perf_counter()
+    app_index.refresh()
+    print(f"Refresh took {(time.perf_counter() - start) * 1000:.1f}ms: {app_index.stats()}")
+    start = time.perf_counter()
+    app_index.refresh()
+    print(f"Second refresh took {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for name in ["calc", "files app", "python3", "pyhton3", "vim", "text editor", "shut down", "reboot",
+                 "no such thing"]:
+        seconds = timeit.timeit(lambda: app_index.lookup(name), number=200) / 200
+        print(f"{name!r:18} {seconds * 1e6:7.1f}us  {app_index.lookup(name)}")
@@ -1,11 +1,460 @@
-import requests
+import importlib.util
 import logging
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+import contextvars
+from collections import namedtuple
+from metrics import first_token_seconds, stage
+from model_router import LARGE_MODEL, model_router
+from response_cache import response_cache
+from sessions import chat_sessions
+from singleflight import async_generations, generations
+from speculation import speculations
+from warmup import KEEP_ALIVE, model_warmer
+
+# requests is imported on first use to keep it off the startup path, but its
+# absence should still show up at import
+if importlib.util.find_spec("requests") is None:
+    raise ImportError("The chat module requires the requests package")
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('OllamaChat')
 
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
+OLLAMA_API_URL = f"{OLLAMA_BASE_URL}/api/generate"
+
+# Client limits; override through the environment when deploying
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("SAVIN_OLLAMA_CONNECT_TIMEOUT", "3.05"))
+OLLAMA_READ_TIMEOUT = float(os.environ.get("SAVIN_OLLAMA_READ_TIMEOUT", "120"))
+OLLAMA_MAX_CONCURRENT = int(os.environ.get("SAVIN_OLLAMA_MAX_CONCURRENT", "4"))
+OLLAMA_QUEUE_TIMEOUT = float(os.environ.get("SAVIN_OLLAMA_QUEUE_TIMEOUT", "30"))
+OLLAMA_RETRIES = int(os.environ.get("SAVIN_OLLAMA_RETRIES", "2"))
+# Seconds a chat request waits for the first token before answering without
+# the language model
+LLM_DEADLINE = float(os.environ.get("SAVIN_LLM_DEADLINE", "4"))
+# Requests already waiting for a generation slot beyond which a chat request
+# answers without the language model instead of queueing
+LLM_MAX_QUEUED = int(os.environ.get("SAVIN_LLM_MAX_QUEUED", str(OLLAMA_MAX_CONCURRENT)))
+
+class OllamaError(Exception):
+    """Raised when the Ollama API answers with an error."""
+
+class OllamaBusyError(OllamaError):
+    """Raised when no generation slot frees up within the queue timeout."""
+
+class OllamaDeadlineError(OllamaError):
+    """Raised when a generation produces nothing within the request's deadline."""
+
+class OllamaClient:
+    """
+    Shared HTTP client for the Ollama API.
+    
+    Owns a keep-alive connection pool, applies connect/read timeouts, caps the
+    number of generations in flight and retries requests whose connection was
+    refused or reset before a response arrived.
+    """
+    
+    def __init__(self, base_url=OLLAMA_BASE_URL, connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+                 read_timeout=OLLAMA_READ_TIMEOUT, max_concurrent=OLLAMA_MAX_CONCURRENT,
+                 queue_timeout=OLLAMA_QUEUE_TIMEOUT, retries=OLLAMA_RETRIES):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.retries = retries
+        self._session = None
+        
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+    
+    def _acquire(self):
+        with self._lock:
+            self.waiting += 1
+        try:
+            with stage("ollama_queue"):
+                if not self._slots.acquire(timeout=self.queue_timeout):
+                    raise OllamaBusyError(f"No generation slot free after {self.queue_timeout}s")
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.in_flight += 1
+    
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+    
+    @property
+    def session(self):
+        # Created on first use so importing this module doesn't import requests
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrent + 2)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+    
+    def _request(self, method, path, **kwargs):
+        """Send a request, retrying connection failures with a short backoff."""
+        import requests
+        
+        url = f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            try:
+                return self.session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Connection to Ollama failed, retrying ({attempt + 1}/{self.retries})")
+                time.sleep(0.1 * (2 ** attempt))
+    
+    def generate(self, payload):
+        """
+        Run a non-streaming generation.
+        
+        Args:
+            payload (dict): The /api/generate request body
+            
+        Returns:
+            dict: The decoded Ollama response
+        """
+        self._acquire()
+        try:
+            with stage("ollama"):
+                response = self._request("POST", "/api/generate", json=dict(payload, stream=False))
+                if response.status_code != 200:
+                    raise OllamaError(f"{response.status_code} - {response.text}")
+                data = response.json()
+                model_warmer.note_use(payload["model"])
+                return data
+        finally:
+            self._release()
+    
+    def stream_generate(self, payload, opened=None):
+        """
+        Run a streaming generation, holding a slot until the stream ends.
+        
+        Args:
+            payload (dict): The /api/generate request body
+            opened (callable): Called with the HTTP response once the stream
+                is open, so another thread can abort it with abort_stream
+            
+        Yields:
+            dict: Each decoded chunk emitted by Ollama
+        """
+        self._acquire()
+        try:
+            with stage("ollama") as timer:
+                response = self._request("POST", "/api/generate", json=dict(payload, stream=True), stream=True)
+                if opened is not None:
+                    opened(response)
+                with response:
+                    if response.status_code != 200:
+                        raise OllamaError(f"{response.status_code} - {response.text}")
+                    first = True
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise OllamaError(chunk["error"])
+                        if first:
+                            first_token_seconds.observe(time.perf_counter() - timer.start)
+                            first = False
+                        if chunk.get("done"):
+                            model_warmer.note_use(payload["model"])
+                        yield chunk
+                        if chunk.get("done"):
+                            return
+        finally:
+            self._release()
+
+    @staticmethod
+    def abort_stream(response):
+        """
+        Close a streaming response from another thread.
+        
+        Closing alone leaves a reader blocked in recv() holding the socket
+        open; shutting it down first wakes the reader and tells Ollama to
+        stop generating right away.
+        
+        Args:
+            response: A response passed to stream_generate's opened callback
+        """
+        connection = getattr(response.raw, "_connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        response.close()
+    
+    def load_model(self, model, keep_alive, timeout=None):
+        """
+        Load a model into memory with an empty generation.
+        
+        Doesn't take a generation slot: nothing is generated, and queries
+        arriving meanwhile wait on the load inside Ollama either way.
+        
+        Args:
+            model (str): The model to load
+            keep_alive (str): How long Ollama should keep it loaded
+            timeout (float): Read timeout in seconds (default: the client's)
+            
+        Returns:
+            dict: The decoded Ollama response, including load_duration
+        """
+        body = {"model": model, "keep_alive": keep_alive, "stream": False}
+        response = self._request("POST", "/api/generate", json=body,
+                                 timeout=(self.timeout[0], timeout or self.timeout[1]))
+        if response.status_code != 200:
+            raise OllamaError(f"{response.status_code} - {response.text}")
+        return response.json()
+    
+    def list_models(self, timeout=5.0):
+        """
+        List the models installed in Ollama without running a generation.
+        
+        Args:
+            timeout (float): Read timeout in seconds for this cheap call
+            
+        Returns:
+            list: Model names
+        """
+        response = self._request("GET", "/api/tags", timeout=(self.timeout[0], timeout))
+        if response.status_code != 200:
+            raise OllamaError(f"{response.status_code} - {response.text}")
+        return [model["name"] for model in response.json().get("models", [])]
+    
+    def running_models(self, timeout=5.0):
+        """
+        List the models currently loaded in memory.
+        
+        Args:
+            timeout (float): Read timeout in seconds for this cheap call
+            
+        Returns:
+            list: Dicts with the model name and when it will be unloaded
+        """
+        response = self._request("GET", "/api/ps", timeout=(self.timeout[0], timeout))
+        if response.status_code != 200:
+            raise OllamaError(f"{response.status_code} - {response.text}")
+        return [
+            {"name": model["name"], "expires_at": model.get("expires_at")}
+            for model in response.json().get("models", [])
+        ]
+
+# Shared client used by every caller in the process
+ollama_client = OllamaClient()
+
+class AsyncOllamaClient:
+    """
+    asyncio counterpart of OllamaClient for the production server.
+    
+    Generations are awaited on the event loop, so a request waiting on Ollama
+    doesn't hold an OS thread. Admission control (how many generations may
+    run or wait) is left to the caller. Requires httpx.
+    """
+    
+    def __init__(self, base_url=OLLAMA_BASE_URL, connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+                 read_timeout=OLLAMA_READ_TIMEOUT, max_connections=OLLAMA_MAX_CONCURRENT + 2,
+                 retries=OLLAMA_RETRIES):
+        self.base_url = base_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.retries = retries
+        self._client = None
+    
+    def _http(self):
+        # Created lazily so it binds to the running event loop
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+        return self._client
+    
+    async def stream_generate(self, payload):
+        """
+        Run a streaming generation.
+        
+        Args:
+            payload (dict): The /api/generate request body
+            
+        Yields:
+            dict: Each decoded chunk emitted by Ollama
+        """
+        import asyncio
+        import httpx
+        
+        body = dict(payload, stream=True)
+        for attempt in range(self.retries + 1):
+            try:
+                with stage("ollama") as timer:
+                    async with self._http().stream("POST", "/api/generate", json=body) as response:
+                        if response.status_code != 200:
+                            text = (await response.aread()).decode("utf-8", "replace")
+                            raise OllamaError(f"{response.status_code} - {text}")
+                        first = True
+                        async for line in response.aiter_lines():
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            if chunk.get("error"):
+                                raise OllamaError(chunk["error"])
+                            if first:
+                                first_token_seconds.observe(time.perf_counter() - timer.start)
+                                first = False
+                            if chunk.get("done"):
+                                model_warmer.note_use(payload["model"])
+                            yield chunk
+                            if chunk.get("done"):
+                                return
+                return
+            except httpx.ConnectError as e:
+                if attempt == self.retries:
+                    raise ConnectionError(str(e)) from e
+                logger.warning(f"Connection to Ollama failed, retrying ({attempt + 1}/{self.retries})")
+                await asyncio.sleep(0.1 * (2 ** attempt))
+            except httpx.TimeoutException as e:
+                raise TimeoutError(str(e)) from e
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+def error_message(error):
+    """
+    Turn an exception from the Ollama client into something the user can hear.
+    
+    Args:
+        error (Exception): The exception raised while talking to Ollama
+        
+    Returns:
+        str: A user-facing message
+    """
+    if isinstance(error, OllamaBusyError):
+        logger.error(f"Ollama is busy: {error}")
+        return "I'm handling a lot of requests right now. Please try again in a moment."
+    if isinstance(error, OllamaDeadlineError):
+        logger.error(f"Ollama missed the deadline: {error}")
+        return "My language model is taking too long to respond. Please try again."
+    if isinstance(error, OllamaError):
+        logger.error(f"Error from Ollama API: {error}")
+        return "I'm having trouble connecting to my language model. Please try again later."
+    # Only an error raised through requests can be one of its exceptions
+    requests = sys.modules.get("requests")
+    if isinstance(error, ConnectionError) or (requests and isinstance(error, requests.exceptions.ConnectionError)):
+        logger.error("Connection error: Unable to connect to Ollama API")
+        return "I can't reach my language model right now. Please make sure Ollama is running locally on port 11434."
+    if isinstance(error, TimeoutError) or (requests and isinstance(error, requests.exceptions.Timeout)):
+        logger.error("Timed out waiting for Ollama API")
+        return "My language model is taking too long to respond. Please try again."
+    logger.error(f"Error chatting with Ollama: {str(error)}")
+    return "I encountered an error while processing your request. Please try again."
+
+def build_payload(query, model, system_prompt=None, context=None):
+    """Build the /api/generate request body for a query."""
+    payload = {
+        "model": model,
+        "prompt": query,
+        # Keep the model loaded while queries keep coming
+        "keep_alive": KEEP_ALIVE
+    }
+    
+    # Add system prompt if provided
+    if system_prompt:
+        payload["system"] = system_prompt
+    
+    # Continue an earlier conversation
+    if context:
+        payload["context"] = context
+    
+    return payload
+
+def flight_key(payload):
+    """
+    Identify generations that identical concurrent requests can share.
+    
+    Args:
+        payload (dict): The /api/generate request body
+        
+    Returns:
+        str or None: The key, or None for a turn continuing a conversation
+    """
+    if payload.get("context"):
+        return None
+    return response_cache.make_key(payload["prompt"], payload["model"], payload.get("system"))
+
+def shared_generate(payload):
+    """Run a generation, joining an identical one already in flight."""
+    key = flight_key(payload)
+    if key is None:
+        return ollama_client.generate(payload)
+    return generations.call(key, ollama_client.generate, payload)
+
+def shared_stream_generate(payload):
+    """Stream a generation, joining an identical stream already in flight."""
+    key = flight_key(payload)
+    if key is None:
+        return ollama_client.stream_generate(payload)
+    return generations.stream(key, ollama_client.stream_generate, payload)
+
+def generate_text(query, model="mistral", system_prompt=None):
+    """
+    Run a generation and return its text, raising on any failure.
+    
+    Args:
+        query (str): The user's query
+        model (str): The model to use (default: "mistral")
+        system_prompt (str): Optional system prompt to guide the model's behavior
+        
+    Returns:
+        str: The model's response
+    """
+    logger.info(f"Sending query to Ollama: {query[:50]}...")
+    response_data = shared_generate(build_payload(query, model, system_prompt))
+    text = response_data.get("response", "")
+    if not text:
+        raise OllamaError("Empty response")
+    return text
+
+def stream_text(query, model="mistral", system_prompt=None):
+    """
+    Run a streaming generation, raising on any failure.
+    
+    Args:
+        query (str): The user's query
+        model (str): The model to use (default: "mistral")
+        system_prompt (str): Optional system prompt to guide the model's behavior
+        
+    Yields:
+        str: Chunks of the model's response
+    """
+    logger.info(f"Streaming query to Ollama: {query[:50]}...")
+    for chunk in shared_stream_generate(build_payload(query, model, system_prompt)):
+        text = chunk.get("response", "")
+        if text:
+            yield text
 
 def chat_with_ollama(query, model="mistral", system_prompt=None):
     """
@@ -20,36 +469,29 @@ def chat_with_ollama(query, model="mistral", system_prompt=None):
         str: The model's response or an error message
     """
     try:
-        # Prepare request payload
-        payload = {
-            "model": model,
-            "prompt": query,
-            "stream": False
-        }
-        
-        # Add system prompt if provided
-        if system_prompt:
-            payload["system"] = system_prompt
-        
-        logger.info(f"Sending query to Ollama: {query[:50]}...")
-        
-        # Send request to Ollama API
-        response = requests.post(OLLAMA_API_URL, json=payload)
-        
-        if response.status_code == 200:
-            response_data = response.json()
-            return response_data.get("response", "I couldn't generate a response.")
-        else:
-            logger.error(f"Error from Ollama API: {response.status_code} - {response.text}")
-            return "I'm having trouble connecting to my language model. Please try again later."
-    
-    except requests.exceptions.ConnectionError:
-        logger.error("Connection error: Unable to connect to Ollama API")
-        return "I can't reach my language model right now. Please make sure Ollama is running locally on port 11434."
+        return generate_text(query, model, system_prompt)
+    except Exception as e:
+        return error_message(e)
+
+def stream_chat_with_ollama(query, model="mistral", system_prompt=None):
+    """
+    Send a query to Ollama API and yield the response as it is generated.
     
+    Args:
+        query (str): The user's query
+        model (str): The model to use (default: "mistral")
+        system_prompt (str): Optional system prompt to guide the model's behavior
+        
+    Yields:
+        str: Chunks of the model's response, or a single error message
+    """
+    try:
+        yield from stream_text(query, model, system_prompt)
     except Exception as e:
-        logger.error(f"Error chatting with Ollama: {str(e)}")
-        return "I encountered an error while processing your request. Please try again."
+        yield error_message(e)
+
+# The model for queries that need a capable one; see model_router for the tiers
+DEFAULT_MODEL = LARGE_MODEL
 
 # Define a system prompt for the assistant's personality
 DEFAULT_SYSTEM_PROMPT = """
@@ -58,17 +500,319 @@ Respond to user queries in a natural, conversational way. Keep responses brief b
 If asked about your capabilities, mention you can open apps, set reminders, take notes, and have conversations.
 """
 
-def get_chat_response(query):
+def route_turn(query, turn=None):
+    """
+    Pick the model tier for a chat turn.
+    
+    A session stays on the model that holds its context, except that it
+    moves up a tier when a query needs the larger model; the conversation
+    then starts over, since context tokens don't carry across models.
+    
+    Args:
+        query (str): The user's query
+        turn (SessionTurn): The session turn, or None for a stateless query
+        
+    Returns:
+        tuple: The ModelRoute and the turn to send, bound to its model
+    """
+    route = model_router.route(query)
+    if turn is None:
+        return route, None
+    if turn.context and turn.model:
+        if model_router.rank(route.model) > model_router.rank(turn.model):
+            return route, turn._replace(context=[], send_system=True, model=route.model)
+        route = model_router.for_model(turn.model, "session")
+    return route, turn._replace(model=route.model)
+
+def chat_payload(query, route, turn=None):
+    """
+    Build the request body for a chat turn.
+    
+    A turn that continues a session sends the session's context instead of
+    the system prompt, which is already part of it.
+    
+    Args:
+        query (str): The user's query
+        route (ModelRoute): The model tier to send it to
+        turn (SessionTurn): The session turn, or None for a stateless query
+        
+    Returns:
+        dict: The /api/generate request body
+    """
+    if turn is None:
+        return build_payload(query, route.model, DEFAULT_SYSTEM_PROMPT)
+    system_prompt = DEFAULT_SYSTEM_PROMPT if turn.send_system else None
+    return build_payload(query, route.model, system_prompt, turn.context)
+
+def _cache_key(query, route, turn):
+    # Only answers given without earlier conversation can be shared
+    if turn is not None and turn.context:
+        return None
+    if not response_cache.is_cacheable(query):
+        return None
+    return response_cache.make_key(query, route.model, DEFAULT_SYSTEM_PROMPT)
+
+# Everything needed to send a chat turn and record its reply: the model
+# tier, the session turn, the request body and the response cache key
+ChatPlan = namedtuple("ChatPlan", ["route", "turn", "payload", "cache_key"])
+
+def plan_chat(query, session_id=None):
+    """
+    Prepare a chat turn for generation.
+    
+    Args:
+        query (str): The user's query
+        session_id (str): The conversation the query belongs to, if any
+        
+    Returns:
+        ChatPlan: The turn's route, session turn, payload and cache key
+    """
+    route, turn = route_turn(query, chat_sessions.begin(session_id))
+    return ChatPlan(route, turn, chat_payload(query, route, turn), _cache_key(query, route, turn))
+
+def cached_plan_response(plan):
+    """Look up a context-free plan's reply in the response cache."""
+    if plan.cache_key is None:
+        return None
+    return response_cache.get(plan.cache_key)
+
+def finish_chat(plan, text, context, seconds):
+    """
+    Record a completed generation in its session, the cache and the tier latency.
+    
+    Args:
+        plan (ChatPlan): The plan the generation was sent with
+        text (str): The full reply
+        context (list): The "context" field of the final Ollama response
+        seconds (float): Time from sending the generation to its last token
+    """
+    model_router.observe(plan.route, seconds)
+    chat_sessions.finish(plan.turn, context)
+    if plan.cache_key is not None and text:
+        response_cache.put(plan.cache_key, text)
+
+def get_chat_response(query, session_id=None):
     """
     Get a chat response from Ollama with the default system prompt.
     
+    Repeated queries are answered from the response cache. Queries that
+    continue a conversation carry its context and are never answered from
+    the cache, since the reply depends on what was said before.
+    
     Args:
         query (str): The user's query
+        session_id (str): The conversation the query belongs to, if any
         
     Returns:
         str: The model's response
     """
-    return chat_with_ollama(query, system_prompt=DEFAULT_SYSTEM_PROMPT)
+    plan = plan_chat(query, session_id)
+    cached = cached_plan_response(plan)
+    if cached is not None:
+        return cached
+    
+    try:
+        logger.info(f"Sending query to Ollama ({plan.route.tier} tier): {query[:50]}...")
+        model_router.count(plan.route)
+        start = time.perf_counter()
+        response_data = shared_generate(plan.payload)
+        text = response_data.get("response", "")
+        if not text:
+            raise OllamaError("Empty response")
+    except Exception as e:
+        return error_message(e)
+    
+    finish_chat(plan, text, response_data.get("context"), time.perf_counter() - start)
+    return text
+
+def stream_chat_response(query, session_id=None):
+    """
+    Stream a chat response from Ollama with the default system prompt.
+    
+    Cached responses are yielded in one chunk; fresh ones are cached once the
+    stream completes successfully.
+    
+    Args:
+        query (str): The user's query
+        session_id (str): The conversation the query belongs to, if any
+        
+    Yields:
+        str: Chunks of the model's response as they arrive, or an error message
+    """
+    try:
+        yield from stream_chat_text(query, session_id)
+    except Exception as e:
+        yield error_message(e)
+
+def stream_chat_text(query, session_id=None, check_cache=True):
+    """
+    Stream a chat response like stream_chat_response, raising on any failure.
+    
+    Args:
+        query (str): The user's query
+        session_id (str): The conversation the query belongs to, if any
+        check_cache (bool): Look the query up first; pass False if the caller
+            already did
+        
+    Yields:
+        str: Chunks of the model's response as they arrive
+    """
+    plan = plan_chat(query, session_id)
+    cached = cached_plan_response(plan) if check_cache else None
+    if cached is not None:
+        yield cached
+        return
+    
+    parts = []
+    logger.info(f"Streaming query to Ollama ({plan.route.tier} tier): {query[:50]}...")
+    model_router.count(plan.route)
+    start = time.perf_counter()
+    for chunk in shared_stream_generate(plan.payload):
+        text = chunk.get("response", "")
+        if text:
+            parts.append(text)
+            yield text
+        if chunk.get("done"):
+            finish_chat(plan, "".join(parts), chunk.get("context"), time.perf_counter() - start)
+
+# Marks the end of a generation handed between threads
+_END = object()
+
+def stream_chat_within(query, session_id=None, deadline=LLM_DEADLINE, check_cache=True):
+    """
+    Stream a chat response, giving up if the first chunk misses the deadline.
+    
+    The generation runs on a background thread. If it misses the deadline it
+    is left to finish there, so its answer still reaches the response cache
+    and the session; if the caller stops reading after that, it is stopped.
+    A generation speculatively started for the same query from the session's
+    interim transcript is continued rather than started again.
+    
+    Args:
+        query (str): The user's query
+        session_id (str): The conversation the query belongs to, if any
+        deadline (float): Seconds to wait for the first chunk
+        check_cache (bool): Look the query up first; pass False if the caller
+            already did
+        
+    Yields:
+        str: Chunks of the model's response as they arrive
+        
+    Raises:
+        OllamaDeadlineError: If nothing arrived within the deadline
+    """
+    chunks = queue.Queue()
+    stopped = threading.Event()
+    
+    # A generation already started from the interim transcript carries on
+    speculation = speculations.claim(session_id, query)
+    
+    def pump():
+        try:
+            upstream = speculation.follow() if speculation else stream_chat_text(query, session_id, check_cache)
+            for chunk in upstream:
+                if stopped.is_set():
+                    upstream.close()
+                    return
+                chunks.put(chunk)
+            chunks.put(_END)
+        except Exception as e:
+            chunks.put(e)
+    
+    # Keep the request id in the generation's logs
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(pump,), name="chat-generation", daemon=True).start()
+    
+    try:
+        item = chunks.get(timeout=deadline)
+    except queue.Empty:
+        logger.warning(f"No response from Ollama within {deadline}s; finishing it in the background")
+        raise OllamaDeadlineError(f"No response within {deadline}s")
+    
+    try:
+        while item is not _END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+            item = chunks.get()
+    finally:
+        stopped.set()
+
+def cached_chat_response(query, session_id=None):
+    """
+    Look up a query in the response cache without generating anything.
+    
+    Args:
+        query (str): The user's query
+        session_id (str): The conversation the query belongs to, if any
+        
+    Returns:
+        str or None: The cached response, or None on a miss or for a query
+        that continues a conversation
+    """
+    if not response_cache.is_cacheable(query):
+        return None
+    if session_id and chat_sessions.has_context(session_id):
+        return None
+    model = model_router.route(query).model
+    return response_cache.get(response_cache.make_key(query, model, DEFAULT_SYSTEM_PROMPT))
+
+async def async_stream_chat_response(query, client, check_cache=True, session_id=None):
+    """
+    Stream a chat response on the event loop, using the response cache.
+    
+    Args:
+        query (str): The user's query
+        client (AsyncOllamaClient): Client bound to the running loop
+        check_cache (bool): Look the query up first; pass False if the caller
+            already did
+        session_id (str): The conversation the query belongs to, if any
+        
+    Yields:
+        str: Chunks of the model's response as they arrive, or an error message
+    """
+    try:
+        async for text in async_stream_chat_text(query, client, check_cache, session_id):
+            yield text
+    except Exception as e:
+        yield error_message(e)
+
+async def async_stream_chat_text(query, client, check_cache=True, session_id=None):
+    """
+    Stream a chat response like async_stream_chat_response, raising on any failure.
+    
+    Args:
+        query (str): The user's query
+        client (AsyncOllamaClient): Client bound to the running loop
+        check_cache (bool): Look the query up first; pass False if the caller
+            already did
+        session_id (str): The conversation the query belongs to, if any
+        
+    Yields:
+        str: Chunks of the model's response as they arrive
+    """
+    plan = plan_chat(query, session_id)
+    cached = cached_plan_response(plan) if check_cache else None
+    if cached is not None:
+        yield cached
+        return
+    
+    payload = plan.payload
+    flight = flight_key(payload)
+    chunks = client.stream_generate(payload) if flight is None else async_generations.stream(
+        flight, client.stream_generate, payload)
+    
+    parts = []
+    logger.info(f"Streaming query to Ollama ({plan.route.tier} tier): {query[:50]}...")
+    model_router.count(plan.route)
+    start = time.perf_counter()
+    async for chunk in chunks:
+        text = chunk.get("response", "")
+        if text:
+            parts.append(text)
+            yield text
+        if chunk.get("done"):
+            finish_chat(plan, "".join(parts), chunk.get("context"), time.perf_counter() - start)
 
 # Test the module if run directly
 if __name__ == "__main__":
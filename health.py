@@ -0,0 +1,105 @@
+import datetime
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('HealthProbe')
+
+# Seconds between background checks of the Ollama API
+PROBE_INTERVAL = float(os.environ.get("SAVIN_HEALTH_INTERVAL", "10"))
+
+class OllamaHealthProbe:
+    """
+    Background checker for the Ollama API.
+
+    Every interval it lists the installed and loaded models, which costs
+    Ollama almost nothing, and caches the outcome so status requests can be
+    answered without touching the network.
+    """
+
+    def __init__(self, interval=PROBE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = {
+            "ollama_status": "unknown",
+            "checked_at": None,
+            "latency_ms": None,
+            "models": [],
+            "loaded_models": [],
+            "last_error": None,
+            "last_error_at": None,
+            "consecutive_failures": 0
+        }
+
+    def probe(self):
+        """Check Ollama once and update the cached state."""
+        start = time.perf_counter()
+        try:
+            from chat import ollama_client
+            models = ollama_client.list_models()
+            loaded = ollama_client.running_models()
+            update = {
+                "ollama_status": "running",
+                "models": models,
+                "loaded_models": loaded,
+                "consecutive_failures": 0
+            }
+        except ImportError as e:
+            update = {"ollama_status": "not_installed", "last_error": str(e)}
+        except Exception as e:
+            update = {"ollama_status": "error", "last_error": f"{type(e).__name__}: {e}"}
+
+        now = datetime.datetime.now().isoformat()
+        update["checked_at"] = now
+        update["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        with self._lock:
+            if update["ollama_status"] != "running":
+                update["last_error_at"] = now
+                update["consecutive_failures"] = self._state["consecutive_failures"] + 1
+                if self._state["ollama_status"] != update["ollama_status"]:
+                    logger.warning(f"Ollama health check failed: {update['last_error']}")
+            elif self._state["ollama_status"] != "running":
+                logger.info("Ollama is reachable")
+            self._state.update(update)
+
+    def snapshot(self):
+        """
+        Get the most recent probe result.
+
+        Returns:
+            dict: A copy of the cached health state
+        """
+        with self._lock:
+            return dict(self._state)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start probing in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ollama-health", daemon=True)
+        self._thread.start()
+        logger.info("Ollama health probe started")
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+# Shared probe used by the status endpoint
+health_probe = OllamaHealthProbe()
+
+# If run directly, test the module
+if __name__ == "__main__":
+    health_probe.probe()
+    print(health_probe.snapshot())
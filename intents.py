@@ -0,0 +1,288 @@
+import re
+import logging
+from collections import namedtuple
+from types import MappingProxyType
+
+logger = logging.getLogger('Intents')
+
+IntentMatch = namedtuple("IntentMatch", ["intent", "slots", "keyword"])
+
+# Intent returned when nothing in the table matches
+CHAT_INTENT = "chat"
+
+# Declarative intent table, highest priority first.
+#   keywords: literal phrases that trigger the intent as whole words
+#   slots:    optional patterns run in order on the text after the keyword;
+#             the named groups of the first that matches become the slots
+COMMAND_INTENTS = [
+    {
+        "intent": "open_app",
+        "keywords": ["open"],
+        "slots": [r"^(?:up\s+)?(?:the\s+)?(?P<app>.*?)$"]
+    },
+    {
+        "intent": "set_reminder",
+        "keywords": ["remind me", "set a reminder", "create a reminder", "add a reminder", "set reminder",
+                     "new reminder"],
+        "slots": [
+            # "remind me at 5pm to call mom"
+            r"^(?P<when>(?:at|in|on|for|tomorrow|today|tonight|every|each|daily|weekdays)\b.*?)\s+(?:to|about|that)\s+(?P<message>.+)$",
+            # "remind me to call mom at 5pm"
+            r"^(?:(?:to|about)\s+)?(?P<message>.*?)\s*\b(?P<when>(?:at|in|on|for|tomorrow|today|every|each|daily|weekdays)\b.*)$",
+        ]
+    },
+    {
+        "intent": "search_notes",
+        "keywords": ["find my note", "find my notes", "find the note", "find a note", "search my notes",
+                     "search notes", "search for notes", "look for my note", "look for notes"],
+        "slots": [r"^(?:(?:about|on|with|for|that\s+says|mentioning|called)\s+)?(?P<terms>.*?)$"]
+    },
+    {
+        "intent": "take_note",
+        "keywords": ["take a note", "write a note", "make a note", "add a note", "new note", "write this down",
+                     "write down", "jot down", "note down", "note that"],
+        "slots": [r"^(?:(?:down|that)\b)?\s*(?P<text>.*?)$"]
+    },
+    {"intent": "greeting", "keywords": ["hello", "hi", "hey", "greetings"]},
+    {"intent": "farewell", "keywords": ["goodbye", "bye", "see you", "farewell"]},
+    {"intent": "time", "keywords": ["what time", "what's the time", "what is the time", "tell me the time",
+                                    "current time", "time is it"]},
+    {"intent": "date", "keywords": ["what date", "what's the date", "what is the date", "today's date",
+                                    "what day", "which day", "what's today", "what is today"]},
+    {"intent": "weather", "keywords": ["weather"]},
+    {"intent": "identity", "keywords": ["who are you", "your name"]},
+    {"intent": "capabilities", "keywords": ["what can you do", "what can you help with", "your capabilities"]},
+]
+
+# Keyword replies used when the language model is unavailable
+SMALLTALK_INTENTS = [
+    {"intent": "how_are_you", "keywords": ["how are you", "how's it going", "how do you do"]},
+    {"intent": "thanks", "keywords": ["thanks", "thank you", "appreciate"]},
+    {"intent": "ability_question", "keywords": ["can you", "are you able to"]},
+]
+
+# Phrases that ask for explanation or writing rather than a quick reply;
+# used to send a query to the larger chat model
+OPEN_ENDED_INTENTS = [
+    {"intent": "explain", "keywords": ["explain", "why", "describe", "how does", "how do", "how can", "how to",
+                                       "what causes", "tell me about", "difference between", "compare",
+                                       "pros and cons", "step by step", "in detail"]},
+    {"intent": "compose", "keywords": ["write me", "story", "poem", "essay", "summarize", "summary",
+                                       "translate", "code", "plan", "recommend", "suggest"]},
+]
+
+# Punctuation a spoken or typed word may end with
+_TRAILING_PUNCTUATION = ",.!?;:"
+# Punctuation left around a slot value
+_SLOT_PUNCTUATION = " :,.!?"
+
+def _phrase_pattern(phrases):
+    # One alternation for every phrase, factored into a character trie so a
+    # shared prefix ("what time", "what day") is only tried once. A phrase
+    # that is a prefix of another is optional, so the longer one wins.
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[None] = True
+    
+    def emit(node):
+        branches = [(r"\s+" if char == " " else re.escape(char)) + emit(node[char])
+                    for char in sorted(char for char in node if char is not None)]
+        if not branches:
+            return ""
+        if len(branches) == 1 and None not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if None in node else group
+    
+    return emit(trie)
+
+class IntentRouter:
+    """
+    Single-pass keyword router compiled from a declarative intent table.
+    
+    Every keyword phrase is compiled into one word-bounded regular
+    expression, factored by common prefix, so a query is scanned once by
+    the regex engine rather than by each keyword in turn. The scan costs
+    time per character, so a query sharing no word with the start of any
+    keyword (most chat) is rejected first with one set check. Matches are
+    whole words only. The first action (an intent with slots) in the query
+    wins, so "remind me to open the window" sets a reminder and the scan
+    stops there; without one, the highest-priority intent found wins.
+    """
+    
+    def __init__(self, table, default=CHAT_INTENT):
+        self.default = default
+        self.intents = [entry["intent"] for entry in table]
+        self._slots = {}
+        # Slots are filled in per query; matches without them are shared, so
+        # their slots are read-only
+        no_slots = MappingProxyType({})
+        # Keyword -> (priority, match to return)
+        self._keywords = {}
+        for index, entry in enumerate(table):
+            for keyword in entry["keywords"]:
+                self._keywords.setdefault(keyword, (index, IntentMatch(entry["intent"], no_slots, keyword)))
+            if entry.get("slots"):
+                self._slots[index] = [re.compile(pattern) for pattern in entry["slots"]]
+        self._pattern = re.compile(r"\b(?:" + _phrase_pattern(self._keywords) + r")\b")
+        # First words of the keywords, also as typed before punctuation
+        first_words = {keyword.split()[0] for keyword in self._keywords}
+        self._first_words = frozenset(first_words | {word + mark for word in first_words
+                                                     for mark in _TRAILING_PUNCTUATION})
+        self._no_match = IntentMatch(default, no_slots, None)
+    
+    def match(self, query):
+        """
+        Find the intent of a query and extract its slots.
+        
+        Args:
+            query (str): The user's command
+            
+        Returns:
+            IntentMatch: The winning intent, its slots and the matched keyword
+        """
+        text = query.lower()
+        if self._first_words.isdisjoint(text.split()):
+            return self._no_match
+        
+        keywords = self._keywords
+        best = None
+        for found in self._pattern.finditer(text):
+            keyword = found.group()
+            # A keyword spoken with odd spacing is looked up normalized
+            entry = keywords.get(keyword) or keywords[" ".join(keyword.split())]
+            if entry[0] in self._slots:
+                best, end = entry, found.end()
+                break
+            if best is None or entry[0] < best[0]:
+                best, end = entry, found.end()
+        if best is None:
+            return self._no_match
+        index, match = best
+        if index not in self._slots:
+            return match
+        
+        rest = text[end:].strip(_SLOT_PUNCTUATION)
+        slots = {}
+        for pattern in self._slots[index]:
+            slot_match = pattern.match(rest)
+            if slot_match:
+                slots = {name: value.strip(_SLOT_PUNCTUATION)
+                         for name, value in slot_match.groupdict().items() if value}
+                break
+        return IntentMatch(match.intent, slots, match.keyword)
+
+# Routers compiled once at import
+command_router = IntentRouter(COMMAND_INTENTS)
+smalltalk_router = IntentRouter(SMALLTALK_INTENTS, default=None)
+open_ended_router = IntentRouter(OPEN_ENDED_INTENTS, default=None)
+
+def route(query):
+    """
+    Route a command through the shared intent table.
+
+    Args:
+        query (str): The user's command
+
+    Returns:
+        IntentMatch: The intent, slots and matched keyword
+    """
+    return command_router.match(query)
+
+# If run directly, test the module and benchmark it against the keyword chains
+if __name__ == "__main__":
+    import timeit
+
+    def legacy_route(query):
+        # The substring chains a query walked through app.py and
+        # process_voice_command before it reached the language model
+        query_lower = query.lower()
+        if "open" in query_lower:
+            app_name = query_lower.replace("open", "").strip()
+            return "open_app"
+        if "remind me" in query_lower or "set a reminder" in query_lower or "reminder" in query_lower:
+            for part in ["at", "in", "on", "for", "tomorrow", "today"]:
+                if part in query_lower:
+                    split_query = query_lower.split(part, 1)
+                    time_str = part + split_query[1]
+                    message = split_query[0].replace("remind me", "").replace("set a reminder", "").replace("reminder", "").strip()
+                    break
+            return "set_reminder"
+        if "write" in query_lower or "note" in query_lower or "take a note" in query_lower:
+            note_text = query_lower
+            for prefix in ["write", "note", "take a note", "write a note", "type"]:
+                note_text = note_text.replace(prefix, "").strip()
+            return "take_note"
+        query = query.lower().strip()
+        if any(word in query for word in ["hello", "hi", "hey", "greetings"]):
+            return "greeting"
+        if any(word in query for word in ["bye", "goodbye", "see you", "farewell"]):
+            return "farewell"
+        if "time" in query:
+            return "time"
+        if "date" in query or "day" in query:
+            return "date"
+        if "weather" in query:
+            return "weather"
+        if "who are you" in query or "your name" in query:
+            return "identity"
+        if "what can you do" in query or "help me" in query or "your capabilities" in query:
+            return "capabilities"
+        if "open" in query:
+            return "open_app"
+        if any(phrase in query for phrase in ["set a reminder", "remind me", "create a reminder"]):
+            return "set_reminder"
+        if any(phrase in query for phrase in ["take a note", "write this down", "make a note", "write a note"]):
+            return "take_note"
+        return CHAT_INTENT
+
+    def legacy_smalltalk(query):
+        # simple_response's chain, run only when the language model failed
+        query = query.lower()
+        if any(phrase in query for phrase in ["how are you", "how's it going", "how do you do"]):
+            return "how_are_you"
+        if any(word in query for word in ["thanks", "thank you", "appreciate"]):
+            return "thanks"
+        if any(phrase in query for phrase in ["can you", "are you able to"]):
+            return "ability_question"
+        return CHAT_INTENT
+
+    def compiled_route(query):
+        return route(query).intent
+
+    def describe(intent, query, smalltalk):
+        # Show what an offline reply would pick for queries left to chat
+        return smalltalk(query) if intent == CHAT_INTENT else intent
+
+    test_queries = [
+        "Open calculator",
+        "Remind me to call mom at 5pm",
+        "Take a note: buy milk tomorrow",
+        "Hello there",
+        "What time is it?",
+        "Tell me about this book",
+        "How are you today?",
+        "Can you reopen the discussion about history?",
+        "What's the capital of France?",
+        "Explain quantum computing to a five year old in simple words",
+        "How was your day?",
+        "Write me a poem about time",
+    ]
+    # The first five are commands; the rest end up in conversation
+    groups = [("commands", test_queries[:5]), ("conversation", test_queries[5:]), ("all", test_queries)]
+
+    for query in test_queries:
+        legacy = describe(legacy_route(query), query, legacy_smalltalk)
+        compiled = describe(compiled_route(query), query, lambda q: smalltalk_router.match(q).intent or CHAT_INTENT)
+        print(f"{query!r:64} legacy={legacy:16} compiled={compiled:16} {dict(route(query).slots)}")
+
+    # Per-request routing cost; the small-talk chains only run offline
+    print()
+    rounds = 20000
+    for group, queries in groups:
+        for name, func in [("legacy chains", legacy_route), ("compiled router", compiled_route)]:
+            seconds = min(timeit.repeat(lambda: [func(q) for q in queries], number=rounds, repeat=3))
+            print(f"{group:13} {name:16} {seconds / (rounds * len(queries)) * 1e9:8.0f} ns/query")
@@ -0,0 +1,199 @@
+import itertools
+import logging
+import os
+import platform
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger('Launcher')
+
+# How many finished launches to keep for reporting
+MAX_HISTORY = 200
+# How often the reaper checks running children
+REAP_INTERVAL = 1.0
+# Record launches without starting anything, e.g. under load tests
+DRY_RUN = os.environ.get("SAVIN_LAUNCH_DRY_RUN", "0") == "1"
+
+class AppLauncher:
+    """
+    Spawns applications as detached child processes and tracks them.
+
+    Processes are started from an argv list without a shell and launch()
+    returns as soon as the process exists. A single reaper thread collects
+    exit statuses in the background so children never linger as zombies,
+    and every launch is kept with its spawn latency and outcome.
+    """
+
+    def __init__(self, max_history=MAX_HISTORY, reap_interval=REAP_INTERVAL, dry_run=DRY_RUN):
+        self.max_history = max_history
+        self.reap_interval = reap_interval
+        self.dry_run = dry_run
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = {}
+        self._history = OrderedDict()
+        self._reaper = None
+        self.launched = 0
+        self.failed = 0
+
+    def _popen_options(self):
+        options = {
+            "stdin": subprocess.DEVNULL,
+            "stdout": subprocess.DEVNULL,
+            "stderr": subprocess.DEVNULL,
+            "close_fds": True,
+        }
+        if platform.system() == "Windows":
+            options["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            # Own session: the app survives the server and ignores its signals
+            options["start_new_session"] = True
+        return options
+
+    def launch(self, argv, name=None):
+        """
+        Start a program without waiting for it.
+
+        Args:
+            argv (list): Program and arguments; no shell is involved
+            name (str): Friendly name for reporting (default: argv[0])
+
+        Returns:
+            dict: The launch record, with status "running" or "failed"
+            ("dry_run" if launches are only being recorded)
+        """
+        record = {
+            "id": next(self._ids),
+            "name": name or argv[0],
+            "argv": list(argv),
+            "pid": None,
+            "status": "starting",
+            "returncode": None,
+            "error": None,
+            "started_at": time.time(),
+            "spawn_ms": None,
+            "exited_at": None,
+            "runtime_s": None,
+        }
+
+        if self.dry_run:
+            record["status"] = "dry_run"
+            record["spawn_ms"] = 0.0
+            with self._lock:
+                self.launched += 1
+                self._remember(record)
+            logger.info(f"Dry run: not launching {record['argv']}")
+            return dict(record)
+
+        start = time.perf_counter()
+        try:
+            process = subprocess.Popen(argv, **self._popen_options())
+        except (OSError, ValueError) as e:
+            record["spawn_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            record["status"] = "failed"
+            record["error"] = str(e)
+            with self._lock:
+                self.failed += 1
+                self._remember(record)
+            logger.error(f"Could not launch {record['name']}: {e}")
+            return dict(record)
+
+        record["spawn_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        record["pid"] = process.pid
+        record["status"] = "running"
+        with self._lock:
+            self.launched += 1
+            self._running[record["id"]] = (process, record)
+            self._remember(record)
+            self._ensure_reaper()
+        self._wake.set()
+
+        logger.info(f"Launched {record['name']} (pid {process.pid}) in {record['spawn_ms']}ms")
+        return dict(record)
+
+    def _remember(self, record):
+        self._history[record["id"]] = record
+        while len(self._history) > self.max_history:
+            oldest_id, oldest = next(iter(self._history.items()))
+            if oldest["status"] == "running":
+                # Keep running processes visible; drop the next oldest instead
+                self._history.move_to_end(oldest_id)
+                if all(r["status"] == "running" for r in self._history.values()):
+                    break
+                continue
+            self._history.popitem(last=False)
+
+    def _ensure_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap_loop, name="launcher-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            with self._lock:
+                running = list(self._running.items())
+            if not running:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            for launch_id, (process, record) in running:
+                returncode = process.poll()
+                if returncode is None:
+                    continue
+                with self._lock:
+                    self._running.pop(launch_id, None)
+                    record["status"] = "exited"
+                    record["returncode"] = returncode
+                    record["exited_at"] = time.time()
+                    record["runtime_s"] = round(record["exited_at"] - record["started_at"], 3)
+                logger.info(f"{record['name']} (pid {record['pid']}) exited with status {returncode}")
+
+            time.sleep(self.reap_interval)
+
+    def launches(self, limit=50):
+        """
+        Get the most recent launches, newest first.
+
+        Args:
+            limit (int): Maximum number of records to return
+
+        Returns:
+            list: Launch records
+        """
+        with self._lock:
+            records = list(self._history.values())[-limit:]
+            return [dict(record) for record in reversed(records)]
+
+    def stats(self):
+        """
+        Summarize launcher activity.
+
+        Returns:
+            dict: Counts and spawn latency figures
+        """
+        with self._lock:
+            latencies = sorted(r["spawn_ms"] for r in self._history.values() if r["spawn_ms"] is not None)
+            return {
+                "launched": self.launched,
+                "failed": self.failed,
+                "running": len(self._running),
+                "spawn_ms_p50": latencies[len(latencies) // 2] if latencies else None,
+                "spawn_ms_max": latencies[-1] if latencies else None,
+            }
+
+# Shared launcher for the process
+app_launcher = AppLauncher()
+
+# If run directly, test the module
+if __name__ == "__main__":
+    record = app_launcher.launch(["sleep", "1"], name="sleep")
+    print(f"Launch returned in {record['spawn_ms']}ms: {record['status']} pid {record['pid']}")
+    print(app_launcher.launch(["no-such-program-xyz"])["status"])
+    time.sleep(2.5)
+    for launch in app_launcher.launches():
+        print(launch)
+    print(app_launcher.stats())
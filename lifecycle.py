@@ -0,0 +1,91 @@
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger('Lifecycle')
+
+class Lifecycle:
+    """
+    Starts the background services once per process and stops them on exit.
+
+    Importing a module never starts a thread; services are registered here
+    by the application and started by whichever entry point ends up serving
+    requests. start() is idempotent, so a second caller (or the Flask
+    reloader's child importing the app again) cannot start anything twice.
+    Services stop in reverse order of registration.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._services = []
+        self.started = False
+        self.timings = {}
+
+    def register(self, name, start=None, stop=None):
+        """
+        Add a background service.
+
+        Args:
+            name (str): Name used in logs and timings
+            start (callable): Starts the service; must return promptly
+            stop (callable): Stops it and releases its resources
+        """
+        self._services.append((name, start, stop))
+
+    def start(self):
+        """
+        Start every registered service, once.
+
+        Returns:
+            bool: False if the services were already started
+        """
+        if self.started:
+            return False
+        with self._lock:
+            if self.started:
+                return False
+            self.started = True
+            begin = time.perf_counter()
+            for name, start, _ in self._services:
+                if start is None:
+                    continue
+                service_start = time.perf_counter()
+                try:
+                    start()
+                except Exception as e:
+                    logger.error(f"Could not start {name}: {e}")
+                self.timings[name] = round((time.perf_counter() - service_start) * 1000, 3)
+            atexit.register(self.stop)
+        logger.info(f"Started {len(self.timings)} background services in "
+                    f"{(time.perf_counter() - begin) * 1000:.1f}ms")
+        return True
+
+    def stop(self):
+        """Stop every started service, newest first."""
+        with self._lock:
+            if not self.started:
+                return
+            self.started = False
+            for name, _, stop in reversed(self._services):
+                if stop is None:
+                    continue
+                try:
+                    stop()
+                except Exception as e:
+                    logger.error(f"Could not stop {name}: {e}")
+            atexit.unregister(self.stop)
+        logger.info("Background services stopped")
+
+    def snapshot(self):
+        """
+        Get the lifecycle state.
+
+        Returns:
+            dict: Whether services are running, and each one's start time in ms
+        """
+        return {"started": self.started, "services": [name for name, _, _ in self._services],
+                "start_ms": dict(self.timings)}
+
+# Shared lifecycle for the application's background services
+lifecycle = Lifecycle()
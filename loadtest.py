@@ -0,0 +1,637 @@
+import argparse
+import concurrent.futures
+import datetime
+import json
+import logging
+import math
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from log_setup import configure_logging
+
+logger = logging.getLogger('LoadTest')
+
+# Where the report goes unless --output says otherwise
+DEFAULT_OUTPUT = "loadtest-report.json"
+
+# Share of each kind of command in the generated traffic
+DEFAULT_MIX = {
+    "chat": 30,
+    "chat_repeat": 10,
+    "chat_stream": 10,
+    "builtin": 10,
+    "open_app": 10,
+    "set_reminder": 10,
+    "take_note": 10,
+    "search_notes": 10,
+}
+
+# Every fake generation starts with this token, so a reply containing it
+# came from the model rather than from an error handler
+FAKE_MARKER = "Loadtest"
+FAKE_WORDS = ["the", "quick", "answer", "is", "that", "it", "depends", "on", "context", "mostly"]
+FAKE_MODELS = ["mistral:latest", "llama3.2:1b"]
+
+# Replies the command API gives when something went wrong; it answers
+# errors with HTTP 200 and a friendly sentence
+ERROR_REPLIES = (
+    "I encountered an error",
+    "I had trouble",
+    "I'm having trouble",
+    "I can't reach my language model",
+    "My language model is taking too long",
+    "I'm handling a lot of requests",
+    "I couldn't find or open",
+)
+
+_CHAT_TOPICS = ["photosynthesis", "black holes", "the roman empire", "sourdough bread", "compound interest",
+                "jazz harmony", "plate tectonics", "the immune system", "sailing knots", "binary search"]
+_REPEATED_QUESTIONS = ["Explain how rainbows form", "Why is the sky blue", "Tell me a fun fact about octopuses"]
+_BUILTIN_QUERIES = ["hello", "what time is it", "who are you", "thank you", "how are you"]
+_APPS = ["calculator", "terminal", "text editor", "browser", "files"]
+_NOTE_WORDS = ["groceries", "milk", "eggs", "meeting", "budget", "project", "dentist", "birthday", "gift", "flight"]
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values (list): Values in ascending order
+        fraction (float): The percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float or None: The percentile, or None for an empty list
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def parse_mix(spec):
+    """
+    Parse a traffic mix such as "chat=50,open_app=25,take_note=25".
+
+    Args:
+        spec (str): Comma-separated kind=weight pairs
+
+    Returns:
+        dict: Kind -> weight
+    """
+    mix = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown command kind {kind!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+def make_command(kind, rng):
+    """
+    Build one command of the given kind.
+
+    Args:
+        kind (str): A key of DEFAULT_MIX
+        rng (random.Random): Source of randomness
+
+    Returns:
+        tuple: (path, query, streaming)
+    """
+    if kind == "chat":
+        topic = rng.choice(_CHAT_TOPICS)
+        # A unique detail keeps these out of the response cache
+        return "/api/process_command", f"Explain {topic} briefly, variant {rng.randrange(10 ** 9)}", False
+    if kind == "chat_repeat":
+        return "/api/process_command", rng.choice(_REPEATED_QUESTIONS), False
+    if kind == "chat_stream":
+        topic = rng.choice(_CHAT_TOPICS)
+        return "/api/process_command/stream", f"Explain {topic} briefly, variant {rng.randrange(10 ** 9)}", True
+    if kind == "builtin":
+        return "/api/process_command", rng.choice(_BUILTIN_QUERIES), False
+    if kind == "open_app":
+        return "/api/process_command", f"open {rng.choice(_APPS)}", False
+    if kind == "set_reminder":
+        return "/api/process_command", f"remind me to check the {rng.choice(_NOTE_WORDS)} in {rng.randint(2, 48)} hours", False
+    if kind == "take_note":
+        words = " ".join(rng.sample(_NOTE_WORDS, 3))
+        return "/api/process_command", f"take a note {words} {rng.randrange(10 ** 6)}", False
+    if kind == "search_notes":
+        return "/api/process_command", f"search my notes for {rng.choice(_NOTE_WORDS)}", False
+    raise ValueError(f"Unknown command kind: {kind}")
+
+class FakeOllama:
+    """
+    Local stand-in for the Ollama HTTP API.
+
+    Serves /api/generate (streaming and not), /api/tags and /api/ps. Each
+    generated token costs token_latency seconds; a generation fails with
+    probability error_rate, and with probability stall_rate it stops for
+    stall_seconds partway through, as a model swapping in or out would.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, tokens=40, token_latency=0.02,
+                 error_rate=0.0, stall_rate=0.0, stall_seconds=5.0, seed=None):
+        self.tokens = tokens
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"generations": 0, "errors_injected": 0, "stalls_injected": 0, "in_flight": 0, "max_in_flight": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Ollama listening on {self.url}")
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _plan(self):
+        # Decide the fate of one generation
+        with self._lock:
+            fail = self._rng.random() < self.error_rate
+            stall_at = self._rng.randrange(self.tokens) if self._rng.random() < self.stall_rate else None
+            self.stats["generations"] += 1
+            if fail:
+                self.stats["errors_injected"] += 1
+            elif stall_at is not None:
+                self.stats["stalls_injected"] += 1
+        return fail, stall_at
+
+    def _count_in_flight(self, delta):
+        with self._lock:
+            self.stats["in_flight"] += delta
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def _tokens(self, stall_at):
+        for i in range(self.tokens):
+            if i == stall_at:
+                time.sleep(self.stall_seconds)
+            time.sleep(self.token_latency)
+            yield FAKE_MARKER if i == 0 else f" {FAKE_WORDS[i % len(FAKE_WORDS)]}"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self.send_json(200, {"models": [{"name": name} for name in FAKE_MODELS]})
+                elif self.path == "/api/ps":
+                    self.send_json(200, {"models": [{"name": name, "expires_at": None} for name in FAKE_MODELS]})
+                elif self.path == "/api/version":
+                    self.send_json(200, {"version": "0.0.0-fake"})
+                else:
+                    self.send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self.send_json(400, {"error": "invalid JSON"})
+                    return
+                if self.path != "/api/generate":
+                    self.send_json(404, {"error": "not found"})
+                    return
+                if not payload.get("prompt"):
+                    # An empty prompt only loads the model, as at warm-up
+                    self.send_json(200, {"model": payload.get("model"), "response": "", "done": True,
+                                         "load_duration": 0})
+                    return
+
+                fail, stall_at = fake._plan()
+                if fail:
+                    self.send_json(500, {"error": "injected failure"})
+                    return
+
+                model = payload.get("model", FAKE_MODELS[0])
+                fake._count_in_flight(1)
+                try:
+                    if payload.get("stream", True):
+                        self.stream(model, stall_at)
+                    else:
+                        text = "".join(fake._tokens(stall_at))
+                        self.send_json(200, {"model": model, "response": text, "done": True})
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on the generation
+                    self.close_connection = True
+                finally:
+                    fake._count_in_flight(-1)
+
+            def stream(self, model, stall_at):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for token in fake._tokens(stall_at):
+                    self.send_chunk(json.dumps({"model": model, "response": token, "done": False}).encode() + b"\n")
+                self.send_chunk(json.dumps({"model": model, "response": "", "done": True}).encode() + b"\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+class AppUnderTest:
+    """
+    The Savin server started in a child process against the fake Ollama.
+
+    It runs with a throwaway home directory, so notes, reminders and the
+    response cache start empty and nothing touches the real user's files,
+    and with launches recorded instead of performed.
+    """
+
+    def __init__(self, ollama_url, port, command=None, workdir=None):
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.command = command or [sys.executable, "server.py"]
+        self.home = tempfile.mkdtemp(prefix="savin-loadtest-")
+        self.workdir = workdir or os.path.dirname(os.path.abspath(__file__))
+        self.env = dict(
+            os.environ,
+            HOME=self.home,
+            USERPROFILE=self.home,
+            OLLAMA_HOST=ollama_url,
+            SAVIN_HOST="127.0.0.1",
+            SAVIN_PORT=str(port),
+            SAVIN_LAUNCH_DRY_RUN="1",
+            SAVIN_LOG_FILE=os.path.join(self.home, "savin.jsonl"),
+            SAVIN_LOG_CONSOLE="0",
+        )
+        self.process = None
+        self._output = None
+
+    def start(self, timeout=60.0):
+        """
+        Start the server and wait until it answers.
+
+        Args:
+            timeout (float): Seconds to wait for the server to come up
+        """
+        self._output = open(os.path.join(self.home, "server.out"), "wb")
+        self.process = subprocess.Popen(self.command, cwd=self.workdir, env=self.env,
+                                        stdout=self._output, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode}; "
+                                   f"see {self._output.name}")
+            try:
+                if requests.get(f"{self.url}/api/status", timeout=1).status_code == 200:
+                    logger.info(f"Server up at {self.url}")
+                    return self
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Server did not answer within {timeout}s; see {self._output.name}")
+
+    def stop(self, keep_home=False):
+        """Stop the server and remove its home directory."""
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self._output:
+            self._output.close()
+        if not keep_home:
+            shutil.rmtree(self.home, ignore_errors=True)
+
+class LoadGenerator:
+    """
+    Open-loop load generator for the command API.
+
+    Commands are issued on a fixed (or Poisson) schedule whether or not
+    earlier ones have finished, and latency is measured from each command's
+    scheduled start, so a stalled server shows up as tail latency instead of
+    quietly lowering the offered load.
+    """
+
+    def __init__(self, base_url, rate, duration, mix=None, warmup=0.0, concurrency=256,
+                 timeout=60.0, poisson=False, seed=None):
+        self.base_url = base_url.rstrip("/")
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or DEFAULT_MIX
+        self.warmup = warmup
+        self.timeout = timeout
+        self.poisson = poisson
+        self._rng = random.Random(seed)
+        self._local = threading.local()
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load")
+        self._lock = threading.Lock()
+        self.results = []
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _send(self, kind, path, query, streaming, scheduled, measured):
+        result = {"kind": kind, "ok": False, "error": None, "latency_ms": None, "first_byte_ms": None,
+                  "measured": measured}
+        try:
+            response = self._session().post(f"{self.base_url}{path}", json={"query": query},
+                                            timeout=self.timeout, stream=streaming)
+            with response:
+                if response.status_code != 200:
+                    result["error"] = f"http_{response.status_code}"
+                elif streaming:
+                    text = self._read_events(response, scheduled, result)
+                    result["error"] = self._check_reply(kind, text)
+                else:
+                    result["error"] = self._check_reply(kind, response.json().get("response", ""))
+        except requests.exceptions.Timeout:
+            result["error"] = "timeout"
+        except requests.exceptions.RequestException as e:
+            result["error"] = type(e).__name__
+        except ValueError:
+            result["error"] = "bad_response"
+
+        result["latency_ms"] = (time.perf_counter() - scheduled) * 1000
+        result["ok"] = result["error"] is None
+        with self._lock:
+            self.results.append(result)
+
+    def _read_events(self, response, scheduled, result):
+        # Return the text of the closing "done" event
+        text = None
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if result["first_byte_ms"] is None:
+                result["first_byte_ms"] = (time.perf_counter() - scheduled) * 1000
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:") and event == "done":
+                text = json.loads(line[5:]).get("response", "")
+            elif not line:
+                event = None
+        if text is None:
+            raise ValueError("Stream ended without a done event")
+        return text
+
+    def _check_reply(self, kind, text):
+        if not text:
+            return "empty_reply"
+        if kind.startswith("chat") and FAKE_MARKER not in text:
+            return "llm_error_reply"
+        if text.startswith(ERROR_REPLIES):
+            return "error_reply"
+        return None
+
+    def run(self):
+        """
+        Drive the target rate for the configured duration.
+
+        Returns:
+            list: One result dict per command
+        """
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        total = self.warmup + self.duration
+        start = time.perf_counter()
+        next_at = start
+        self.measure_start = start + self.warmup
+
+        while next_at < start + total:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = self._rng.choices(kinds, weights)[0]
+            path, query, streaming = make_command(kind, self._rng)
+            self._pool.submit(self._send, kind, path, query, streaming, next_at, next_at >= self.measure_start)
+            next_at += self._rng.expovariate(self.rate) if self.poisson else 1.0 / self.rate
+
+        self.issue_seconds = time.perf_counter() - start
+        self._pool.shutdown(wait=True)
+        self.finish_seconds = time.perf_counter() - start
+        return self.results
+
+def summarize(results, seconds):
+    """
+    Summarize a set of results.
+
+    Args:
+        results (list): Result dicts from LoadGenerator
+        seconds (float): Wall-clock seconds the results were issued over
+
+    Returns:
+        dict: Counts, throughput, error rate and latency percentiles
+    """
+    latencies = sorted(r["latency_ms"] for r in results)
+    ok_latencies = sorted(r["latency_ms"] for r in results if r["ok"])
+    first_bytes = sorted(r["first_byte_ms"] for r in results if r["first_byte_ms"] is not None)
+    errors = {}
+    for r in results:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+    def describe(values):
+        if not values:
+            return None
+        return {
+            "p50": round(percentile(values, 0.50), 2),
+            "p95": round(percentile(values, 0.95), 2),
+            "p99": round(percentile(values, 0.99), 2),
+            "max": round(values[-1], 2),
+            "mean": round(sum(values) / len(values), 2),
+        }
+
+    summary = {
+        "requests": len(results),
+        "succeeded": len(ok_latencies),
+        "throughput_rps": round(len(ok_latencies) / seconds, 2) if seconds > 0 else None,
+        "error_rate": round(1 - len(ok_latencies) / len(results), 4) if results else None,
+        "errors": errors,
+        "latency_ms": describe(latencies),
+    }
+    if first_bytes:
+        summary["first_byte_ms"] = describe(first_bytes)
+    return summary
+
+_STAGE_SERIES = re.compile(r'^savin_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+
+def scrape_stage_means(base_url):
+    """
+    Read the server's mean time per stage from /metrics.
+
+    Args:
+        base_url (str): The server's address
+
+    Returns:
+        dict: Stage -> {"count", "mean_ms"}, empty if /metrics is unavailable
+    """
+    try:
+        text = requests.get(f"{base_url}/metrics", timeout=5).text
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Could not read server metrics: {e}")
+        return {}
+    sums, counts = {}, {}
+    for line in text.splitlines():
+        match = _STAGE_SERIES.match(line)
+        if match:
+            (sums if match.group(1) == "sum" else counts)[match.group(2)] = float(match.group(3))
+    return {
+        name: {"count": int(counts[name]), "mean_ms": round(sums.get(name, 0.0) / counts[name] * 1000, 3)}
+        for name in sorted(counts) if counts[name]
+    }
+
+def run_benchmark(args):
+    """
+    Run one benchmark as configured on the command line.
+
+    Args:
+        args (argparse.Namespace): Parsed options
+
+    Returns:
+        dict: The report written to args.output
+    """
+    fake = FakeOllama(port=args.ollama_port, tokens=args.tokens, token_latency=args.token_latency,
+                      error_rate=args.error_rate, stall_rate=args.stall_rate, stall_seconds=args.stall_seconds,
+                      seed=args.seed).start()
+    app = None
+    try:
+        if args.url:
+            base_url = args.url
+        else:
+            command = args.server_command.split() if args.server_command else None
+            app = AppUnderTest(fake.url, args.port, command=command).start()
+            base_url = app.url
+
+        generator = LoadGenerator(base_url, rate=args.rate, duration=args.duration, mix=parse_mix(args.mix),
+                                  warmup=args.warmup, concurrency=args.concurrency, timeout=args.timeout,
+                                  poisson=args.poisson, seed=args.seed)
+        logger.info(f"Offering {args.rate}/s for {args.duration}s (+{args.warmup}s warmup) to {base_url}")
+        results = [r for r in generator.run() if r["measured"]]
+
+        by_kind = {}
+        for r in results:
+            by_kind.setdefault(r["kind"], []).append(r)
+
+        report = {
+            "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "target": base_url,
+            "config": {
+                "rate": args.rate, "duration_s": args.duration, "warmup_s": args.warmup,
+                "arrivals": "poisson" if args.poisson else "uniform", "mix": parse_mix(args.mix),
+                "concurrency": args.concurrency, "timeout_s": args.timeout, "seed": args.seed,
+                "ollama": {"tokens": args.tokens, "token_latency_s": args.token_latency,
+                           "error_rate": args.error_rate, "stall_rate": args.stall_rate,
+                           "stall_seconds": args.stall_seconds},
+            },
+            "drain_s": round(generator.finish_seconds - generator.issue_seconds, 3),
+            "overall": summarize(results, args.duration),
+            "by_kind": {kind: summarize(items, args.duration) for kind, items in sorted(by_kind.items())},
+            "fake_ollama": dict(fake.stats),
+            "server_stages": scrape_stage_means(base_url),
+        }
+    finally:
+        if app:
+            app.stop(keep_home=args.keep_home)
+        fake.stop()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {args.output}")
+    return report
+
+def check_thresholds(report, max_p95_ms=None, max_error_rate=None):
+    """
+    Compare a report against limits.
+
+    Returns:
+        list: Descriptions of the limits that were exceeded
+    """
+    failures = []
+    overall = report["overall"]
+    p95 = (overall["latency_ms"] or {}).get("p95")
+    if max_p95_ms is not None and p95 is not None and p95 > max_p95_ms:
+        failures.append(f"p95 latency {p95}ms exceeds {max_p95_ms}ms")
+    if max_error_rate is not None and (overall["error_rate"] or 0) > max_error_rate:
+        failures.append(f"error rate {overall['error_rate']} exceeds {max_error_rate}")
+    return failures
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load test the Savin command API against a fake Ollama server.")
+    parser.add_argument("--rate", type=float, default=20.0, help="commands per second to offer")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to measure")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of unmeasured traffic first")
+    parser.add_argument("--poisson", action="store_true", help="randomize arrivals instead of spacing them evenly")
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help="command mix as kind=weight pairs")
+    parser.add_argument("--concurrency", type=int, default=256, help="most commands in flight at once")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-command timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a repeatable run")
+    parser.add_argument("--tokens", type=int, default=40, help="tokens per fake generation")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="seconds per fake token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of generations that fail")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="share of generations that stall")
+    parser.add_argument("--stall-seconds", type=float, default=5.0, help="length of a stall")
+    parser.add_argument("--ollama-port", type=int, default=0, help="port for the fake Ollama (default: any)")
+    parser.add_argument("--port", type=int, default=5055, help="port to start the server on")
+    parser.add_argument("--server-command", default=None, help="command that starts the server (default: server.py)")
+    parser.add_argument("--url", default=None, help="test an already running server instead of starting one")
+    parser.add_argument("--keep-home", action="store_true", help="keep the server's temporary home and output")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON report")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="fail if overall p95 latency is higher")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="fail if the error rate is higher")
+    return parser
+
+# Run a benchmark when executed directly
+if __name__ == "__main__":
+    configure_logging()
+    args = build_parser().parse_args()
+    report = run_benchmark(args)
+
+    overall = report["overall"]
+    print(json.dumps({"overall": overall, "by_kind": {k: v["latency_ms"] for k, v in report["by_kind"].items()}},
+                     indent=2))
+    failures = check_thresholds(report, args.max_p95_ms, args.max_error_rate)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,258 @@
+import atexit
+import contextvars
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Where structured logs go, and how they rotate. Setting SAVIN_LOG_ROTATE_WHEN
+# (for example "midnight" or "H") rotates by time instead of by size.
+LOG_FILE = os.environ.get("SAVIN_LOG_FILE", os.path.join("logs", "savin.jsonl"))
+LOG_MAX_BYTES = int(os.environ.get("SAVIN_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.environ.get("SAVIN_LOG_BACKUPS", "5"))
+LOG_ROTATE_WHEN = os.environ.get("SAVIN_LOG_ROTATE_WHEN", "")
+
+# Root level plus per-logger overrides, e.g. "Savin=DEBUG,OllamaChat=WARNING"
+LOG_LEVEL = os.environ.get("SAVIN_LOG_LEVEL", "INFO")
+LOG_LEVELS = os.environ.get("SAVIN_LOG_LEVELS", "")
+
+# Human-readable copy of every record on stderr
+LOG_CONSOLE = os.environ.get("SAVIN_LOG_CONSOLE", "1") != "0"
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Records at or below this level are rate limited per logger
+SAMPLE_LEVEL = logging.getLevelName(os.environ.get("SAVIN_LOG_SAMPLE_LEVEL", "DEBUG"))
+SAMPLE_RATE = float(os.environ.get("SAVIN_LOG_SAMPLE_RATE", "20"))
+SAMPLE_BURST = float(os.environ.get("SAVIN_LOG_SAMPLE_BURST", "50"))
+
+# Records waiting for the listener; when full, new records are dropped
+# rather than blocking the request that logged them
+QUEUE_SIZE = 10000
+
+# Request id of the work the current thread or task is doing
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+def new_request_id():
+    """Generate a short random request id."""
+    return uuid.uuid4().hex[:12]
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the request id of the code that logged them."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate limit high-volume low-level records.
+
+    Each logger gets a token bucket refilled at rate records per second and
+    holding up to burst; records at or below the sampled level are dropped
+    while its bucket is empty. Higher levels always pass.
+    """
+
+    def __init__(self, level=SAMPLE_LEVEL, rate=SAMPLE_RATE, burst=SAMPLE_BURST):
+        super().__init__()
+        self.level = level
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.dropped = {}
+
+    def filter(self, record):
+        if record.levelno > self.level:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(record.name, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[record.name] = (tokens, now)
+                self.dropped[record.name] = self.dropped.get(record.name, 0) + 1
+                return False
+            self._buckets[record.name] = (tokens - 1, now)
+            return True
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Render the message and traceback here, where the arguments are
+        # still valid, but keep the traceback apart from the message
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    # Never let a backed-up listener stall the caller
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _state["overflowed"] += 1
+
+_exception_formatter = logging.Formatter()
+_state = {"listener": None, "handler": None, "sampler": None, "overflowed": 0}
+_configure_lock = threading.Lock()
+
+def parse_levels(spec):
+    """
+    Parse per-logger levels.
+
+    Args:
+        spec (str): Comma-separated name=LEVEL pairs
+
+    Returns:
+        dict: Logger name -> numeric level
+    """
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = (part.strip() for part in item.split("=", 1))
+        value = logging.getLevelName(level.upper())
+        if name and isinstance(value, int):
+            levels[name] = value
+    return levels
+
+def _file_handler(path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if LOG_ROTATE_WHEN:
+        handler = logging.handlers.TimedRotatingFileHandler(path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUPS,
+                                                            encoding="utf-8")
+    else:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                                       encoding="utf-8")
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+def configure_logging(path=LOG_FILE, level=LOG_LEVEL, levels=LOG_LEVELS, console=LOG_CONSOLE):
+    """
+    Configure logging for the whole process; later calls do nothing.
+
+    Loggers only enqueue their records. A background listener thread writes
+    them as JSON lines to a rotating file (and to stderr if console is set),
+    so logging never adds disk latency to the caller.
+
+    Args:
+        path (str): Log file path
+        level (str): Root log level
+        levels (str): Per-logger overrides, "name=LEVEL,..."
+        console (bool): Also print records to stderr
+    """
+    with _configure_lock:
+        if _state["listener"] is not None:
+            return
+
+        handlers = []
+        try:
+            handlers.append(_file_handler(path))
+        except OSError as e:
+            print(f"Could not open log file {path}: {e}", file=sys.stderr)
+        if console or not handlers:
+            stream = logging.StreamHandler()
+            stream.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(stream)
+
+        records = queue.Queue(QUEUE_SIZE)
+        listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        sampler = SamplingFilter()
+        handler = _NonBlockingQueueHandler(records)
+        handler.addFilter(RequestIdFilter())
+        handler.addFilter(sampler)
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(logging.getLevelName(level.upper()))
+        for name, logger_level in parse_levels(levels).items():
+            logging.getLogger(name).setLevel(logger_level)
+
+        listener.start()
+        _state.update(listener=listener, handler=handler, sampler=sampler)
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Write out queued records and stop the listener thread."""
+    with _configure_lock:
+        listener = _state["listener"]
+        if listener is None:
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(_state["handler"])
+        _state.update(listener=None, handler=None)
+
+def logging_stats():
+    """
+    Get counters for records that were not written.
+
+    Returns:
+        dict: Queued, overflowed and sampled-out record counts
+    """
+    sampler = _state["sampler"]
+    handler = _state["handler"]
+    return {
+        "queued": handler.queue.qsize() if handler else 0,
+        "overflowed": _state["overflowed"],
+        "sampled_out": dict(sampler.dropped) if sampler else {},
+    }
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import tempfile
+
+    log_path = os.path.join(tempfile.mkdtemp(), "test.jsonl")
+    configure_logging(path=log_path, level="DEBUG", levels="Noisy=DEBUG,Quiet=WARNING", console=False)
+    logger = logging.getLogger("Noisy")
+
+    token = request_id_var.set(new_request_id())
+    start = time.perf_counter()
+    for i in range(10000):
+        logger.debug(f"debug {i}")
+    logger.info("info is never sampled")
+    logging.getLogger("Quiet").info("filtered by level")
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("with a traceback")
+    elapsed = time.perf_counter() - start
+    request_id_var.reset(token)
+
+    print(f"10003 log calls in {elapsed * 1000:.1f}ms ({elapsed / 10003 * 1e6:.2f}us each)")
+    print(logging_stats())
+    shutdown_logging()
+    with open(log_path) as f:
+        lines = f.readlines()
+    print(f"{len(lines)} lines written; last: {lines[-1].strip()}")
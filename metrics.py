@@ -0,0 +1,259 @@
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger('Metrics')
+
+# Latency buckets in seconds, from sub-millisecond intent matching up to
+# long language model generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonically increasing count, one series per label combination."""
+
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+                                 for labels, value in items]
+
+class Gauge(Counter):
+    """Value that can go up and down, such as requests in flight."""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values over fixed buckets.
+
+    Each observation is one bisect and a few additions under a lock, so it
+    is cheap enough to leave on for every request.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Per-bucket counts (plus one for +Inf), sum
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+
+        lines = self._header()
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{_format_number(float(bound))}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series_labels = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{series_labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{series_labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """
+        Render every metric for a Prometheus scrape.
+
+        Returns:
+            str: The exposition text
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Shared registry and the metrics recorded across the application
+registry = MetricsRegistry()
+
+process_start_time = registry.gauge(
+    "savin_process_start_time_seconds", "Start time of the process since the epoch in seconds")
+process_start_time.set(value=time.time())
+
+stage_seconds = registry.histogram(
+    "savin_stage_duration_seconds", "Time spent in each stage of handling a command", ["stage"])
+stage_errors = registry.counter(
+    "savin_stage_errors_total", "Stages that ended with an exception", ["stage"])
+stage_in_flight = registry.gauge(
+    "savin_stage_in_flight", "Stages currently running", ["stage"])
+
+request_seconds = registry.histogram(
+    "savin_request_duration_seconds", "Time to answer a command end to end", ["route"])
+requests_total = registry.counter(
+    "savin_requests_total", "Commands handled, by route, intent and outcome", ["route", "intent", "status"])
+requests_in_flight = registry.gauge(
+    "savin_requests_in_flight", "Commands currently being handled", ["route"])
+
+first_token_seconds = registry.histogram(
+    "savin_llm_first_token_seconds", "Time from sending a generation to Ollama until its first token")
+
+tier_requests = registry.counter(
+    "savin_llm_tier_requests_total", "Generations sent to each model tier, by the feature that routed them",
+    ["tier", "reason"])
+tier_seconds = registry.histogram(
+    "savin_llm_tier_duration_seconds", "Time from sending a generation until its last token, by model tier", ["tier"])
+
+speculation_outcomes = registry.counter(
+    "savin_speculations_total", "Speculative generations from interim transcripts, by outcome", ["outcome"])
+
+chat_answers = registry.counter(
+    "savin_chat_answers_total", "Conversation replies by what served them: llm, cache, rules or builtin", ["source"])
+
+singleflight_requests = registry.counter(
+    "savin_llm_singleflight_total", "LLM requests that started a generation (leader) or shared one (follower)",
+    ["mode", "role"])
+
+model_warm = registry.gauge(
+    "savin_model_warm", "Whether a chat model is loaded in Ollama (1) or not (0)", ["model"])
+
+class stage:
+    """
+    Time one stage of handling a command.
+
+    Use as a context manager; the duration is recorded in
+    savin_stage_duration_seconds and an exception counts as a stage error.
+    Closing a generator or cancelling a task is not an error.
+
+    Args:
+        name (str): The stage, e.g. "intent" or "ollama"
+    """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stage_in_flight.inc(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_seconds.observe(time.perf_counter() - self.start, self.name)
+        stage_in_flight.dec(self.name)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            stage_errors.inc(self.name)
+        return False
+
+class track_request:
+    """
+    Record the outcome and duration of one command.
+
+    Use as a context manager and set intent (and status, if the handler
+    turns an error into a friendly reply) once known.
+
+    Args:
+        route (str): The endpoint handling the command
+    """
+
+    __slots__ = ("route", "intent", "status", "start")
+
+    def __init__(self, route):
+        self.route = route
+        self.intent = "none"
+        self.status = "ok"
+
+    def __enter__(self):
+        requests_in_flight.inc(self.route)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        request_seconds.observe(time.perf_counter() - self.start, self.route)
+        requests_in_flight.dec(self.route)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.status = "error"
+        requests_total.inc(self.route, self.intent, self.status)
+        return False
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import timeit
+
+    rounds = 100000
+    seconds = timeit.timeit(lambda: stage("noop").__enter__().__exit__(None, None, None), number=rounds)
+    print(f"Stage timer overhead: {seconds / rounds * 1e6:.2f}us")
+
+    with track_request("process_command") as tracked:
+        with stage("intent"):
+            tracked.intent = "open_app"
+    try:
+        with stage("ollama"):
+            raise ConnectionError("Ollama is down")
+    except ConnectionError:
+        pass
+
+    print(registry.render())
@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+from collections import namedtuple
+
+from intents import open_ended_router, smalltalk_router
+from metrics import tier_requests, tier_seconds
+from warmup import model_warmer
+
+logger = logging.getLogger('ModelRouter')
+
+# The model for questions, and a small fast one for chit-chat. Tiering is
+# off until SAVIN_SMALL_MODEL names a model that has been pulled, e.g.
+# llama3.2:1b.
+LARGE_MODEL = os.environ.get("SAVIN_CHAT_MODEL", "mistral")
+SMALL_MODEL = os.environ.get("SAVIN_SMALL_MODEL", LARGE_MODEL)
+# Queries scoring at least this go to the large model
+COMPLEXITY_THRESHOLD = float(os.environ.get("SAVIN_ROUTER_THRESHOLD", "1.0"))
+# Queries this long score 1.0 on length alone
+LONG_QUERY_WORDS = int(os.environ.get("SAVIN_ROUTER_LONG_WORDS", "14"))
+
+# Smalltalk intents that never need the large model
+TRIVIAL_INTENTS = {"how_are_you", "thanks"}
+# Words that open a question needing a real answer
+QUESTION_WORDS = {"what", "what's", "whats", "who", "who's", "whom", "whose", "where", "where's", "when", "which",
+                  "how", "why", "is", "are", "was", "were", "do", "does", "did", "can", "could", "will", "would",
+                  "should", "shall"}
+
+# The tier a query was sent to, its model, its complexity score and the
+# feature that decided it
+ModelRoute = namedtuple("ModelRoute", ["tier", "model", "score", "reason"])
+
+class ModelRouter:
+    """
+    Sends each chat query to the smallest model that can answer it.
+
+    A query is scored from features that cost a few dict lookups: its
+    length, whether it asks for an explanation or a piece of writing
+    (open_ended_router), whether it confidently matches trivial small talk
+    such as thanks (smalltalk_router), and whether it asks a question at
+    all. Queries scoring at least the threshold go to the large tier, so
+    only short remarks and trivial small talk reach the small tier; factual
+    questions like "what's the capital of France?" do not.
+
+    A tier whose model the warmer could not load (not pulled, say) is
+    skipped in favour of the large tier, so a missing small model never
+    breaks chat.
+    """
+
+    def __init__(self, small_model=SMALL_MODEL, large_model=LARGE_MODEL, threshold=COMPLEXITY_THRESHOLD,
+                 long_query_words=LONG_QUERY_WORDS, available=model_warmer.available):
+        # Tiers from smallest to largest
+        self.tiers = {"small": small_model, "large": large_model}
+        self.threshold = threshold
+        self.long_query_words = long_query_words
+        self.available = available
+        self._lock = threading.Lock()
+        self._stats = {tier: {"requests": 0, "seconds": 0.0} for tier in self.tiers}
+
+    def score(self, query):
+        """
+        Score how much model a query needs.
+
+        Args:
+            query (str): The user's query
+
+        Returns:
+            tuple: The score and the feature that dominated it
+        """
+        words = len(query.split())
+        score = min(words / self.long_query_words, 2.0)
+        reason = "long" if score >= self.threshold else "short"
+        if open_ended_router.match(query).intent:
+            score += 1.0
+            reason = "open_ended"
+        elif smalltalk_router.match(query).intent in TRIVIAL_INTENTS:
+            score -= 1.0
+            reason = "smalltalk"
+        elif query.rstrip().endswith("?") or (query.split() or [""])[0].lower() in QUESTION_WORDS:
+            score += 1.0
+            reason = "question"
+        return score, reason
+
+    def route(self, query):
+        """
+        Pick the model tier for a query.
+
+        Args:
+            query (str): The user's query
+
+        Returns:
+            ModelRoute: The chosen tier and model
+        """
+        score, reason = self.score(query)
+        tier = "large" if score >= self.threshold else "small"
+        if tier != "large" and not self.available(self.tiers[tier]):
+            tier, reason = "large", "unavailable"
+        return ModelRoute(tier, self.tiers[tier], round(score, 2), reason)
+
+    def for_model(self, model, reason):
+        """
+        Route to the tier serving a given model.
+
+        Args:
+            model (str): The model name
+            reason (str): Why this model was chosen
+
+        Returns:
+            ModelRoute: The tier of the model (the large tier if unknown)
+        """
+        for tier, tier_model in self.tiers.items():
+            if tier_model == model:
+                return ModelRoute(tier, model, None, reason)
+        return ModelRoute("large", model, None, reason)
+
+    def rank(self, model):
+        """Position of a model's tier, smallest first; unknown models rank last."""
+        models = list(self.tiers.values())
+        return models.index(model) if model in models else len(models)
+
+    def models(self):
+        """The distinct models behind the tiers."""
+        return list(dict.fromkeys(self.tiers.values()))
+
+    def count(self, route):
+        """
+        Record that a generation was sent to a tier.
+
+        Args:
+            route (ModelRoute): The route taken
+        """
+        tier_requests.inc(route.tier, route.reason)
+        with self._lock:
+            self._stats[route.tier]["requests"] += 1
+
+    def observe(self, route, seconds):
+        """
+        Record how long a completed generation took.
+
+        Args:
+            route (ModelRoute): The route taken
+            seconds (float): Time from sending the generation to its last token
+        """
+        tier_seconds.observe(seconds, route.tier)
+        with self._lock:
+            self._stats[route.tier]["seconds"] += seconds
+
+    def stats(self):
+        """
+        Get routing counters.
+
+        Returns:
+            dict: Tier -> model, generations sent and their total time
+        """
+        with self._lock:
+            return {tier: {"model": self.tiers[tier], "requests": stats["requests"],
+                           "seconds": round(stats["seconds"], 3)}
+                    for tier, stats in self._stats.items()}
+
+# Shared router for the chat functions
+model_router = ModelRouter()
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import timeit
+
+    test_queries = [
+        "thanks",
+        "that's pretty funny",
+        "How are you today?",
+        "What's the capital of France?",
+        "Tell me about the history of Rome",
+        "Why is the sky blue?",
+        "Explain quantum computing to a five year old in simple words",
+        "I was wondering whether you could give me some ideas for a birthday party for my daughter next week",
+    ]
+    model_router = ModelRouter(small_model="llama3.2:1b", large_model="mistral", available=lambda model: True)
+    for query in test_queries:
+        print(f"{query!r:72} {model_router.route(query)}")
+
+    rounds = 20000
+    seconds = timeit.timeit(lambda: [model_router.route(q) for q in test_queries], number=rounds)
+    print(f"Routing cost: {seconds / (rounds * len(test_queries)) * 1e6:.2f}us per query")
@@ -0,0 +1,461 @@
+import bisect
+import heapq
+import json
+import logging
+import math
+import operator
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from itertools import accumulate
+from pathlib import Path
+
+logger = logging.getLogger('NotesSearch')
+
+from notes_store import NOTES_DIR, notes_store
+
+SNAPSHOT_FILE = "search.snap"
+LOG_FILE = "search.log"
+# The log being folded into a snapshot while new notes go to a fresh one
+COMPACTING_LOG_FILE = "search.log.compacting"
+SNAPSHOT_MAGIC = b"SVNS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sIIQI")
+SECTION_LENGTH = struct.Struct("<Q")
+
+# Notes appended to the log before it is folded into a new snapshot
+COMPACT_EVERY = int(os.environ.get("SAVIN_SEARCH_COMPACT_EVERY", "2000"))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Prefix expansions score lower than the word that was actually said
+PREFIX_WEIGHT = 0.7
+MAX_PREFIX_TERMS = 64
+MIN_PREFIX_LENGTH = 2
+
+SNIPPET_CHARS = 120
+
+# Words too common to be worth indexing
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "i", "if", "in",
+    "is", "it", "me", "my", "of", "on", "or", "so", "that", "the", "this", "to",
+    "was", "with",
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    """
+    Split text into lowercase index terms.
+
+    Args:
+        text (str): Note or query text
+
+    Returns:
+        list: Terms, in order, without stopwords
+    """
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+class NotesSearchIndex:
+    """
+    Inverted index over the notes store with BM25 ranking.
+
+    Each term maps to the ids of the notes containing it and how often it
+    occurs there. Note ids only grow, so adding a note just appends to the
+    posting lists of its terms. Added notes are also appended to a small log;
+    every COMPACT_EVERY notes the whole index is written as a compressed,
+    delta-encoded snapshot and the log starts over. Loading reads the
+    snapshot and replays the log, and any notes the index has not seen yet
+    (for example ones imported into the store) are indexed on first use.
+    """
+
+    def __init__(self, directory, store):
+        self.directory = Path(directory)
+        self.store = store
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._loaded = False
+        self._compacting = False
+
+        # term -> (note ids, term frequencies); ids ascending
+        self._postings = {}
+        # Every term in sorted order, for prefix lookups, and terms added
+        # since it was last sorted
+        self._terms = []
+        self._new_terms = []
+        # Indexed length of each note by id (0 for unindexed ids)
+        self._lengths = array("I", [0])
+        self._total_length = 0
+        self._documents = 0
+        self._log = None
+        self._log_records = 0
+
+    @property
+    def last_id(self):
+        return len(self._lengths) - 1
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            start = time.perf_counter()
+            self._load_snapshot()
+            self._replay_log(COMPACTING_LOG_FILE)
+            self._replay_log(LOG_FILE)
+            self._log = open(self.directory / LOG_FILE, 'a')
+            self._loaded = True
+            logger.info(f"Loaded search index: {self._documents} notes, {len(self._postings)} terms "
+                        f"in {(time.perf_counter() - start) * 1000:.1f}ms")
+            self._catch_up()
+
+    def load_in_background(self):
+        """Load the index without blocking the caller."""
+        threading.Thread(target=self._ensure_loaded, name="notes-search-load", daemon=True).start()
+
+    # Indexing
+
+    def add(self, note_id, text):
+        """
+        Index a newly stored note.
+
+        Args:
+            note_id (int): The note's id in the store
+            text (str): The note text
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if note_id <= self.last_id:
+                return
+            # Notes stored without passing through here are picked up first
+            self._catch_up(until=note_id - 1)
+            self._index_note(note_id, Counter(tokenize(text)), persist=True)
+            self._log.flush()
+        self._maybe_compact()
+
+    def _catch_up(self, until=None):
+        until = self.store.count() if until is None else until
+        if until <= self.last_id:
+            return
+        start = time.perf_counter()
+        first = self.last_id + 1
+        for note_id in range(first, until + 1):
+            note = self.store.get(note_id)
+            self._index_note(note_id, Counter(tokenize(note["text"] if note else "")), persist=True)
+        self._log.flush()
+        logger.info(f"Indexed {until - first + 1} notes in {(time.perf_counter() - start) * 1000:.0f}ms")
+        self._maybe_compact()
+
+    def _index_note(self, note_id, counts, persist):
+        # The index always covers a contiguous run of ids from 1
+        length = sum(counts.values())
+        self._lengths.append(length)
+        if length:
+            self._documents += 1
+            self._total_length += length
+
+        for term, frequency in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+                self._new_terms.append(term)
+            postings[0].append(note_id)
+            postings[1].append(min(frequency, 0xFFFF))
+
+        if persist:
+            self._log.write(json.dumps([note_id, counts]) + "\n")
+            self._log_records += 1
+
+    # Searching
+
+    def search(self, query, limit=10, snippets=True):
+        """
+        Find the notes that best match a query.
+
+        The last word of the query also matches longer words it is a prefix
+        of, so a partly spoken word still finds its notes.
+
+        Args:
+            query (str): Words to look for
+            limit (int): Maximum number of results
+            snippets (bool): Include a snippet of each note around the match
+
+        Returns:
+            list: Results with id, timestamp, score and snippet, best first
+        """
+        self._ensure_loaded()
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            if self._documents == 0:
+                return []
+            average_length = self._total_length / self._documents
+
+            weights = {}
+            for word in words:
+                if word in self._postings:
+                    weights[word] = 1.0
+                if word == words[-1] or word not in self._postings:
+                    for term in self._expand(word):
+                        weights.setdefault(term, PREFIX_WEIGHT)
+
+            scores = {}
+            get_score = scores.get
+            lengths = self._lengths
+            # Length normalization: K1 * (1 - B + B * length / average_length)
+            base, per_unit = K1 * (1 - B), K1 * B / average_length
+            for term, weight in weights.items():
+                ids, frequencies = self._postings[term]
+                idf = math.log(1 + (self._documents - len(ids) + 0.5) / (len(ids) + 0.5)) * weight * (K1 + 1)
+                for note_id, frequency in zip(ids, frequencies):
+                    scores[note_id] = get_score(note_id, 0.0) + idf * frequency / (
+                        frequency + base + per_unit * lengths[note_id])
+
+            best = heapq.nlargest(limit, scores.items(), key=operator.itemgetter(1))
+
+        results = []
+        for note_id, score in best:
+            note = self.store.get(note_id)
+            if note is None:
+                continue
+            result = {"id": note_id, "timestamp": note["timestamp"], "score": round(score, 4)}
+            if snippets:
+                result["snippet"] = make_snippet(note["text"], weights)
+            results.append(result)
+        return results
+
+    def _expand(self, prefix):
+        # Terms starting with the prefix, via the sorted term list
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return []
+        self._sort_terms()
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + "\uffff", start)
+        return [term for term in self._terms[start:min(end, start + MAX_PREFIX_TERMS)] if term != prefix]
+
+    def _sort_terms(self):
+        # New terms are merged in lazily, so bulk indexing never pays for
+        # keeping the list sorted one insertion at a time
+        if self._new_terms:
+            self._new_terms.sort()
+            self._terms = list(heapq.merge(self._terms, self._new_terms))
+            self._new_terms = []
+
+    def stats(self):
+        """
+        Get the size of the index.
+
+        Returns:
+            dict: Note, term and posting counts
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "notes": self._documents,
+                "terms": len(self._postings),
+                "postings": sum(len(ids) for ids, _ in self._postings.values()),
+                "log_records": self._log_records
+            }
+
+    # Persistence
+
+    def _maybe_compact(self):
+        if self._log_records >= COMPACT_EVERY and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, name="notes-search-compact", daemon=True).start()
+
+    def compact(self):
+        """Write the whole index as a snapshot and empty the log."""
+        self._ensure_loaded()
+        with self._compact_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        log_path = self.directory / LOG_FILE
+        compacting_path = self.directory / COMPACTING_LOG_FILE
+        try:
+            with self._lock:
+                start = time.perf_counter()
+                self._sort_terms()
+                terms = self._terms
+                # Posting lists only grow at the end, so their current
+                # lengths pin down what goes into this snapshot
+                captured = [self._postings[term] + (len(self._postings[term][0]),) for term in terms]
+                lengths = self._lengths[:]
+                header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.last_id,
+                                              self._total_length, self._documents)
+                # Notes added from here on go to a fresh log
+                self._log.close()
+                os.replace(log_path, compacting_path)
+                self._log = open(log_path, 'a')
+                self._log_records = 0
+
+            # Encoding runs outside the lock so searches and adds carry on
+            counts = array("I", (count for _, _, count in captured))
+            deltas = array("I")
+            frequencies = array("H")
+            for ids, term_frequencies, count in captured:
+                ids = ids[:count]
+                # Ids ascend, so gaps are small and compress well
+                deltas.append(ids[0])
+                deltas.extend(map(operator.sub, ids[1:], ids[:-1]))
+                frequencies.extend(term_frequencies[:count])
+
+            sections = ["\n".join(terms).encode("utf-8"), counts.tobytes(), lengths.tobytes(),
+                        deltas.tobytes(), frequencies.tobytes()]
+            body = zlib.compress(b"".join(SECTION_LENGTH.pack(len(s)) + s for s in sections), 6)
+
+            snapshot_path = self.directory / SNAPSHOT_FILE
+            tmp_path = snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(header + body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, snapshot_path)
+
+            # Everything in the rotated log is now in the snapshot
+            compacting_path.unlink()
+            logger.info(f"Wrote search snapshot of {len(header) + len(body)} bytes "
+                        f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        except Exception as e:
+            logger.error(f"Error writing search snapshot: {str(e)}")
+        finally:
+            self._compacting = False
+
+    def _load_snapshot(self):
+        snapshot_path = self.directory / SNAPSHOT_FILE
+        if not snapshot_path.exists():
+            return
+        try:
+            raw = snapshot_path.read_bytes()
+            magic, version, last_id, total_length, documents = SNAPSHOT_HEADER.unpack_from(raw)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError("unrecognized snapshot format")
+            body = memoryview(zlib.decompress(raw[SNAPSHOT_HEADER.size:]))
+
+            sections = []
+            position = 0
+            while position < len(body):
+                (size,) = SECTION_LENGTH.unpack_from(body, position)
+                position += SECTION_LENGTH.size
+                sections.append(body[position:position + size])
+                position += size
+
+            terms = bytes(sections[0]).decode("utf-8").split("\n") if len(sections[0]) else []
+            counts, lengths, deltas, frequencies = array("I"), array("I"), array("I"), array("H")
+            for values, section in zip((counts, lengths, deltas, frequencies), sections[1:]):
+                values.frombytes(section)
+        except Exception as e:
+            logger.error(f"Could not load search snapshot: {e}. Rebuilding the index.")
+            return
+
+        postings = {}
+        position = 0
+        for term, count in zip(terms, counts):
+            end = position + count
+            postings[term] = (array("I", accumulate(deltas[position:end])), frequencies[position:end])
+            position = end
+
+        self._postings = postings
+        self._terms = terms
+        self._lengths = lengths
+        self._total_length = total_length
+        self._documents = documents
+
+    def _replay_log(self, name):
+        log_path = self.directory / name
+        if not log_path.exists():
+            return
+        with open(log_path, 'r') as f:
+            for line in f:
+                try:
+                    note_id, counts = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; the note is reindexed on catch-up
+                    break
+                if note_id > self.last_id + 1:
+                    # Records after a gap are left to catch-up as well
+                    break
+                if note_id == self.last_id + 1:
+                    self._index_note(note_id, counts, persist=False)
+                self._log_records += 1
+
+def make_snippet(text, terms, width=SNIPPET_CHARS):
+    """
+    Cut the part of a note around the first matching term.
+
+    Args:
+        text (str): The note text
+        terms (iterable): Index terms to look for
+        width (int): Approximate snippet length in characters
+
+    Returns:
+        str: The snippet, with ellipses where text was cut
+    """
+    text = " ".join(text.split())
+    match = None
+    if terms:
+        pattern = r"\b(?:" + "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)) + r")"
+        match = re.search(pattern, text, re.IGNORECASE)
+    if len(text) <= width:
+        return text
+
+    start = max(0, (match.start() if match else 0) - width // 3)
+    if start:
+        # Begin at a word boundary
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < start + 20 else start
+    end = min(len(text), start + width)
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        end = space if space > start else end
+    return ("..." if start else "") + text[start:end] + ("..." if end < len(text) else "")
+
+# Shared index over the notes store
+notes_index = NotesSearchIndex(NOTES_DIR, notes_store)
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    from notes_store import NotesStore
+
+    words = ("buy milk eggs bread call mom dentist appointment project meeting budget report "
+             "birthday gift garden plant tomatoes car service insurance renew passport flight "
+             "hotel booking recipe pasta sauce book idea startup pitch deck invoice client").split()
+    random.seed(7)
+    directory = tempfile.mkdtemp()
+    for i in range(100000):
+        path = Path(directory) / f"note_{i:06d}.txt"
+        path.write_text(" ".join(random.choice(words) for _ in range(random.randint(5, 30))) + f" ref{i}")
+
+    store = NotesStore(directory)
+    index = NotesSearchIndex(directory, store)
+    start = time.perf_counter()
+    index.compact()
+    print(f"Indexed and compacted {store.count()} notes in {time.perf_counter() - start:.1f}s: {index.stats()}")
+
+    note = store.add("Remember to buy oat milk and a birthday cake")
+    index.add(note["id"], "Remember to buy oat milk and a birthday cake")
+
+    for query in ["milk cake", "birthd", "passport renew", "ref4242", "nothing matches this"]:
+        start = time.perf_counter()
+        results = index.search(query, limit=3)
+        took = (time.perf_counter() - start) * 1000
+        print(f"{query!r:24} {took:6.2f}ms {[(r['id'], r['score'], r['snippet'][:40]) for r in results]}")
+
+    print(f"Snapshot size: {os.path.getsize(Path(directory) / SNAPSHOT_FILE)} bytes")
+    start = time.perf_counter()
+    reloaded = NotesSearchIndex(directory, store)
+    print(f"Reloaded: {reloaded.search('ref4242', limit=1)} in {(time.perf_counter() - start) * 1000:.0f}ms")
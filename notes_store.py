@@ -0,0 +1,287 @@
+import bisect
+import datetime
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger('NotesStore')
+
+# Notes live where the one-file-per-note versions kept them
+NOTES_DIR = Path.home() / "Savin Notes"
+DATA_FILE = "notes.dat"
+INDEX_FILE = "notes.idx"
+# Written once the legacy note_*.txt files have been imported
+IMPORT_MARKER = ".imported"
+
+# One index record per note: offset and length in the data file, and the
+# creation time. Note ids are positions in the index, starting at 1.
+INDEX_RECORD = struct.Struct("<QId")
+
+MAX_PAGE_SIZE = 1000
+
+def _to_epoch(value):
+    # Accept ISO timestamps as used by the API, or epoch seconds
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+class NotesStore:
+    """
+    Append-only notes store with a compact fixed-size index.
+
+    Note text is appended to a single data file and each note gets a small
+    index record (offset, length, timestamp), so a note never overwrites
+    another and the directory never fills with files. The index is kept in
+    memory in id order, which is also time order, so recent and range
+    listings touch only the notes they return and a note is read with one
+    seek.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._offsets = []
+        self._lengths = []
+        self._timestamps = []
+        self._data = None
+        self._index = None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+            self._data = open(self.directory / DATA_FILE, 'a+b')
+            self._index = open(self.directory / INDEX_FILE, 'ab')
+            self._loaded = True
+        if not self._timestamps and not (self.directory / IMPORT_MARKER).exists():
+            self.import_directory(self.directory)
+
+    def _load_index(self):
+        index_path = self.directory / INDEX_FILE
+        data_path = self.directory / DATA_FILE
+        raw = index_path.read_bytes() if index_path.exists() else b""
+        data_size = data_path.stat().st_size if data_path.exists() else 0
+
+        # Drop a partial record or records whose text never reached the disk
+        usable = len(raw) - len(raw) % INDEX_RECORD.size
+        records = list(INDEX_RECORD.iter_unpack(raw[:usable]))
+        while records and records[-1][0] + records[-1][1] > data_size:
+            records.pop()
+        if len(records) * INDEX_RECORD.size != len(raw):
+            logger.warning(f"Truncating damaged notes index to {len(records)} records")
+            with open(index_path, 'r+b') as f:
+                f.truncate(len(records) * INDEX_RECORD.size)
+
+        self._offsets = [record[0] for record in records]
+        self._lengths = [record[1] for record in records]
+        self._timestamps = [record[2] for record in records]
+        logger.info(f"Loaded notes index with {len(records)} notes")
+
+    def add(self, text, timestamp=None):
+        """
+        Append a note.
+
+        Args:
+            text (str): The note text
+            timestamp (float): Creation time in epoch seconds (default: now)
+
+        Returns:
+            dict: The stored note's id, timestamp and length
+        """
+        self._ensure_loaded()
+        return self._append([(text, timestamp)])[0]
+
+    def _append(self, notes):
+        with self._lock:
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            last = self._timestamps[-1] if self._timestamps else 0.0
+            bodies, records = [], []
+            for text, timestamp in notes:
+                body = text.encode("utf-8")
+                # Keep the index in time order even if the clock steps back
+                last = max(timestamp if timestamp is not None else time.time(), last)
+                bodies.append(body)
+                records.append((offset, len(body), last))
+                offset += len(body)
+
+            self._data.write(b"".join(bodies))
+            self._data.flush()
+            os.fsync(self._data.fileno())
+
+            # Index records are written last, so a crash in between only
+            # leaves unreferenced bytes in the data file
+            self._index.write(b"".join(INDEX_RECORD.pack(*record) for record in records))
+            self._index.flush()
+            os.fsync(self._index.fileno())
+
+            first = len(self._offsets)
+            for record_offset, length, timestamp in records:
+                self._offsets.append(record_offset)
+                self._lengths.append(length)
+                self._timestamps.append(timestamp)
+            return [self._describe(position) for position in range(first, len(self._offsets))]
+
+    def _describe(self, position):
+        return {
+            "id": position + 1,
+            "timestamp": datetime.datetime.fromtimestamp(self._timestamps[position]).isoformat(),
+            "length": self._lengths[position]
+        }
+
+    def _read(self, position):
+        self._data.seek(self._offsets[position])
+        return self._data.read(self._lengths[position]).decode("utf-8", errors="replace")
+
+    def get(self, note_id):
+        """
+        Read one note.
+
+        Args:
+            note_id (int): The note's id
+
+        Returns:
+            dict or None: The note with its text, or None if there is no such note
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if not 1 <= note_id <= len(self._offsets):
+                return None
+            note = self._describe(note_id - 1)
+            note["text"] = self._read(note_id - 1)
+        return note
+
+    def recent(self, limit=5, with_text=False):
+        """
+        List the newest notes, newest first.
+
+        Args:
+            limit (int): Maximum number of notes to return
+            with_text (bool): Include each note's text
+
+        Returns:
+            list: Note dicts
+        """
+        self._ensure_loaded()
+        limit = max(0, min(int(limit), MAX_PAGE_SIZE))
+        with self._lock:
+            count = len(self._offsets)
+            return self._page(range(count - 1, max(count - limit, 0) - 1, -1), with_text)
+
+    def range(self, since=None, until=None, limit=100, with_text=False):
+        """
+        List notes created in a time range, oldest first.
+
+        Args:
+            since (str or float): Only notes at or after this ISO timestamp or epoch time
+            until (str or float): Only notes before this ISO timestamp or epoch time
+            limit (int): Maximum number of notes to return
+            with_text (bool): Include each note's text
+
+        Returns:
+            list: Note dicts
+        """
+        self._ensure_loaded()
+        since, until = _to_epoch(since), _to_epoch(until)
+        limit = max(0, min(int(limit), MAX_PAGE_SIZE))
+        with self._lock:
+            timestamps = self._timestamps
+            start = bisect.bisect_left(timestamps, since) if since is not None else 0
+            end = bisect.bisect_left(timestamps, until) if until is not None else len(timestamps)
+            return self._page(range(start, min(end, start + limit)), with_text)
+
+    def _page(self, positions, with_text):
+        notes = []
+        for position in positions:
+            note = self._describe(position)
+            if with_text:
+                note["text"] = self._read(position)
+            notes.append(note)
+        return notes
+
+    def count(self):
+        """Get the number of stored notes."""
+        self._ensure_loaded()
+        return len(self._offsets)
+
+    def import_directory(self, directory):
+        """
+        Import note_*.txt files written by earlier versions, oldest first.
+
+        The files are left in place; the import runs once per store.
+
+        Args:
+            directory (str or Path): Directory holding the note files
+
+        Returns:
+            int: The number of notes imported
+        """
+        files = []
+        for path in Path(directory).glob("note_*.txt"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+
+        notes = []
+        for mtime, path in sorted(files):
+            try:
+                notes.append((path.read_text(encoding="utf-8", errors="replace"), mtime))
+            except OSError as e:
+                logger.error(f"Could not import note {path}: {str(e)}")
+
+        imported = len(self._append(notes)) if notes else 0
+        (self.directory / IMPORT_MARKER).touch()
+        if imported:
+            logger.info(f"Imported {imported} notes from {directory}")
+        return imported
+
+    def close(self):
+        """Close the data and index files."""
+        with self._lock:
+            for f in (self._data, self._index):
+                if f:
+                    f.close()
+            self._loaded = False
+
+# Shared store used by the note-taking commands
+notes_store = NotesStore(NOTES_DIR)
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import tempfile
+
+    store = NotesStore(tempfile.mkdtemp())
+    base = time.time() - 50000
+    for i in range(50000):
+        path = store.directory / f"note_{i}.txt"
+        path.write_text(f"Note number {i}")
+        os.utime(path, (base + i, base + i))
+    start = time.perf_counter()
+    print(f"Imported {store.count()} notes in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    store.add("A brand new note")
+    print(f"Added a note in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    start = time.perf_counter()
+    recent = store.recent(5, with_text=True)
+    print(f"Recent in {(time.perf_counter() - start) * 1e6:.0f}us: {[note['text'] for note in recent]}")
+
+    start = time.perf_counter()
+    notes = store.range(since=base + 1000, until=base + 1003, with_text=True)
+    print(f"Range in {(time.perf_counter() - start) * 1e6:.0f}us: {[note['text'] for note in notes]}")
+
+    print(store.get(42))
+    store.close()
+
+    start = time.perf_counter()
+    reopened = NotesStore(store.directory)
+    print(f"Reopened with {reopened.count()} notes in {(time.perf_counter() - start) * 1000:.1f}ms")
@@ -1,12 +1,13 @@
-import subprocess
 import platform
 import os
+import shlex
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('OpenApps')
 
+from app_index import app_index
+from launcher import app_launcher
+
 # Dictionary mapping common app names to their executable paths or commands
 # These will need to be customized based on the user's system
 WINDOWS_APPS = {
@@ -87,21 +88,83 @@ def get_app_command(app_name):
     elif system == "Darwin":  # macOS
         if app_name in MAC_APPS:
             return MAC_APPS[app_name]
+        # Look for a close match among the installed applications
+        match = app_index.lookup(app_name)
+        if match:
+            return shlex.join(match["argv"])
         # Try to open by name if not in predefined list
         return f"open -a '{app_name}'"
         
     elif system == "Linux":
         if app_name in LINUX_APPS:
             return LINUX_APPS[app_name]
+        # Look for a close match among the installed applications
+        match = app_index.lookup(app_name)
+        if match:
+            return shlex.join(match["argv"])
         # Try to open by name if not in predefined list
         return app_name
     
     return None
 
+def get_app_argv(app_name):
+    """
+    Get the argument list that opens an application, for running without a shell.
+    
+    Args:
+        app_name (str): The name of the application to open
+        
+    Returns:
+        list or None: Program and arguments, or None if the OS is unsupported
+    """
+    app_name = app_name.lower()
+    
+    system = platform.system()
+    
+    if system == "Windows":
+        # Explorer opens programs, URLs and protocol links the way "start"
+        # does, but without cmd.exe parsing & | ^ in the spoken name
+        if app_name in WINDOWS_APPS:
+            return ["explorer.exe", os.path.expandvars(WINDOWS_APPS[app_name])]
+        
+    elif system == "Darwin":  # macOS
+        if app_name in MAC_APPS:
+            return shlex.split(MAC_APPS[app_name])
+        
+    elif system == "Linux":
+        if app_name in LINUX_APPS:
+            return shlex.split(LINUX_APPS[app_name])
+    
+    else:
+        return None
+    
+    # Look for a close match ("calc", "files app") among the installed
+    # applications and the names above
+    match = app_index.lookup(app_name)
+    if match:
+        logger.info(f"Resolved {app_name!r} to {match['name']!r} (score {match['score']})")
+        return match["argv"]
+    
+    # Try to open by name if nothing matched
+    if system == "Windows":
+        return ["explorer.exe", app_name]
+    elif system == "Darwin":
+        return ["open", "-a", app_name]
+    return [app_name]
+
+# Make the predefined names for this platform fuzzy-matchable too
+app_index.add_aliases({
+    name: get_app_argv(name)
+    for name in {"Windows": WINDOWS_APPS, "Darwin": MAC_APPS, "Linux": LINUX_APPS}.get(platform.system(), {})
+})
+
 def open_app(app_name):
     """
     Open an application using the appropriate command for the current operating system.
     
+    The application is started as a detached process; this returns as soon as
+    it has been spawned rather than when it exits.
+    
     Args:
         app_name (str): The name of the application to open
         
@@ -115,19 +178,17 @@ def open_app(app_name):
         app_name = app_name.lower().strip()
         
         # Get the command to open the application
-        command = get_app_command(app_name)
+        argv = get_app_argv(app_name)
         
-        if not command:
+        if not argv:
             logger.error(f"No command found for app: {app_name}")
             return False
         
-        logger.info(f"Executing command: {command}")
+        logger.info(f"Executing command: {argv}")
         
-        # Execute the command
-        if platform.system() == "Windows":
-            subprocess.Popen(command, shell=True)
-        else:
-            os.system(command)
+        record = app_launcher.launch(argv, name=app_name)
+        if record["status"] == "failed":
+            return False
             
         logger.info(f"Successfully opened: {app_name}")
         return True
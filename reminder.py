@@ -1,18 +1,28 @@
+import calendar
 import datetime
+import heapq
+import itertools
 import json
 import os
 import threading
 import time
 import platform
 import logging
+import re
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('Reminder')
 
 # File to store reminders
 REMINDERS_FILE = "reminders.json"
+# Append-only log of changes since the reminders file was last written
+REMINDERS_JOURNAL = "reminders.journal"
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Longest the scheduler sleeps before re-checking, so wall-clock jumps
+# (suspend, NTP corrections) are noticed
+MAX_SLEEP = 300
 
 def get_reminders_file_path():
     """Get the full path to the reminders file."""
@@ -43,15 +53,612 @@ def load_reminders():
 def save_reminders(reminders):
     """Save reminders to file."""
     reminders_file = get_reminders_file_path()
+    tmp_file = reminders_file.with_suffix(".tmp")
     
     try:
-        with open(reminders_file, 'w') as f:
+        with open(tmp_file, 'w') as f:
             json.dump(reminders, f, indent=2)
+        os.replace(tmp_file, reminders_file)
         return True
     except Exception as e:
         logger.error(f"Error saving reminders: {str(e)}")
         return False
 
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "tenth": 10,
+    "fifteenth": 15, "twentieth": 20, "last": -1
+}
+
+# Upper bound on candidate steps when searching for the next occurrence
+MAX_RECURRENCE_STEPS = 2000
+
+def _parse_stamp(value):
+    return datetime.datetime.strptime(value, TIME_FORMAT)
+
+def next_occurrence(rule, after):
+    """
+    Compute the first occurrence of a recurrence rule strictly after a time.
+    
+    Only the one occurrence is computed; future instances are never
+    materialized. End conditions ("until", "count") are applied by the caller.
+    
+    Args:
+        rule (dict): Recurrence rule with "freq", "start" and optional
+            "interval", "days" (weekday numbers) and "monthday" (-1 for last)
+        after (datetime.datetime): Occurrences at or before this are skipped
+        
+    Returns:
+        datetime.datetime or None: The next occurrence, or None if there is none
+    """
+    start = _parse_stamp(rule["start"])
+    interval = max(1, int(rule.get("interval", 1)))
+    freq = rule["freq"]
+    if after < start:
+        after = start - datetime.timedelta(seconds=1)
+    
+    if freq in ("minutely", "hourly"):
+        step = datetime.timedelta(minutes=interval) if freq == "minutely" else datetime.timedelta(hours=interval)
+        steps = (after - start) // step + 1
+        return start + steps * step
+    
+    clock = start.time()
+    days = rule.get("days")
+    day = max(after.date(), start.date())
+    
+    if freq == "daily":
+        # Align to the interval, then walk forward over the allowed weekdays
+        misalignment = (day - start.date()).days % interval
+        if misalignment:
+            day += datetime.timedelta(days=interval - misalignment)
+        for _ in range(MAX_RECURRENCE_STEPS):
+            candidate = datetime.datetime.combine(day, clock)
+            if candidate > after and (not days or day.weekday() in days):
+                return candidate
+            day += datetime.timedelta(days=interval)
+        return None
+    
+    if freq == "weekly":
+        days = days or [start.weekday()]
+        first_week = start.date() - datetime.timedelta(days=start.weekday())
+        for _ in range(MAX_RECURRENCE_STEPS):
+            week = (day - first_week).days // 7
+            if week % interval == 0 and day.weekday() in days:
+                candidate = datetime.datetime.combine(day, clock)
+                if candidate > after:
+                    return candidate
+            day += datetime.timedelta(days=1)
+        return None
+    
+    if freq == "monthly":
+        monthday = rule.get("monthday", start.day)
+        year, month = day.year, day.month
+        for _ in range(MAX_RECURRENCE_STEPS):
+            months = (year - start.year) * 12 + (month - start.month)
+            if months % interval == 0:
+                last_day = calendar.monthrange(year, month)[1]
+                target = last_day if monthday == -1 else monthday
+                # Months without that day (e.g. the 31st) are skipped
+                if target <= last_day:
+                    candidate = datetime.datetime.combine(datetime.date(year, month, target), clock)
+                    if candidate > after:
+                        return candidate
+            month += 1
+            if month > 12:
+                year, month = year + 1, 1
+        return None
+    
+    raise ValueError(f"Unknown recurrence frequency: {freq}")
+
+def iter_occurrences(reminder, window_start, window_end):
+    """
+    Lazily generate a reminder's occurrences inside a time window.
+    
+    Args:
+        reminder (dict): Stored reminder, optionally with a "rule"
+        window_start (datetime.datetime): Start of the window (inclusive)
+        window_end (datetime.datetime): End of the window (exclusive)
+        
+    Yields:
+        datetime.datetime: Each occurrence in the window, in order
+    """
+    occurrence = _parse_stamp(reminder["time"])
+    rule = reminder.get("rule")
+    done = reminder.get("done", 0)
+    
+    while occurrence is not None and occurrence < window_end:
+        if rule and not _within_limits(rule, occurrence, done):
+            return
+        if occurrence >= window_start:
+            yield occurrence
+        if not rule:
+            return
+        occurrence = next_occurrence(rule, occurrence)
+        done += 1
+
+def _within_limits(rule, occurrence, done):
+    if rule.get("count") and done >= rule["count"]:
+        return False
+    if rule.get("until") and occurrence > _parse_stamp(rule["until"]):
+        return False
+    return True
+
+def _parse_clock(text):
+    """Parse "9", "9am", "9:30 pm", "15:00", "noon" or "midnight" into (hour, minute)."""
+    if re.match(r"\s*(?:noon|midday)\b", text):
+        return 12, 0
+    if re.match(r"\s*midnight\b", text):
+        return 0, 0
+    match = re.search(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b", text)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem == "pm" and hour != 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute
+
+def parse_recurrence(time_str, now=None):
+    """
+    Parse a spoken recurrence such as "every weekday at 9am", "every 2 hours",
+    "every other Friday at noon" or "on the first of each month".
+    
+    Args:
+        time_str (str): The "when" part of a reminder request
+        now (datetime.datetime): Reference time (default: now)
+        
+    Returns:
+        dict or None: A compact recurrence rule, or None if the text doesn't
+        describe a recurrence
+        
+    Raises:
+        ValueError: If the text asks for a recurrence that can't be parsed,
+            rather than scheduling it on a guessed default
+    """
+    text = time_str.lower()
+    now = (now or datetime.datetime.now()).replace(microsecond=0)
+    rule = None
+    
+    # "every 3 days", "every 2 weeks on Monday", "every other Friday"
+    interval = None
+    match = re.search(r"\bevery\s+(\d+|other)\b", text)
+    if match:
+        interval = 2 if match.group(1) == "other" else int(match.group(1))
+        if interval < 1:
+            raise ValueError(f"Can't repeat every {interval}: {time_str}")
+    every_unit = r"\b(?:every|each)\s+(?:(?:\d+|other)\s+)?"
+    
+    match = re.search(every_unit + r"(minute|hour)s?\b", text)
+    if match:
+        rule = {"freq": "minutely" if match.group(1) == "minute" else "hourly", "start": now.strftime(TIME_FORMAT)}
+    
+    elif re.search(r"\b(?:every|each)\s+weekday\b|\bweekdays\b", text):
+        rule = {"freq": "daily", "days": [0, 1, 2, 3, 4]}
+    
+    elif re.search(r"\b(?:every|each)\s+weekend\b|\bweekends\b", text):
+        rule = {"freq": "daily", "days": [5, 6]}
+    
+    elif re.search(every_unit + r"days?\b|\bdaily\b|\bevery (?:morning|evening|night)\b", text):
+        rule = {"freq": "daily"}
+    
+    elif re.search(r"\b(?:months?|monthly)\b", text):
+        match = re.search(r"\b(?:the\s+)?(\d{1,2})(?:st|nd|rd|th)\b|\bthe\s+(" + "|".join(ORDINALS) + r")\b", text)
+        monthday = now.day
+        if match:
+            monthday = int(match.group(1)) if match.group(1) else ORDINALS[match.group(2)]
+        if not (1 <= monthday <= 31 or monthday == -1):
+            raise ValueError(f"No such day of the month: {time_str}")
+        rule = {"freq": "monthly", "monthday": monthday}
+    
+    else:
+        days = [index for index, name in enumerate(WEEKDAYS) if re.search(rf"\b{name}s?\b", text)]
+        weekly = re.search(every_unit + r"weeks?\b|\bweekly\b", text)
+        if weekly or (days and re.search(r"\b(?:every|each)\b|\b\w+days\b", text)):
+            # "Every week" with no day named repeats on today's weekday
+            rule = {"freq": "weekly", "days": days or [now.weekday()]}
+    
+    if rule is None:
+        if re.search(r"\b(?:every|each|daily|weekly|monthly)\b", text):
+            raise ValueError(f"Can't understand how often to repeat: {time_str}")
+        return None
+    if interval:
+        rule["interval"] = interval
+    
+    if "start" not in rule:
+        clock = (9, 0)
+        at_match = re.search(r"\bat\s+(.+)", text)
+        if at_match:
+            clock = _parse_clock(at_match.group(1))
+            if clock is None:
+                raise ValueError(f"Can't understand the time: {at_match.group(1)}")
+        hour, minute = clock
+        rule["start"] = now.replace(hour=hour, minute=minute, second=0).strftime(TIME_FORMAT)
+        # "Every other Friday" counts from the first Friday, not from today
+        if rule.get("interval", 1) > 1:
+            first = next_occurrence(dict(rule, interval=1), now)
+            rule["start"] = first.strftime(TIME_FORMAT)
+    
+    match = re.search(r"\buntil\s+(\d{4}-\d{2}-\d{2})\b", text)
+    if match:
+        rule["until"] = f"{match.group(1)} 23:59:59"
+    match = re.search(r"\b(\d+)\s+times\b", text)
+    if match:
+        rule["count"] = int(match.group(1))
+    
+    return rule
+
+def describe_rule(rule):
+    """Describe a recurrence rule in a few words for spoken responses."""
+    interval = rule.get("interval", 1)
+    clock = _parse_stamp(rule["start"]).strftime("%I:%M %p").lstrip("0")
+    freq = rule["freq"]
+    if freq in ("minutely", "hourly"):
+        unit = "minute" if freq == "minutely" else "hour"
+        return f"every {unit}" if interval == 1 else f"every {interval} {unit}s"
+    if freq == "daily":
+        if rule.get("days") == [0, 1, 2, 3, 4]:
+            return f"every weekday at {clock}"
+        if rule.get("days") == [5, 6]:
+            return f"every weekend day at {clock}"
+        return f"every day at {clock}" if interval == 1 else f"every {interval} days at {clock}"
+    if freq == "weekly":
+        names = " and ".join(WEEKDAYS[day].capitalize() for day in rule["days"])
+        prefix = "every" if interval == 1 else "every other" if interval == 2 else f"every {interval} weeks on"
+        return f"{prefix} {names} at {clock}"
+    monthday = rule.get("monthday")
+    day = "the last day" if monthday == -1 else f"day {monthday}"
+    months = "every month" if interval == 1 else f"every {interval} months"
+    return f"on {day} of {months} at {clock}"
+
+class ReminderScheduler:
+    """
+    In-memory min-heap of pending reminders ordered by due time.
+    
+    Reminders are loaded from disk once. The scheduler thread sleeps on a
+    condition variable until the earliest reminder is due or a new one is
+    added, so reminders fire on time without polling. Adding, cancelling and
+    firing are O(log n); each change is appended to a journal instead of
+    rewriting the reminders file, and the journal is folded back into the
+    file once it grows.
+    
+    Recurring reminders keep a compact rule and only their next occurrence;
+    after firing, the next one is computed and pushed back onto the heap.
+    """
+    
+    def __init__(self):
+        self._heap = []
+        self._reminders = {}
+        # id -> due timestamp of the live heap entry; other entries are stale
+        self._due = {}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._journal = None
+        self._journal_entries = 0
+        self._loaded = False
+        self._stopped = False
+        self._thread = None
+    
+    # Persistence
+    
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        
+        reminders = {}
+        legacy = []
+        for reminder in load_reminders():
+            if isinstance(reminder.get("id"), int):
+                reminders[reminder["id"]] = reminder
+            else:
+                legacy.append(reminder)
+        
+        journal_path = get_reminders_file_path().with_name(REMINDERS_JOURNAL)
+        if journal_path.exists():
+            with open(journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if change["op"] in ("add", "update"):
+                        reminders[change["reminder"]["id"]] = change["reminder"]
+                    else:
+                        reminders.pop(change["id"], None)
+        
+        # Reminders written before ids existed get one now
+        self._ids = itertools.count(max(reminders, default=0) + 1)
+        for reminder in legacy:
+            reminder["id"] = next(self._ids)
+            reminders[reminder["id"]] = reminder
+        
+        for reminder in reminders.values():
+            try:
+                self._schedule(reminder, _parse_stamp(reminder["time"]))
+            except (KeyError, ValueError):
+                logger.error(f"Skipping malformed reminder: {reminder}")
+        
+        heapq.heapify(self._heap)
+        self._compact()
+        logger.info(f"Loaded {len(self._reminders)} pending reminders")
+    
+    def _compact(self):
+        # Write the full set once and start an empty journal
+        save_reminders(sorted(self._reminders.values(), key=lambda r: r["time"]))
+        if self._journal:
+            self._journal.close()
+        journal_path = get_reminders_file_path().with_name(REMINDERS_JOURNAL)
+        self._journal = open(journal_path, 'w')
+        self._journal_entries = 0
+        
+        # Drop stale heap entries left by cancels and reschedules
+        if len(self._heap) > 2 * len(self._due):
+            self._heap = [(due, rid) for due, rid in self._heap if self._due.get(rid) == due]
+            heapq.heapify(self._heap)
+    
+    def _record(self, change):
+        try:
+            self._journal.write(json.dumps(change) + "\n")
+            self._journal.flush()
+            self._journal_entries += 1
+            if self._journal_entries > max(100, 2 * len(self._reminders)):
+                self._compact()
+        except Exception as e:
+            logger.error(f"Error recording reminder change: {str(e)}")
+    
+    # Operations
+    
+    def _schedule(self, reminder, when):
+        reminder["time"] = when.strftime(TIME_FORMAT)
+        due = when.timestamp()
+        self._reminders[reminder["id"]] = reminder
+        self._due[reminder["id"]] = due
+        heapq.heappush(self._heap, (due, reminder["id"]))
+        # Wake the scheduler if this is now the earliest reminder
+        if self._heap[0] == (due, reminder["id"]):
+            self._cond.notify()
+    
+    def _unschedule(self, reminder_id):
+        self._due.pop(reminder_id, None)
+        return self._reminders.pop(reminder_id, None)
+    
+    def add(self, reminder_time, message, rule=None):
+        """
+        Schedule a reminder.
+        
+        Args:
+            reminder_time (datetime.datetime): When the reminder (or its first
+                occurrence) is due
+            message (str): What to remind the user about
+            rule (dict): Optional recurrence rule from parse_recurrence
+            
+        Returns:
+            dict: The stored reminder
+        """
+        with self._cond:
+            self._load()
+            reminder = {"id": next(self._ids), "message": message}
+            if rule:
+                reminder["rule"] = rule
+                reminder["done"] = 0
+            self._schedule(reminder, reminder_time)
+            self._record({"op": "add", "reminder": reminder})
+            return reminder
+    
+    def cancel(self, reminder_id):
+        """
+        Cancel a pending reminder, including all future occurrences.
+        
+        Args:
+            reminder_id (int): The id returned when it was added
+            
+        Returns:
+            bool: True if the reminder was pending
+        """
+        with self._cond:
+            self._load()
+            if self._unschedule(reminder_id) is None:
+                return False
+            # The heap entry is dropped lazily when it reaches the top
+            self._record({"op": "remove", "id": reminder_id})
+            return True
+    
+    def _advance(self, reminder, after):
+        # Move a reminder past its current occurrence; False when it has ended
+        rule = reminder.get("rule")
+        if not rule:
+            self._unschedule(reminder["id"])
+            self._record({"op": "remove", "id": reminder["id"]})
+            return False
+        
+        reminder["done"] = reminder.get("done", 0) + 1
+        occurrence = next_occurrence(rule, _parse_stamp(reminder["time"]))
+        if rule.get("count"):
+            # Occurrences missed while the machine was off still use up the count
+            while occurrence is not None and occurrence <= after and reminder["done"] < rule["count"]:
+                reminder["done"] += 1
+                occurrence = next_occurrence(rule, occurrence)
+        if occurrence is not None and occurrence <= after:
+            occurrence = next_occurrence(rule, after)
+        if occurrence is None or not _within_limits(rule, occurrence, reminder["done"]):
+            self._unschedule(reminder["id"])
+            self._record({"op": "remove", "id": reminder["id"]})
+            return False
+        
+        self._schedule(reminder, occurrence)
+        self._record({"op": "update", "reminder": reminder})
+        return True
+    
+    def skip(self, reminder_id):
+        """
+        Skip the next occurrence of a reminder.
+        
+        One-shot reminders are cancelled; recurring ones move to the
+        following occurrence.
+        
+        Args:
+            reminder_id (int): The id of the reminder
+            
+        Returns:
+            dict or None: The updated reminder; for one that has ended, its
+            last state with "ended" set and no time. None if there is no
+            such reminder.
+        """
+        with self._cond:
+            self._load()
+            reminder = self._reminders.get(reminder_id)
+            if reminder is None:
+                return None
+            if self._advance(reminder, _parse_stamp(reminder["time"])):
+                return reminder
+            return dict(reminder, time=None, ended=True)
+    
+    def snooze(self, reminder_id, minutes=10):
+        """
+        Push the next occurrence of a reminder back.
+        
+        A recurring reminder keeps its schedule: the snoozed occurrence
+        becomes a one-shot reminder and the series moves on.
+        
+        Args:
+            reminder_id (int): The id of the reminder
+            minutes (int): How long to snooze for
+            
+        Returns:
+            dict or None: The reminder that will fire after the snooze
+        """
+        with self._cond:
+            self._load()
+            reminder = self._reminders.get(reminder_id)
+            if reminder is None:
+                return None
+            
+            when = max(datetime.datetime.now(), _parse_stamp(reminder["time"])) + datetime.timedelta(minutes=minutes)
+            if not reminder.get("rule"):
+                self._schedule(reminder, when)
+                self._record({"op": "update", "reminder": reminder})
+                return reminder
+            
+            snoozed = {"id": next(self._ids), "message": reminder["message"]}
+            self._schedule(snoozed, when)
+            self._record({"op": "add", "reminder": snoozed})
+            self._advance(reminder, _parse_stamp(reminder["time"]))
+            return snoozed
+    
+    def pending(self, limit=None):
+        """
+        List pending reminders, soonest first.
+        
+        Args:
+            limit (int): Maximum number of reminders to return
+            
+        Returns:
+            list: Reminder dicts
+        """
+        with self._cond:
+            self._load()
+            live = [(due, rid) for rid, due in self._due.items()]
+            entries = heapq.nsmallest(limit, live) if limit else sorted(live)
+            return [self._reminders[rid] for _, rid in entries]
+    
+    def upcoming(self, window_start, window_end, limit=None):
+        """
+        List occurrences in a time window, expanding recurrences lazily.
+        
+        Args:
+            window_start (datetime.datetime): Start of the window (inclusive)
+            window_end (datetime.datetime): End of the window (exclusive)
+            limit (int): Maximum number of occurrences to return
+            
+        Returns:
+            list: Dicts with the reminder id, message and occurrence time
+        """
+        with self._cond:
+            self._load()
+            reminders = [dict(r) for r in self._reminders.values()]
+        
+        def tagged(reminder):
+            for occurrence in iter_occurrences(reminder, window_start, window_end):
+                yield occurrence, reminder
+        
+        merged = heapq.merge(*(tagged(reminder) for reminder in reminders), key=lambda item: item[0])
+        return [
+            {
+                "id": reminder["id"],
+                "message": reminder["message"],
+                "time": occurrence.strftime(TIME_FORMAT),
+                "recurring": "rule" in reminder
+            }
+            for occurrence, reminder in itertools.islice(merged, limit)
+        ]
+    
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, reminder_id = heapq.heappop(self._heap)
+            if self._due.get(reminder_id) != due_at:
+                continue
+            reminder = self._reminders[reminder_id]
+            due.append(dict(reminder))
+            # Recurring reminders that missed several occurrences (e.g. while
+            # the machine was off) fire once and resume from now; the missed
+            # ones still count toward the rule's "count"
+            self._advance(reminder, max(_parse_stamp(reminder["time"]), datetime.datetime.fromtimestamp(now)))
+        return due
+    
+    def fire_due(self):
+        """Notify the user about every reminder that is due now."""
+        with self._cond:
+            self._load()
+            due = self._pop_due(time.time())
+        for reminder in due:
+            notify_user(reminder["message"])
+    
+    def run(self):
+        """Scheduler loop: sleep until the next deadline, then fire."""
+        while True:
+            with self._cond:
+                self._load()
+                while not self._stopped:
+                    now = time.time()
+                    while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                        heapq.heappop(self._heap)
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = min(self._heap[0][0] - now, MAX_SLEEP) if self._heap else MAX_SLEEP
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                due = self._pop_due(time.time())
+            
+            # Notify outside the lock so slow notifiers don't block adds
+            for reminder in due:
+                notify_user(reminder["message"])
+    
+    def start(self):
+        """Start the scheduler thread if it isn't running yet."""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._stopped = False
+            self._thread = threading.Thread(target=self.run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+            return True
+    
+    def stop(self):
+        """Stop the scheduler thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+# Shared scheduler for the process
+scheduler = ReminderScheduler()
+
 def parse_time(time_str):
     """
     Parse a time string into a datetime object.
@@ -147,47 +754,112 @@ def add_reminder(time_str, message):
         if reminder_time < datetime.datetime.now():
             reminder_time = reminder_time + datetime.timedelta(days=1)
         
-        # Load existing reminders
-        reminders = load_reminders()
+        scheduler.add(reminder_time, message)
+        return True
         
-        # Add new reminder
-        reminder = {
-            "time": reminder_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "message": message
-        }
+    except Exception as e:
+        logger.error(f"Error adding reminder: {str(e)}")
+        return False
+
+def add_recurring_reminder(time_str, message):
+    """
+    Add a recurring reminder such as "every weekday at 9am".
+    
+    Args:
+        time_str (str): The recurrence, as accepted by parse_recurrence
+        message (str): What to remind the user about
         
-        reminders.append(reminder)
+    Returns:
+        dict or None: The stored reminder, or None if time_str isn't a recurrence
         
-        # Save updated reminders
-        return save_reminders(reminders)
+    Raises:
+        ValueError: If time_str asks for a recurrence that can't be parsed,
+            or one with no future occurrences
+    """
+    rule = parse_recurrence(time_str)
+    if not rule:
+        return None
+    
+    first = next_occurrence(rule, datetime.datetime.now())
+    if first is None or not _within_limits(rule, first, 0):
+        raise ValueError(f"Recurrence has no future occurrences: {time_str}")
+    
+    try:
+        return scheduler.add(first, message, rule=rule)
         
     except Exception as e:
-        logger.error(f"Error adding reminder: {str(e)}")
-        return False
+        logger.error(f"Error adding recurring reminder: {str(e)}")
+        return None
+
+def cancel_reminder(reminder_id):
+    """
+    Cancel a pending reminder.
+    
+    Args:
+        reminder_id (int): The id of the reminder
+        
+    Returns:
+        bool: True if the reminder was cancelled, False if it wasn't pending
+    """
+    return scheduler.cancel(reminder_id)
+
+def list_reminders(limit=None):
+    """
+    List pending reminders, soonest first.
+    
+    Args:
+        limit (int): Maximum number of reminders to return
+        
+    Returns:
+        list: Reminder dicts with id, time and message
+    """
+    return scheduler.pending(limit)
+
+def upcoming_reminders(days=7, limit=100, start=None):
+    """
+    List reminder occurrences in a window, expanding recurrences lazily.
+    
+    Args:
+        days (float): Length of the window in days
+        limit (int): Maximum number of occurrences to return
+        start (datetime.datetime): Start of the window (default: now)
+        
+    Returns:
+        list: Occurrence dicts with id, message, time and recurring flag
+    """
+    start = start or datetime.datetime.now()
+    return scheduler.upcoming(start, start + datetime.timedelta(days=days), limit)
+
+def skip_reminder(reminder_id):
+    """
+    Skip the next occurrence of a reminder.
+    
+    Args:
+        reminder_id (int): The id of the reminder
+        
+    Returns:
+        dict or None: The reminder with its new next occurrence (or with
+        "ended" set if that was its last), or None if there is no such reminder
+    """
+    return scheduler.skip(reminder_id)
+
+def snooze_reminder(reminder_id, minutes=10):
+    """
+    Snooze the next occurrence of a reminder.
+    
+    Args:
+        reminder_id (int): The id of the reminder
+        minutes (int): How long to snooze for
+        
+    Returns:
+        dict or None: The reminder that will fire after the snooze
+    """
+    return scheduler.snooze(reminder_id, minutes)
 
 def check_reminders():
     """Check for due reminders and notify the user."""
     try:
-        reminders = load_reminders()
-        now = datetime.datetime.now()
-        updated = False
-        
-        # Check each reminder
-        remaining_reminders = []
-        for reminder in reminders:
-            reminder_time = datetime.datetime.strptime(reminder["time"], "%Y-%m-%d %H:%M:%S")
-            
-            # If reminder is due, notify the user
-            if reminder_time <= now:
-                notify_user(reminder["message"])
-                updated = True
-            else:
-                remaining_reminders.append(reminder)
-        
-        # Save updated reminders if any were removed
-        if updated:
-            save_reminders(remaining_reminders)
-            
+        scheduler.fire_due()
     except Exception as e:
         logger.error(f"Error checking reminders: {str(e)}")
 
@@ -219,16 +891,13 @@ def notify_user(message):
         logger.error(f"Error displaying notification: {str(e)}")
 
 def reminder_checker_thread():
-    """Background thread to periodically check for due reminders."""
-    while True:
-        check_reminders()
-        time.sleep(60)  # Check every minute
+    """Background thread that fires reminders as they come due."""
+    scheduler.run()
 
 def start_reminder_checker():
     """Start the background thread to check for reminders."""
-    thread = threading.Thread(target=reminder_checker_thread, daemon=True)
-    thread.start()
-    logger.info("Reminder checker thread started")
+    if scheduler.start():
+        logger.info("Reminder checker thread started")
 
 def set_reminder_voice():
     """
@@ -252,6 +921,20 @@ def set_reminder_with_details(time_str, message):
     Returns:
         dict: Response indicating success or failure
     """
+    try:
+        recurring = add_recurring_reminder(time_str, message)
+    except ValueError as e:
+        logger.error(f"Could not parse recurrence: {e}")
+        return {
+            "response": "I'm sorry, I couldn't work out when to repeat that reminder. "
+                        "Try something like \"every Monday at 9am\" or \"every 2 weeks on Friday at noon\"."
+        }
+    if recurring:
+        return {
+            "response": f"I'll remind you {describe_rule(recurring['rule'])} about: {message}",
+            "reminder": recurring
+        }
+    
     success = add_reminder(time_str, message)
     
     if success:
@@ -267,9 +950,6 @@ def set_reminder_with_details(time_str, message):
             "response": "I'm sorry, I couldn't set that reminder. Please try again with a different time format."
         }
 
-# Start the reminder checker when the module is imported
-start_reminder_checker()
-
 # If run directly, test the module
 if __name__ == "__main__":
     print("Testing reminder system...")
@@ -0,0 +1,269 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger('ResponseCache')
+
+# File to persist warm cache entries
+CACHE_FILE = "response_cache.json"
+
+# Cache limits; override through the environment when deploying
+CACHE_MAX_ENTRIES = int(os.environ.get("SAVIN_CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.environ.get("SAVIN_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+CACHE_TTL = float(os.environ.get("SAVIN_CACHE_TTL", str(24 * 60 * 60)))
+CACHE_SAVE_DELAY = 30.0
+
+# Queries whose answer depends on the moment they are asked
+DEFAULT_UNCACHEABLE_PATTERNS = [
+    r"\b(?:now|today|tonight|tomorrow|yesterday|current(?:ly)?|latest|recent)\b",
+    r"\b(?:time|date|weather|news|score)\b",
+    r"\bmy\b",
+]
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+def get_cache_file_path():
+    """Get the full path to the response cache file."""
+    savin_dir = Path.home() / ".savin"
+
+    # Create directory if it doesn't exist
+    if not savin_dir.exists():
+        savin_dir.mkdir(exist_ok=True)
+
+    return savin_dir / CACHE_FILE
+
+def normalize_query(query):
+    """
+    Normalize a query so trivially different phrasings share a cache entry.
+
+    Args:
+        query (str): The user's query
+
+    Returns:
+        str: The lowercased query without punctuation or repeated whitespace
+    """
+    query = _PUNCTUATION.sub(" ", query.lower())
+    return _WHITESPACE.sub(" ", query).strip()
+
+class ResponseCache:
+    """
+    Bounded LRU cache of LLM responses with a per-entry TTL.
+
+    Entries are evicted least-recently-used first once either the entry or the
+    byte budget is exceeded. The cache is saved to disk shortly after it
+    changes and at exit, and reloaded on startup.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL,
+                 path=None, uncacheable_patterns=DEFAULT_UNCACHEABLE_PATTERNS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+
+        # key -> (expires_at, response)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._save_timer = None
+
+        self._uncacheable = [re.compile(pattern) for pattern in uncacheable_patterns]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.path:
+            self.load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def make_key(query, model, system_prompt=None):
+        """
+        Build the cache key for a query.
+
+        Args:
+            query (str): The user's query
+            model (str): The model that answers it
+            system_prompt (str): The system prompt sent with it
+
+        Returns:
+            str: A hex digest identifying the request
+        """
+        raw = "\0".join([model, system_prompt or "", normalize_query(query)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def mark_uncacheable(self, pattern):
+        """
+        Never cache queries matching a regular expression.
+
+        Args:
+            pattern (str): Pattern searched for in the normalized query
+        """
+        with self._lock:
+            self._uncacheable.append(re.compile(pattern))
+
+    def is_cacheable(self, query):
+        """Check whether a query may be answered from the cache."""
+        normalized = normalize_query(query)
+        return bool(normalized) and not any(p.search(normalized) for p in self._uncacheable)
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            str or None: The cached response, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, response = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response, ttl=None):
+        """
+        Store a response, evicting least-recently-used entries to stay in bounds.
+
+        Args:
+            key (str): Key from make_key
+            response (str): The response to cache
+            ttl (float): Lifetime in seconds (default: the cache TTL)
+        """
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + (ttl or self.ttl), response)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+            self._schedule_save()
+
+    def _remove(self, key):
+        _, response = self._entries.pop(key)
+        self._bytes -= len(response.encode("utf-8"))
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._schedule_save()
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Entry count, size in bytes and hit/miss/eviction counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _schedule_save(self):
+        # Coalesce bursts of writes into a single save in the background
+        if self.path and self._save_timer is None:
+            self._save_timer = threading.Timer(CACHE_SAVE_DELAY, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def load(self):
+        """Load unexpired entries from the cache file."""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Could not load response cache: {e}. Starting with an empty cache.")
+            return
+
+        now = time.time()
+        with self._lock:
+            # Entries are stored oldest first, so insertion order restores recency
+            for key, expires_at, response in stored:
+                if expires_at > now:
+                    self._entries[key] = (expires_at, response)
+                    self._bytes += len(response.encode("utf-8"))
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+        logger.info(f"Loaded {len(self._entries)} cached responses")
+
+    def save(self):
+        """Write the cache to disk atomically."""
+        if not self.path:
+            return
+
+        with self._lock:
+            self._save_timer = None
+            stored = [[key, expires_at, response] for key, (expires_at, response) in self._entries.items()]
+
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(stored, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving response cache: {str(e)}")
+
+# Shared cache used by the chat module
+response_cache = ResponseCache(path=get_cache_file_path())
+
+# If run directly, test the module
+if __name__ == "__main__":
+    cache = ResponseCache(max_entries=2)
+
+    key = cache.make_key("Tell me a joke!", "mistral")
+    print(f"Cacheable: {cache.is_cacheable('Tell me a joke!')}")
+    print(f"Cacheable: {cache.is_cacheable('What time is it now?')}")
+
+    cache.put(key, "Why did the chicken cross the road?")
+    start = time.perf_counter()
+    response = cache.get(cache.make_key("tell me a joke", "mistral"))
+    print(f"Hit in {(time.perf_counter() - start) * 1e6:.1f}us: {response}")
+
+    cache.put(cache.make_key("a", "mistral"), "A")
+    cache.put(cache.make_key("b", "mistral"), "B")
+    print(f"Stats: {cache.stats()}")
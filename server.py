@@ -0,0 +1,497 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+
+from log_setup import configure_logging, new_request_id, request_id_var
+
+configure_logging()
+logger = logging.getLogger('SavinServer')
+
+from app import app as flask_app, handle_direct_command, sse_event
+from chat import (LLM_DEADLINE, AsyncOllamaClient, OllamaDeadlineError, async_stream_chat_text, cached_chat_response,
+                  error_message)
+from intents import route
+from lifecycle import lifecycle
+from metrics import stage, track_request
+from speculation import speculations
+from VoiceAssistant_main import answered, builtin_response, fallback_response
+
+HOST = os.environ.get("SAVIN_HOST", "127.0.0.1")
+PORT = int(os.environ.get("SAVIN_PORT", "5000"))
+
+# Generations running against Ollama at once, and how many more may wait
+MAX_ACTIVE_GENERATIONS = int(os.environ.get("SAVIN_MAX_ACTIVE_GENERATIONS", os.environ.get("SAVIN_OLLAMA_MAX_CONCURRENT", "4")))
+MAX_QUEUED_GENERATIONS = int(os.environ.get("SAVIN_MAX_QUEUED_GENERATIONS", "256"))
+RETRY_AFTER_SECONDS = int(os.environ.get("SAVIN_RETRY_AFTER", "5"))
+MAX_BODY_BYTES = 64 * 1024
+
+# Intents that act on this machine and run in a worker thread
+DIRECT_INTENTS = {"open_app", "set_reminder", "take_note", "search_notes"}
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-headers", b"Content-Type"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+]
+
+class QueueFullError(Exception):
+    """Raised when the generation queue has no room for another request."""
+
+class AdmissionQueue:
+    """
+    Bounded admission control for LLM-bound requests.
+
+    Up to max_active generations run at once and up to max_queued more wait
+    as suspended coroutines; beyond that requests are refused immediately so
+    the server sheds load instead of piling it up.
+    """
+
+    def __init__(self, max_active=MAX_ACTIVE_GENERATIONS, max_queued=MAX_QUEUED_GENERATIONS):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self._slots = asyncio.Semaphore(max_active)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self._slots.locked() and self.waiting >= self.max_queued:
+            self.rejected += 1
+            raise QueueFullError()
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_active": self.max_active,
+            "max_queued": self.max_queued
+        }
+
+class ClientDisconnected(Exception):
+    """Raised when the client goes away before the request body arrives."""
+
+async def read_json(receive):
+    """Read and decode a JSON request body."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnected()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        more_body = message.get("more_body", False)
+    return json.loads(body or b"{}")
+
+def request_id_header():
+    return (b"x-request-id", request_id_var.get().encode())
+
+async def send_json(send, payload, status=200, headers=()):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                    request_id_header()] + CORS_HEADERS + list(headers)
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def send_busy(send):
+    await send_json(
+        send,
+        {'response': "I'm handling a lot of requests right now. Please try again in a moment.", 'status': 'busy'},
+        status=503,
+        headers=[(b"retry-after", str(RETRY_AFTER_SECONDS).encode())]
+    )
+
+class Generation:
+    """A generation running in its own task, feeding its chunks to a queue."""
+
+    __slots__ = ("task", "chunks", "admitted", "ready")
+
+    def __init__(self):
+        self.task = None
+        # Chunks, then None at the end or the exception that stopped it
+        self.chunks = asyncio.Queue()
+        # Whether it got past the admission queue
+        self.admitted = False
+        # Set once it holds a slot, or has stopped without one
+        self.ready = asyncio.Event()
+
+    def admit(self):
+        self.admitted = True
+        self.ready.set()
+
+class SavinASGI:
+    """
+    ASGI front end for production serving.
+
+    The LLM-bound routes are served natively on the event loop: Ollama is
+    awaited rather than blocking a thread, generations pass through a bounded
+    admission queue, and a full queue answers 503 with Retry-After. A
+    generation that has not produced its first token within LLM_DEADLINE of
+    getting a slot is answered from the cache or the rule-based
+    responses instead, and left to finish in the background. Every other
+    route is handed to the Flask app unchanged.
+    """
+
+    def __init__(self, wsgi_app):
+        from asgiref.wsgi import WsgiToAsgi
+        self.wsgi = WsgiToAsgi(wsgi_app)
+        self.ollama = AsyncOllamaClient()
+        self.admission = None
+        # Generations that missed their deadline, kept until they finish
+        self.background = set()
+        self.routes = {
+            "/api/process_command": self.process_command,
+            "/api/process_command/stream": self.process_command_stream,
+            "/api/simple_response": self.simple_response,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+
+        handler = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        if handler is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        # Each request runs in its own task, so this does not leak across requests
+        request_id = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        request_id_var.set(request_id or new_request_id())
+
+        if scope["method"] == "OPTIONS":
+            await send({"type": "http.response.start", "status": 204, "headers": CORS_HEADERS})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if scope["method"] != "POST":
+            await send_json(send, {'error': 'Method not allowed'}, status=405)
+            return
+
+        try:
+            data = await read_json(receive)
+        except ClientDisconnected:
+            return
+        except ValueError as e:
+            await send_json(send, {'error': f"Invalid request body: {e}"}, status=400)
+            return
+        if not isinstance(data, dict):
+            await send_json(send, {'error': "Invalid request body: expected a JSON object"}, status=400)
+            return
+        await handler(data.get('query', ''), data.get('session_id'), receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Background services run in this, the serving process, only
+                lifecycle.start()
+                admission = self.queue()
+                logger.info(f"Serving on http://{HOST}:{PORT} "
+                            f"({admission.max_active} active / {admission.max_queued} queued generations)")
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.to_thread(lifecycle.stop)
+                await self.ollama.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def queue(self):
+        # Created on first use so the semaphore belongs to the serving loop
+        if self.admission is None:
+            self.admission = AdmissionQueue()
+        return self.admission
+
+    async def answer(self, query, session_id, tracked):
+        """
+        Answer a query without the language model if possible.
+
+        Returns:
+            dict or None: The response payload, or None if it needs a generation
+        """
+        with stage("intent"):
+            match = route(query)
+        tracked.intent = match.intent
+        if match.intent in DIRECT_INTENTS:
+            # Opening apps and disk I/O stay off the event loop
+            result = await asyncio.to_thread(handle_direct_command, query, match)
+            return dict(result, source='action')
+
+        response = builtin_response(query, match)
+        if response is not None:
+            return answered(response, 'builtin')
+        response = cached_chat_response(query, session_id)
+        return answered(response, 'cache') if response is not None else None
+
+    async def process_command(self, query, session_id, receive, send):
+        if not query:
+            await send_json(send, {'response': "I couldn't hear you. Please try again."})
+            return
+        logger.info(f"Received query: {query}")
+
+        with track_request("process_command") as tracked:
+            try:
+                result = await self.answer(query, session_id, tracked)
+                if result is None:
+                    result = await self.generate(query, session_id)
+                await send_json(send, result)
+            except QueueFullError:
+                tracked.status = "busy"
+                await send_busy(send)
+            except Exception as e:
+                tracked.status = "error"
+                logger.error(f"Error processing command: {e}")
+                await send_json(send, {'response': "I encountered an error processing your request. Please try again."})
+
+    async def simple_response(self, query, session_id, receive, send):
+        if not query:
+            await send_json(send, {'response': "I couldn't understand that. Please try again."})
+            return
+
+        with track_request("simple_response") as tracked:
+            tracked.intent = "chat"
+            try:
+                response = cached_chat_response(query, session_id)
+                if response is not None:
+                    result = answered(response, 'cache')
+                else:
+                    result = await self.generate(query, session_id)
+                await send_json(send, result)
+            except QueueFullError:
+                tracked.status = "busy"
+                await send_busy(send)
+            except Exception as e:
+                tracked.status = "error"
+                logger.error(f"Error generating simple response: {e}")
+                await send_json(send, {'response': "I had trouble processing that. Could you try again?"})
+
+    def start_generation(self, query, session_id=None):
+        """
+        Start a generation in its own task, holding an admission slot.
+
+        A generation already started from the session's interim transcript
+        for the same query is relayed instead; it is running already, so it
+        skips the admission queue.
+
+        Returns:
+            Generation: The running generation
+        """
+        generation = Generation()
+        speculation = speculations.claim(session_id, query)
+
+        async def run():
+            try:
+                if speculation is not None:
+                    generation.admit()
+                    await self.relay_speculation(speculation, generation)
+                else:
+                    async with self.queue().slot():
+                        generation.admit()
+                        async for chunk in async_stream_chat_text(query, self.ollama, check_cache=False,
+                                                                  session_id=session_id):
+                            generation.chunks.put_nowait(chunk)
+                generation.chunks.put_nowait(None)
+            except Exception as e:
+                generation.chunks.put_nowait(e)
+            finally:
+                generation.ready.set()
+
+        generation.task = asyncio.ensure_future(run())
+        return generation
+
+    async def relay_speculation(self, speculation, generation):
+        # The speculation is read on a worker thread; chunks are handed back
+        # to the loop, and cancelling the task cancels the speculation
+        loop = asyncio.get_running_loop()
+        stopped = threading.Event()
+
+        def pump():
+            stream = speculation.follow()
+            for chunk in stream:
+                if stopped.is_set():
+                    stream.close()
+                    return
+                loop.call_soon_threadsafe(generation.chunks.put_nowait, chunk)
+
+        try:
+            await asyncio.to_thread(pump)
+        except asyncio.CancelledError:
+            stopped.set()
+            raise
+
+    async def follow_generation(self, generation, deadline=LLM_DEADLINE):
+        """
+        Relay the chunks of a generation started by start_generation.
+
+        The deadline starts once the generation holds an admission slot, so
+        time spent queued behind other generations does not count against it;
+        the queue itself is bounded by max_queued.
+
+        Raises:
+            OllamaDeadlineError: If no chunk arrived within the deadline. The
+                generation carries on in the background so its answer reaches
+                the cache.
+        """
+        task = generation.task
+        try:
+            await generation.ready.wait()
+            try:
+                item = await asyncio.wait_for(generation.chunks.get(), deadline)
+            except asyncio.TimeoutError:
+                if generation.admitted:
+                    self.background.add(task)
+                    task.add_done_callback(self.background.discard)
+                raise OllamaDeadlineError(f"No response within {deadline:g}s") from None
+            while item is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                item = await generation.chunks.get()
+        finally:
+            if task not in self.background:
+                task.cancel()
+
+    async def generate(self, query, session_id=None):
+        generation = self.start_generation(query, session_id)
+        try:
+            parts = [chunk async for chunk in self.follow_generation(generation)]
+        except QueueFullError:
+            raise
+        except Exception as e:
+            logger.warning(f"Answering without the language model: {e}")
+            return fallback_response(query)
+        if not parts:
+            return fallback_response(query)
+        return answered("".join(parts), 'llm')
+
+    async def process_command_stream(self, query, session_id, receive, send):
+        if not query:
+            text = "I couldn't hear you. Please try again."
+            await self.send_events(send, [sse_event({'text': text}), sse_event({'response': text}, event='done')])
+            return
+        logger.info(f"Received streaming query: {query}")
+
+        with track_request("process_command_stream") as tracked:
+            try:
+                result = await self.answer(query, session_id, tracked)
+            except Exception as e:
+                tracked.status = "error"
+                logger.error(f"Error streaming command: {e}")
+                result = {'response': "I encountered an error processing your request. Please try again."}
+            if result is not None:
+                await self.send_answer(send, result)
+                return
+
+            try:
+                await self.stream_generation(query, session_id, receive, send)
+            except QueueFullError:
+                tracked.status = "busy"
+                await send_busy(send)
+
+    async def stream_generation(self, query, session_id, receive, send):
+        stream = self.follow_generation(self.start_generation(query, session_id))
+        try:
+            first = await stream.__anext__()
+        except QueueFullError:
+            raise
+        except Exception as e:
+            if not isinstance(e, StopAsyncIteration):
+                logger.warning(f"Answering without the language model: {e}")
+            await self.send_answer(send, fallback_response(query))
+            return
+        await self.start_events(send)
+
+        async def relay():
+            parts = [first]
+            await send({"type": "http.response.body", "body": sse_event({'text': first}).encode(), "more_body": True})
+            try:
+                async for chunk in stream:
+                    parts.append(chunk)
+                    await send({"type": "http.response.body", "body": sse_event({'text': chunk}).encode(),
+                                "more_body": True})
+            except Exception as e:
+                # Part of the answer is already out; say what went wrong
+                logger.error(f"Error streaming command: {e}")
+                parts.append(error_message(e))
+                await send({"type": "http.response.body", "body": sse_event({'text': parts[-1]}).encode(),
+                            "more_body": True})
+            done = sse_event({'response': "".join(parts), 'source': 'llm'}, event='done').encode()
+            await send({"type": "http.response.body", "body": done})
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        # Stop generating as soon as the client hangs up; closing the
+        # upstream stream makes Ollama abandon the generation too
+        relay_task = asyncio.ensure_future(relay())
+        watch_task = asyncio.ensure_future(watch_disconnect())
+        done, _ = await asyncio.wait({relay_task, watch_task}, return_when=asyncio.FIRST_COMPLETED)
+        for task in (relay_task, watch_task):
+            if task not in done:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        await stream.aclose()
+        if relay_task in done and relay_task.exception():
+            logger.error(f"Error streaming command: {relay_task.exception()}")
+
+    async def start_events(self, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no"), request_id_header()] + CORS_HEADERS
+        })
+
+    async def send_events(self, send, events):
+        await self.start_events(send)
+        await send({"type": "http.response.body", "body": "".join(events).encode()})
+
+    async def send_answer(self, send, result):
+        text = result['response']
+        await self.send_events(send, [sse_event({'text': text}),
+                                      sse_event({'response': text, 'source': result.get('source')}, event='done')])
+
+# Production entry point: the Flask routes plus natively async LLM routes
+flask_app.debug = False
+asgi_app = SavinASGI(flask_app)
+
+def main():
+    """Serve the application with uvicorn: no reloader, no debugger."""
+    import uvicorn
+    uvicorn.run(
+        asgi_app,
+        host=HOST,
+        port=PORT,
+        reload=False,
+        workers=1,
+        log_level="info",
+        access_log=False,
+        backlog=2048,
+        timeout_keep_alive=30
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+
+logger = logging.getLogger('ChatSessions')
+
+# Tokens of conversation carried into the next turn. Leave room under the
+# model's context window (2048 for Ollama's default) for the new prompt and
+# reply.
+SESSION_MAX_TOKENS = int(os.environ.get("SAVIN_SESSION_MAX_TOKENS", "1536"))
+SESSION_IDLE_SECONDS = float(os.environ.get("SAVIN_SESSION_IDLE_SECONDS", str(30 * 60)))
+MAX_SESSIONS = int(os.environ.get("SAVIN_MAX_SESSIONS", "5000"))
+MAX_SESSION_ID_LENGTH = 64
+
+# What a turn needs to continue a conversation: the context to send (empty
+# for a new or reset conversation), whether the system prompt must be sent
+# again, the version the reply will be recorded against, and the model the
+# context belongs to
+SessionTurn = namedtuple("SessionTurn", ["session_id", "context", "send_system", "version", "model"])
+
+class _Session:
+    __slots__ = ("context", "turns", "system_turn", "version", "last_used", "model")
+
+    def __init__(self):
+        # Token ids as unsigned 32-bit ints: 4 bytes each instead of a
+        # pointer plus an int object per token in a list
+        self.context = array("I")
+        # Tokens contributed by each retained turn, oldest first
+        self.turns = array("I")
+        # Position in turns of the turn that carried the system prompt
+        self.system_turn = -1
+        self.version = 0
+        self.last_used = 0.0
+        # Context tokens only mean something to the model that produced them
+        self.model = None
+
+class SessionStore:
+    """
+    Per-session conversation state for multi-turn chat.
+
+    Each session keeps the context token array Ollama returns from
+    /api/generate. Sending it back with the next prompt lets Ollama reuse
+    the already-evaluated conversation instead of re-encoding it, and the
+    system prompt is only sent again after it has been evicted. The context
+    is opaque to us (it starts with the prompt template and its prefix is
+    what Ollama matches against its cache), so it is never cut: once it
+    grows past max_tokens the conversation starts over.
+    Sessions idle for longer than idle_seconds are forgotten, as is the
+    least recently used session once there are more than max_sessions.
+    A turn sent without the session's context (to switch models) starts the
+    conversation over.
+    """
+
+    def __init__(self, max_tokens=SESSION_MAX_TOKENS, idle_seconds=SESSION_IDLE_SECONDS,
+                 max_sessions=MAX_SESSIONS):
+        self.max_tokens = max_tokens
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.turns_recorded = 0
+        self.turns_evicted = 0
+        self.stale_replies = 0
+        self.expired = 0
+
+    def _expire(self, now):
+        # Sessions are kept in last-used order, so only the front can be idle
+        cutoff = now - self.idle_seconds
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def begin(self, session_id):
+        """
+        Start a turn in a session.
+
+        Args:
+            session_id (str): Id chosen by the client; None or an invalid id
+                means the turn is stateless
+
+        Returns:
+            SessionTurn or None: The turn, or None without a usable session id
+        """
+        if not isinstance(session_id, str) or not 0 < len(session_id) <= MAX_SESSION_ID_LENGTH:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session()
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            self._expire(now)
+            return SessionTurn(session_id, session.context.tolist(), session.system_turn < 0, session.version,
+                               session.model)
+
+    def finish(self, turn, context):
+        """
+        Record the context Ollama returned for a turn.
+
+        A reply is dropped if another turn in the same session finished
+        first, since its context no longer extends the conversation.
+
+        Args:
+            turn (SessionTurn): The turn from begin(), with the model it was
+                sent to
+            context (list): The "context" field of the final Ollama response
+        """
+        if turn is None or not context:
+            return
+
+        with self._lock:
+            session = self._sessions.get(turn.session_id)
+            if session is None or session.version != turn.version:
+                self.stale_replies += 1
+                return
+            try:
+                session.context = array("I", context)
+            except (OverflowError, TypeError) as e:
+                logger.error(f"Unusable context for session {turn.session_id}: {e}")
+                return
+            if not turn.context:
+                # A fresh context replaces the conversation held so far
+                session.turns = array("I")
+                session.system_turn = -1
+            session.model = turn.model
+            session.turns.append(max(0, len(context) - len(turn.context)))
+            if turn.send_system:
+                session.system_turn = len(session.turns) - 1
+            session.version += 1
+            session.last_used = time.monotonic()
+            self.turns_recorded += 1
+            self._trim(session)
+
+    def _trim(self, session):
+        # Drop the whole context once it outgrows the budget; the next turn
+        # starts a fresh conversation and sends the system prompt again
+        if len(session.context) <= self.max_tokens:
+            return
+        self.turns_evicted += len(session.turns)
+        session.context = array("I")
+        session.turns = array("I")
+        session.system_turn = -1
+
+    def has_context(self, session_id):
+        """
+        Check whether a session holds earlier conversation, without touching it.
+
+        Args:
+            session_id (str): The session to check
+
+        Returns:
+            bool: True if the next turn would be sent with context
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session is not None and len(session.context) > 0
+
+    def reset(self, session_id):
+        """
+        Forget a session's conversation.
+
+        Args:
+            session_id (str): The session to end
+
+        Returns:
+            bool: True if the session existed
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self):
+        """
+        Get session counters.
+
+        Returns:
+            dict: Session and token counts, memory held and turn counters
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            tokens = sum(len(session.context) for session in self._sessions.values())
+            return {
+                "sessions": len(self._sessions),
+                "context_tokens": tokens,
+                "context_bytes": tokens * array("I").itemsize,
+                "turns_recorded": self.turns_recorded,
+                "turns_evicted": self.turns_evicted,
+                "stale_replies": self.stale_replies,
+                "expired": self.expired,
+            }
+
+# Shared sessions for the chat endpoints
+chat_sessions = SessionStore()
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import sys
+
+    store = SessionStore(max_tokens=100, idle_seconds=60, max_sessions=5000)
+
+    turn = store.begin("abc")
+    print(f"First turn sends the system prompt: {turn.send_system}, context {turn.context}")
+    store.finish(turn, list(range(40)))
+    turn = store.begin("abc")
+    print(f"Follow-up sends {len(turn.context)} tokens, system prompt again: {turn.send_system}")
+    store.finish(turn, list(range(80)))
+
+    # A reply to a superseded turn is ignored
+    stale = store.begin("abc")
+    turn = store.begin("abc")
+    store.finish(turn, list(range(110)))
+    store.finish(stale, list(range(999)))
+    turn = store.begin("abc")
+    print(f"Over the budget: {len(turn.context)} tokens, system prompt again: {turn.send_system}")
+
+    for i in range(5000):
+        session_turn = store.begin(f"session-{i}")
+        store.finish(session_turn, list(range(100)))
+    size = sum(sys.getsizeof(s.context) + sys.getsizeof(s.turns) + sys.getsizeof(s) for s in store._sessions.values())
+    print(f"{len(store._sessions)} sessions hold {size / 1024 / 1024:.1f}MB")
+    print(store.stats())
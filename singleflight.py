@@ -0,0 +1,301 @@
+import contextvars
+import logging
+import threading
+
+from metrics import singleflight_requests
+
+logger = logging.getLogger('SingleFlight')
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _Stream:
+    __slots__ = ("chunks", "finished", "error", "subscribers", "abandoned", "cond", "task")
+
+    def __init__(self, cond):
+        self.chunks = []
+        self.finished = False
+        self.error = None
+        self.subscribers = 0
+        self.abandoned = False
+        self.cond = cond
+        self.task = None
+
+class SingleFlight:
+    """
+    Shares one upstream call between identical concurrent requests.
+
+    The first caller for a key runs the call; callers arriving while it is
+    still running wait for it and get the same result or exception instead
+    of starting their own. For streams, one background thread consumes the
+    upstream iterator and every subscriber replays the chunks received so
+    far, then follows the live stream. Once the call finishes the key is
+    free again, so nothing is cached beyond the flight itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _count(self, mode, leader):
+        if leader:
+            self.leaders += 1
+        else:
+            self.followers += 1
+        singleflight_requests.inc(mode, "leader" if leader else "follower")
+
+    def call(self, key, fn, *args):
+        """
+        Run fn(*args), or wait for an identical call already running.
+
+        Args:
+            key (str): Identifies identical requests
+            fn (callable): The upstream call
+
+        Returns:
+            The result of the shared call
+        """
+        with self._lock:
+            flight = self._calls.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._calls[key] = _Call()
+            self._count("call", leader)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(*args)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            flight.done.set()
+
+    def stream(self, key, fn, *args):
+        """
+        Iterate fn(*args), sharing the iteration with identical streams.
+
+        Args:
+            key (str): Identifies identical requests
+            fn (callable): Returns the upstream iterator
+
+        Returns:
+            generator: Every chunk of the shared stream, from the start
+        """
+        with self._lock:
+            flight = self._streams.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._streams[key] = _Stream(threading.Condition())
+            flight.subscribers += 1
+            self._count("stream", leader)
+
+        if leader:
+            # Keep the request id and other context in the upstream's logs
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(self._pump, key, flight, fn, args),
+                             name="singleflight-stream", daemon=True).start()
+        return self._follow(key, flight)
+
+    def _pump(self, key, flight, fn, args):
+        try:
+            iterator = fn(*args)
+            for chunk in iterator:
+                with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+                if flight.abandoned:
+                    # Every subscriber left; stop the upstream generation
+                    iterator.close()
+                    break
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+            with flight.cond:
+                flight.finished = True
+                flight.cond.notify_all()
+
+    def _follow(self, key, flight):
+        position = 0
+        try:
+            while True:
+                with flight.cond:
+                    while position >= len(flight.chunks) and not flight.finished:
+                        flight.cond.wait()
+                    chunks = flight.chunks[position:]
+                    finished = flight.finished
+                for chunk in chunks:
+                    yield chunk
+                position += len(chunks)
+                if finished:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            with self._lock:
+                flight.subscribers -= 1
+                if flight.subscribers == 0 and not flight.finished:
+                    flight.abandoned = True
+                    # Later requests start afresh rather than join a dying stream
+                    if self._streams.get(key) is flight:
+                        del self._streams[key]
+
+    def stats(self):
+        """
+        Get deduplication counters.
+
+        Returns:
+            dict: Calls that started a generation, calls that shared one,
+            and generations in flight
+        """
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "deduplicated": self.followers,
+                "in_flight": len(self._calls) + len(self._streams),
+            }
+
+class AsyncSingleFlight(SingleFlight):
+    """
+    asyncio counterpart of SingleFlight for streams on the event loop.
+
+    The upstream async iterator runs in its own task; when the last
+    subscriber goes away the task is cancelled, which closes the upstream
+    request. asyncio is imported on first use, since only the ASGI server
+    needs it.
+    """
+
+    def stream(self, key, fn, *args):
+        """
+        Iterate fn(*args) asynchronously, sharing it with identical streams.
+
+        Args:
+            key (str): Identifies identical requests
+            fn (callable): Returns the upstream async iterator
+
+        Returns:
+            async generator: Every chunk of the shared stream, from the start
+        """
+        import asyncio
+
+        flight = self._streams.get(key)
+        leader = flight is None
+        if leader:
+            flight = self._streams[key] = _Stream(asyncio.Condition())
+            flight.task = asyncio.ensure_future(self._pump(key, flight, fn, args))
+        flight.subscribers += 1
+        self._count("stream", leader)
+        return self._follow(key, flight)
+
+    async def _pump(self, key, flight, fn, args):
+        import asyncio
+
+        try:
+            async for chunk in fn(*args):
+                async with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except asyncio.CancelledError:
+            flight.error = ConnectionError("Shared generation was cancelled")
+        except Exception as e:
+            flight.error = e
+        finally:
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            flight.finished = True
+            async with flight.cond:
+                flight.cond.notify_all()
+
+    async def _follow(self, key, flight):
+        position = 0
+        try:
+            while True:
+                async with flight.cond:
+                    await flight.cond.wait_for(lambda: position < len(flight.chunks) or flight.finished)
+                    chunks = flight.chunks[position:]
+                    finished = flight.finished
+                for chunk in chunks:
+                    yield chunk
+                position += len(chunks)
+                if finished:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.finished:
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+                flight.task.cancel()
+
+# Shared by the thread-based and event-loop chat paths respectively
+generations = SingleFlight()
+async_generations = AsyncSingleFlight()
+
+# If run directly, test the module
+if __name__ == "__main__":
+    import asyncio
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    upstream_calls = []
+
+    def slow_answer(query):
+        upstream_calls.append(query)
+        time.sleep(0.2)
+        return f"answer to {query}"
+
+    def slow_stream(query):
+        upstream_calls.append(query)
+        for word in ["one", "two", "three"]:
+            time.sleep(0.05)
+            yield word
+
+    with ThreadPoolExecutor(20) as pool:
+        answers = list(pool.map(lambda _: generations.call("k", slow_answer, "what can you do"), range(20)))
+        streams = list(pool.map(lambda _: list(generations.stream("s", slow_stream, "hello")), range(20)))
+    print(f"{len(answers)} calls, {len(set(answers))} distinct answers, {len(streams)} streams "
+          f"all equal: {all(s == streams[0] for s in streams)}, upstream calls: {len(upstream_calls)}")
+    print(generations.stats())
+
+    async def async_stream(query):
+        upstream_calls.append(query)
+        for word in ["one", "two", "three"]:
+            await asyncio.sleep(0.05)
+            yield word
+
+    async def consume():
+        return [chunk async for chunk in async_generations.stream("a", async_stream, "hi")]
+
+    async def main():
+        results = await asyncio.gather(*(consume() for _ in range(20)))
+        print(f"Async streams all equal: {all(r == results[0] for r in results)} {results[0]}")
+
+        # A stream whose only subscriber leaves is cancelled upstream
+        stream = async_generations.stream("b", async_stream, "bye")
+        print(await stream.__anext__())
+        await stream.aclose()
+        await asyncio.sleep(0.1)
+
+    upstream_calls.clear()
+    asyncio.run(main())
+    print(f"Upstream calls: {len(upstream_calls)}; {async_generations.stats()}")
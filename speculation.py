@@ -0,0 +1,318 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from metrics import speculation_outcomes
+from model_router import model_router
+from response_cache import normalize_query
+from sessions import MAX_SESSION_ID_LENGTH
+
+logger = logging.getLogger('Speculation')
+
+# Speculative generations running at once, across all sessions
+MAX_SPECULATIONS = int(os.environ.get("SAVIN_MAX_SPECULATIONS", "2"))
+# Interim transcripts shorter than this are not worth a generation
+SPECULATE_MIN_WORDS = int(os.environ.get("SAVIN_SPECULATE_MIN_WORDS", "3"))
+# Seconds without an update or a final transcript before a speculation is dropped
+SPECULATION_TTL = float(os.environ.get("SAVIN_SPECULATION_TTL", "15"))
+# Seconds after a speculation starts before a changed transcript may restart it
+SPECULATION_DEBOUNCE = float(os.environ.get("SAVIN_SPECULATION_DEBOUNCE", "0.5"))
+
+# Hesitations speech recognition transcribes that don't change the query
+FILLER_WORDS = frozenset({"um", "umm", "uh", "uhh", "er", "erm", "hmm", "ah"})
+
+def query_tokens(text):
+    """
+    Reduce a transcript to the words that decide whether a generation still fits.
+
+    Args:
+        text (str): An interim or final transcript
+
+    Returns:
+        tuple: Its normalized words, without filler words
+    """
+    return tuple(word for word in normalize_query(text).split() if word not in FILLER_WORDS)
+
+class Speculation:
+    """
+    A generation started from an interim transcript.
+
+    A background thread reads the generation into a buffer. Nothing is
+    recorded until the final transcript commits it: only then does the
+    reply reach the session and the response cache, so a speculation that
+    is cancelled leaves no trace. Cancelling shuts the upstream response
+    down at once, which makes Ollama abandon the generation.
+    """
+
+    def __init__(self, session_id, text, tokens, plan):
+        self.session_id = session_id
+        self.text = text
+        self.tokens = tokens
+        self.plan = plan
+        self.started_at = self.updated_at = time.monotonic()
+        self.response = None
+        self.chunks = []
+        self.context = None
+        self.seconds = None
+        self.error = None
+        self.finished = False
+        self.cancelled = False
+        self.committed = False
+        self.cond = threading.Condition()
+
+    def start(self):
+        # Keep the request id of the interim update in the generation's logs
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self._run,), name="speculation", daemon=True).start()
+
+    def _run(self):
+        from chat import ollama_client
+
+        model_router.count(self.plan.route)
+        start = time.perf_counter()
+        try:
+            upstream = ollama_client.stream_generate(self.plan.payload, opened=self._opened)
+            for chunk in upstream:
+                if self.cancelled:
+                    upstream.close()
+                    return
+                text = chunk.get("response", "")
+                if chunk.get("done"):
+                    self.context = chunk.get("context")
+                    self.seconds = time.perf_counter() - start
+                if text:
+                    with self.cond:
+                        self.chunks.append(text)
+                        self.cond.notify_all()
+        except Exception as e:
+            # Aborting the response on cancel ends the read with an error
+            if not self.cancelled:
+                self.error = e
+        finally:
+            with self.cond:
+                self.finished = True
+                self.cond.notify_all()
+                record = self.committed and not self.cancelled and self.error is None
+            if record:
+                self._record()
+
+    def _record(self):
+        from chat import finish_chat
+
+        if self.seconds is not None:
+            finish_chat(self.plan, "".join(self.chunks), self.context, self.seconds)
+
+    def _opened(self, response):
+        from chat import ollama_client
+
+        with self.cond:
+            self.response = response
+            cancelled = self.cancelled
+        if cancelled:
+            ollama_client.abort_stream(response)
+
+    def cancel(self):
+        """Stop the generation, closing its upstream response; it is never recorded."""
+        from chat import ollama_client
+
+        with self.cond:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            response = None if self.finished else self.response
+        if response is not None:
+            ollama_client.abort_stream(response)
+
+    def commit(self):
+        """Keep the generation: record its reply once it completes."""
+        with self.cond:
+            self.committed = True
+            record = self.finished and not self.cancelled and self.error is None
+        if record:
+            self._record()
+
+    def follow(self):
+        """
+        Replay the generation so far, then follow it live.
+
+        Closing this before the generation finishes cancels it.
+
+        Yields:
+            str: Chunks of the reply
+        """
+        position = 0
+        try:
+            while True:
+                with self.cond:
+                    while position >= len(self.chunks) and not self.finished:
+                        self.cond.wait()
+                    chunks = self.chunks[position:]
+                    finished = self.finished
+                for chunk in chunks:
+                    yield chunk
+                position += len(chunks)
+                if finished:
+                    if self.error is not None:
+                        raise self.error
+                    if self.cancelled:
+                        raise ConnectionError("Speculative generation was cancelled")
+                    return
+        finally:
+            if not self.finished:
+                self.cancel()
+
+class SpeculationStore:
+    """
+    One speculative generation per session, restarted as the transcript changes.
+
+    update() is called with each interim transcript. A transcript whose
+    words are unchanged, ignoring case, punctuation, spacing and filler
+    words, keeps the running generation. Any other change cancels it and
+    starts again, but no sooner than debounce seconds after it started, so
+    a transcript still changing word by word doesn't start a generation
+    per word. claim() hands the
+    generation to the final request if its query is the same, and cancels
+    it otherwise. Speculation never takes the last free Ollama slot or more
+    than max_active slots in all, so committed requests always come first.
+    """
+
+    def __init__(self, max_active=MAX_SPECULATIONS, min_words=SPECULATE_MIN_WORDS, ttl=SPECULATION_TTL,
+                 debounce=SPECULATION_DEBOUNCE):
+        self.max_active = max_active
+        self.min_words = min_words
+        self.ttl = ttl
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._speculations = {}
+        self.outcomes = {}
+
+    def _count(self, outcome):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        speculation_outcomes.inc(outcome)
+
+    def _drop(self, session_id, outcome):
+        speculation = self._speculations.pop(session_id, None)
+        if speculation is not None:
+            # One already cancelled by a debounce was counted then
+            if not speculation.cancelled:
+                self._count(outcome)
+            speculation.cancel()
+        return speculation is not None
+
+    def _expire(self, now):
+        for session_id, speculation in list(self._speculations.items()):
+            if now - speculation.updated_at > self.ttl:
+                self._drop(session_id, "expired")
+
+    def _has_capacity(self):
+        from chat import ollama_client
+
+        running = sum(1 for speculation in self._speculations.values() if not speculation.finished)
+        if running >= self.max_active:
+            return False
+        return ollama_client.in_flight + 1 < ollama_client.max_concurrent
+
+    def update(self, session_id, transcript):
+        """
+        Speculate on an interim transcript of a session's next query.
+
+        Args:
+            session_id (str): The conversation the transcript belongs to
+            transcript (str): What the user has said so far
+
+        Returns:
+            dict: Whether a generation is running for it, and why not
+        """
+        if not isinstance(session_id, str) or not 0 < len(session_id) <= MAX_SESSION_ID_LENGTH:
+            return {'speculating': False, 'reason': 'no_session'}
+
+        from chat import plan_chat
+
+        tokens = query_tokens(transcript)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            current = self._speculations.get(session_id)
+            if current is not None and current.tokens == tokens and not current.cancelled:
+                current.updated_at = now
+                return {'speculating': True, 'reason': 'unchanged'}
+            if current is not None and now - current.started_at < self.debounce:
+                # Stop the stale generation now; a later update starts the next
+                if not current.cancelled:
+                    current.cancel()
+                    self._count("debounced")
+                current.updated_at = now
+                return {'speculating': False, 'reason': 'debounced'}
+
+            self._drop(session_id, "restarted")
+            if len(tokens) < self.min_words:
+                return {'speculating': False, 'reason': 'too_short'}
+            if not self._has_capacity():
+                self._count("busy")
+                return {'speculating': False, 'reason': 'busy'}
+
+            speculation = Speculation(session_id, transcript, tokens, plan_chat(transcript, session_id))
+            self._speculations[session_id] = speculation
+            self._count("started")
+        logger.debug(f"Speculating on: {transcript[:50]}")
+        speculation.start()
+        return {'speculating': True, 'reason': 'started'}
+
+    def claim(self, session_id, query):
+        """
+        Take over a session's speculative generation for its final query.
+
+        Args:
+            session_id (str): The conversation the query belongs to
+            query (str): The final transcript
+
+        Returns:
+            Speculation or None: The committed generation, or None if there
+            was none for this query
+        """
+        if session_id is None:
+            return None
+        with self._lock:
+            speculation = self._speculations.pop(session_id, None)
+            if speculation is None:
+                return None
+            if speculation.tokens != query_tokens(query) or speculation.cancelled or speculation.error:
+                speculation.cancel()
+                self._count("missed")
+                return None
+            self._count("committed")
+        speculation.commit()
+        return speculation
+
+    def cancel(self, session_id):
+        """
+        Drop a session's speculation, e.g. when recognition ends without a result.
+
+        Args:
+            session_id (str): The conversation
+
+        Returns:
+            bool: True if there was one
+        """
+        with self._lock:
+            return self._drop(session_id, "cancelled")
+
+    def stats(self):
+        """
+        Get speculation counters.
+
+        Returns:
+            dict: Speculations held and running, and counts by outcome
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "held": len(self._speculations),
+                "running": sum(1 for speculation in self._speculations.values() if not speculation.finished),
+                "outcomes": dict(self.outcomes),
+            }
+
+# Shared speculations for the chat endpoints
+speculations = SpeculationStore()
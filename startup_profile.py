@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Where the report goes unless --output says otherwise
+DEFAULT_OUTPUT = "startup-profile.json"
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# Run in a fresh interpreter: import the entry module, then start the
+# background services, timing both
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+imported = time.perf_counter()
+timings = {"import_ms": (imported - start) * 1000, "services_ms": None, "services": {}}
+if sys.argv[2] == "start":
+    from lifecycle import lifecycle
+    lifecycle.start()
+    timings["services_ms"] = (time.perf_counter() - imported) * 1000
+    timings["services"] = lifecycle.snapshot()["start_ms"]
+    lifecycle.stop()
+print("STARTUP " + json.dumps(timings))
+"""
+
+def parse_importtime(text):
+    """
+    Parse the output of python -X importtime.
+
+    Args:
+        text (str): The interpreter's stderr
+
+    Returns:
+        list: One dict per import with name, depth, self_us and cumulative_us
+    """
+    imports = []
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip(" ")
+        imports.append({
+            "name": stripped,
+            "depth": (len(name) - len(stripped) - 1) // 2,
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+        })
+    return imports
+
+def classify(package):
+    """Say whether a top-level package is ours, the standard library's or a dependency."""
+    if (PROJECT_DIR / f"{package}.py").exists():
+        return "project"
+    if package in sys.stdlib_module_names or package in sys.builtin_module_names:
+        return "stdlib"
+    return "third_party"
+
+def summarize_imports(imports, top=15):
+    """
+    Summarize where import time went.
+
+    Args:
+        imports (list): Entries from parse_importtime
+        top (int): How many entries to list per table
+
+    Returns:
+        dict: Total import time, time by kind of package, the packages and
+        project modules costing the most, and the slowest single imports
+    """
+    packages = {}
+    for entry in imports:
+        package = entry["name"].split(".")[0]
+        packages[package] = packages.get(package, 0) + entry["self_us"]
+
+    by_kind = {}
+    for package, micros in packages.items():
+        kind = classify(package)
+        by_kind[kind] = by_kind.get(kind, 0) + micros
+
+    def ms(micros):
+        return round(micros / 1000, 2)
+
+    project = [entry for entry in imports if classify(entry["name"].split(".")[0]) == "project"]
+    return {
+        "total_ms": ms(sum(entry["self_us"] for entry in imports)),
+        "by_kind_ms": {kind: ms(micros) for kind, micros in sorted(by_kind.items(), key=lambda item: -item[1])},
+        "packages_ms": [{"package": package, "kind": classify(package), "ms": ms(micros)}
+                        for package, micros in sorted(packages.items(), key=lambda item: -item[1])[:top]],
+        "project_modules_ms": [{"module": entry["name"], "self_ms": ms(entry["self_us"]),
+                                "cumulative_ms": ms(entry["cumulative_us"])}
+                               for entry in sorted(project, key=lambda entry: -entry["cumulative_us"])[:top]],
+        "slowest_imports_ms": [{"module": entry["name"], "self_ms": ms(entry["self_us"])}
+                               for entry in sorted(imports, key=lambda entry: -entry["self_us"])[:top]],
+    }
+
+def run_profile(module="app", start_services=True, top=15, python=sys.executable):
+    """
+    Profile the cold start of an entry module in a fresh interpreter.
+
+    The child runs with a temporary home and log file so it doesn't touch
+    the user's data.
+
+    Args:
+        module (str): The module a server imports, e.g. "app" or "server"
+        start_services (bool): Also start and stop the background services
+        top (int): How many entries to list per table
+        python (str): The interpreter to profile
+
+    Returns:
+        dict: The import summary plus wall-clock import and service start times
+
+    Raises:
+        RuntimeError: If the module fails to import
+    """
+    with tempfile.TemporaryDirectory(prefix="savin-startup-") as home:
+        env = dict(os.environ, HOME=home, USERPROFILE=home, SAVIN_LOG_FILE=os.path.join(home, "savin.jsonl"),
+                   SAVIN_LOG_CONSOLE="0", SAVIN_LAUNCH_DRY_RUN="1")
+        completed = subprocess.run(
+            [python, "-X", "importtime", "-c", STARTUP_SCRIPT, module, "start" if start_services else "import"],
+            cwd=PROJECT_DIR, env=env, capture_output=True, text=True, timeout=120
+        )
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"Importing {module} failed: " + "\n".join(errors[-10:]))
+
+    timings = {}
+    for line in completed.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            timings = json.loads(line[len("STARTUP "):])
+    report = {"module": module, "python": python}
+    report.update({key: round(value, 2) if isinstance(value, float) else value for key, value in timings.items()})
+    report["imports"] = summarize_imports(parse_importtime(completed.stderr), top)
+    return report
+
+def format_report(report):
+    """Render a profile report as plain-text tables."""
+    imports = report["imports"]
+    lines = [f"Cold start of {report['module']}: import {report['import_ms']}ms "
+             f"(importtime total {imports['total_ms']}ms)"]
+    if report.get("services_ms") is not None:
+        lines.append(f"Background services started in {report['services_ms']}ms")
+        lines.extend(f"  {name:24} {ms:10.2f}ms" for name, ms in report["services"].items())
+    lines.append("Import time by kind: " + ", ".join(f"{kind} {ms}ms" for kind, ms in imports["by_kind_ms"].items()))
+    lines.append("Packages (self time):")
+    lines.extend(f"  {entry['package']:24} {entry['kind']:12} {entry['ms']:10.2f}ms" for entry in imports["packages_ms"])
+    lines.append("Project modules (cumulative / self):")
+    lines.extend(f"  {entry['module']:24} {entry['cumulative_ms']:10.2f}ms {entry['self_ms']:10.2f}ms"
+                 for entry in imports["project_modules_ms"])
+    lines.append("Slowest single imports (self time):")
+    lines.extend(f"  {entry['module']:40} {entry['self_ms']:10.2f}ms" for entry in imports["slowest_imports_ms"])
+    return "\n".join(lines)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Report where the cold start of a Savin entry point spends its time.")
+    parser.add_argument("module", nargs="?", default="app", help="module to import (default: app)")
+    parser.add_argument("--no-start", action="store_true", help="only import; don't start the background services")
+    parser.add_argument("--top", type=int, default=15, help="entries per table")
+    parser.add_argument("--output", default=None, help=f"also write the JSON report here (e.g. {DEFAULT_OUTPUT})")
+    return parser
+
+# Profile a cold start when executed directly
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    try:
+        report = run_profile(args.module, start_services=not args.no_start, top=args.top)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(format_report(report))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
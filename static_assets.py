@@ -0,0 +1,431 @@
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+logger = logging.getLogger('StaticAssets')
+
+PROJECT_DIR = Path(__file__).resolve().parent
+# The web UI's sources: index.html, its stylesheet and script, and vendor/
+SOURCE_DIR = PROJECT_DIR / "web"
+# Where the build writes fingerprinted, precompressed files
+DIST_DIR = Path(os.environ.get("SAVIN_STATIC_DIR", str(SOURCE_DIR / "dist")))
+# URL prefix the fingerprinted files are served under
+ASSET_PREFIX = "/assets/"
+
+# Third-party libraries served from vendor/ instead of a CDN, pinned to the
+# versions the UI was written against
+VENDOR_ASSETS = {
+    "vendor/three.min.js": "https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js",
+    "vendor/gsap.min.js": "https://cdnjs.cloudflare.com/ajax/libs/gsap/3.9.1/gsap.min.js",
+}
+# SHA-256 of each vendored file, recorded when it is first fetched
+VENDOR_LOCK = "vendor/vendor-lock.json"
+
+# Fingerprinted files never change, so browsers may keep them for a year
+# without asking; the page itself is revalidated on every load
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+# Smaller files aren't worth a compressed variant
+MIN_COMPRESS_SIZE = 256
+# Precompressed variants in order of preference, with their file suffixes
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Stylesheets and scripts in index.html that the build fingerprints
+ASSET_TAG = re.compile(r'[ \t]*(?:<script src="(?P<script>[^":]+)"></script>'
+                       r'|<link rel="stylesheet" href="(?P<style>[^":]+)">)')
+
+def fingerprint(data):
+    """Content hash used in file names and ETags."""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+def fingerprinted_name(name, data):
+    """
+    Name a file after its content, e.g. savin.css -> savin.3f2a9c01de4b.css.
+
+    Args:
+        name (str): Path of the file relative to the source directory
+        data (bytes): Its content
+
+    Returns:
+        str: The path with the content hash before the extension
+    """
+    path = Path(name)
+    return (path.parent / f"{path.stem}.{fingerprint(data)}{path.suffix}").as_posix()
+
+def _compressible(name):
+    content_type = mimetypes.guess_type(name)[0] or ""
+    return content_type.startswith("text/") or content_type in ("application/javascript", "application/json",
+                                                                "image/svg+xml")
+
+def compress(data, use_brotli=True):
+    """
+    Compress a file for every encoding that makes it smaller.
+
+    Args:
+        data (bytes): The file's content
+        use_brotli (bool): Also produce a brotli variant (slow at maximum
+            quality; needs the optional brotli package)
+
+    Returns:
+        dict: Encoding name -> compressed bytes
+    """
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if use_brotli:
+        import brotli
+        variants["br"] = brotli.compress(data, quality=11)
+    return {encoding: compressed for encoding, compressed in variants.items() if len(compressed) < len(data)}
+
+def _source_paths(source_dir, dist_dir=DIST_DIR):
+    # Every source file, skipping the build output and hidden files
+    for path in sorted(source_dir.rglob("*")):
+        name = path.relative_to(source_dir).as_posix()
+        if path.is_file() and Path(dist_dir) not in path.parents \
+                and not any(part.startswith(".") for part in Path(name).parts):
+            yield name, path
+
+def _source_files(source_dir):
+    return {name: path.read_bytes() for name, path in _source_paths(source_dir)
+            if name not in ("index.html", VENDOR_LOCK)}
+
+def render_index(html, urls):
+    """
+    Point index.html's stylesheets and scripts at their fingerprinted URLs.
+
+    Args:
+        html (str): The source index.html
+        urls (dict): Source path -> fingerprinted URL
+
+    Returns:
+        str: The page as served
+
+    Raises:
+        FileNotFoundError: If the page references a file that doesn't exist
+    """
+    def replace(match):
+        name = match.group("script") or match.group("style")
+        url = urls.get(name)
+        if url is None and name in VENDOR_ASSETS:
+            raise FileNotFoundError(f"{name} has not been vendored; run `python static_assets.py --vendor` "
+                                    f"to fetch it into {SOURCE_DIR.name}/")
+        if url is None:
+            raise FileNotFoundError(f"index.html references {name}, which is not in {SOURCE_DIR.name}/")
+        return match.group(0).replace(f'"{name}"', f'"{url}"')
+
+    return ASSET_TAG.sub(replace, html)
+
+def build(source_dir=SOURCE_DIR, use_brotli=True):
+    """
+    Build the web UI: fingerprint every asset, rewrite index.html to match,
+    and precompress everything.
+
+    Args:
+        source_dir (Path): The web UI's sources
+        use_brotli (bool): Also produce brotli variants
+
+    Returns:
+        dict: Output path -> bytes, including the .gz and .br variants
+    """
+    source_dir = Path(source_dir)
+    if use_brotli and importlib.util.find_spec("brotli") is None:
+        logger.info("brotli is not installed; building gzip variants only")
+        use_brotli = False
+    output = {}
+    urls = {}
+    for name, data in _source_files(source_dir).items():
+        built_name = fingerprinted_name(name, data)
+        urls[name] = ASSET_PREFIX + built_name
+        output[built_name] = data
+
+    html = (source_dir / "index.html").read_text(encoding="utf-8")
+    output["index.html"] = render_index(html, urls).encode("utf-8")
+
+    for name, data in list(output.items()):
+        if len(data) >= MIN_COMPRESS_SIZE and _compressible(name):
+            variants = compress(data, use_brotli)
+            for encoding, suffix in ENCODINGS:
+                if encoding in variants:
+                    output[name + suffix] = variants[encoding]
+    return output
+
+def write_build(files, dist_dir=DIST_DIR):
+    """
+    Replace the build directory with freshly built files.
+
+    Args:
+        files (dict): Output of build()
+        dist_dir (Path): Where to write them
+    """
+    dist_dir = Path(dist_dir)
+    staging = dist_dir.with_name(f".{dist_dir.name}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    for name, data in files.items():
+        path = staging / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.replace(staging, dist_dir)
+
+def vendor(source_dir=SOURCE_DIR, refresh=False, timeout=30):
+    """
+    Fetch the pinned third-party libraries into vendor/.
+
+    The fetched files are committed with the rest of the web UI, so serving
+    never needs the network. The first fetch records each file's SHA-256 in
+    the lock file; later fetches must match it, so a changed CDN file is
+    caught rather than shipped.
+
+    Args:
+        source_dir (Path): The web UI's sources
+        refresh (bool): Fetch files that are already present again
+        timeout (float): Seconds to wait for each download
+
+    Returns:
+        dict: Vendored path -> its SHA-256
+
+    Raises:
+        ValueError: If a download doesn't match the recorded hash
+    """
+    import urllib.request
+
+    source_dir = Path(source_dir)
+    lock_path = source_dir / VENDOR_LOCK
+    lock = json.loads(lock_path.read_text()) if lock_path.exists() else {}
+    for name, url in VENDOR_ASSETS.items():
+        path = source_dir / name
+        if path.exists() and not refresh:
+            data = path.read_bytes()
+        else:
+            logger.info(f"Fetching {url}")
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                data = response.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if lock.get(name, {}).get("sha256", digest) != digest:
+            raise ValueError(f"{name} does not match the SHA-256 in {VENDOR_LOCK}; "
+                             f"delete its entry if the new file is intended")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        lock[name] = {"url": url, "sha256": digest}
+    lock_path.write_text(json.dumps(lock, indent=2, sort_keys=True) + "\n")
+    return {name: entry["sha256"] for name, entry in lock.items()}
+
+def accepted_encodings(header):
+    """
+    Parse an Accept-Encoding header.
+
+    Args:
+        header (str): The header value, possibly empty
+
+    Returns:
+        set: Encodings the client accepts (q > 0), lower-cased
+    """
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+class Asset:
+    """
+    One servable file with its precompressed variants, held in memory.
+
+    Every variant has its own strong ETag derived from the content, so a
+    browser revalidating with If-None-Match gets a 304 without a body.
+    """
+
+    __slots__ = ("name", "content_type", "cache_control", "etag", "variants")
+
+    def __init__(self, name, data, variants=None, cache_control=IMMUTABLE_CACHE):
+        self.name = name
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.etag = fingerprint(data)
+        # Encoding (None for identity) -> bytes
+        self.variants = {None: data}
+        self.variants.update(variants or {})
+
+    def negotiate(self, accept_encoding):
+        """Pick the best precompressed variant the client accepts, or None for identity."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return None
+
+    def _etag(self, encoding):
+        suffix = dict(ENCODINGS).get(encoding, "").replace(".", "-")
+        return f'"{self.etag}{suffix}"'
+
+    def matches(self, if_none_match):
+        """Whether an If-None-Match header names any variant of this asset."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or any(self._etag(encoding) in tags for encoding in self.variants)
+
+    def respond(self, accept_encoding="", if_none_match=None):
+        """
+        Answer a GET for this asset.
+
+        Args:
+            accept_encoding (str): The request's Accept-Encoding header
+            if_none_match (str): The request's If-None-Match header
+
+        Returns:
+            tuple: Status code, list of header pairs, and body bytes
+        """
+        encoding = self.negotiate(accept_encoding)
+        headers = [("ETag", self._etag(encoding)), ("Cache-Control", self.cache_control)]
+        if len(self.variants) > 1:
+            headers.append(("Vary", "Accept-Encoding"))
+        if self.matches(if_none_match):
+            return 304, headers, b""
+        headers.append(("Content-Type", self.content_type))
+        if encoding is not None:
+            headers.append(("Content-Encoding", encoding))
+        return 200, headers, self.variants[encoding]
+
+class StaticAssets:
+    """
+    Serves the built web UI from memory.
+
+    The build directory is read once, on the first request or when the
+    services start. Without a build (e.g. in a fresh checkout) the sources
+    are built in memory instead, with gzip only to keep that quick, so the
+    UI always works; run this module to build ahead of time with brotli.
+    """
+
+    def __init__(self, dist_dir=DIST_DIR, source_dir=SOURCE_DIR):
+        self.dist_dir = Path(dist_dir)
+        self.source_dir = Path(source_dir)
+        self._lock = threading.Lock()
+        self._assets = None
+        self._index = None
+        self.mode = None
+
+    def _read_build(self):
+        files = {}
+        for path in self.dist_dir.rglob("*"):
+            if path.is_file():
+                files[path.relative_to(self.dist_dir).as_posix()] = path.read_bytes()
+        return files
+
+    def _stale(self):
+        built = (self.dist_dir / "index.html").stat().st_mtime
+        return any(path.stat().st_mtime > built for _, path in _source_paths(self.source_dir, self.dist_dir))
+
+    def load(self):
+        """
+        Load the build into memory, building the sources if there is none.
+
+        Returns:
+            int: Number of assets loaded, besides index.html
+        """
+        with self._lock:
+            if (self.dist_dir / "index.html").exists():
+                files = self._read_build()
+                self.mode = "built"
+                if self._stale():
+                    logger.warning(f"The web UI build in {self.dist_dir} is older than its sources; "
+                                   f"run `python static_assets.py` to rebuild it")
+            else:
+                logger.warning(f"No web UI build in {self.dist_dir}; building it in memory. "
+                               f"Run `python static_assets.py` to precompress at build time.")
+                files = build(self.source_dir, use_brotli=False)
+                self.mode = "memory"
+
+            suffixes = {suffix: encoding for encoding, suffix in ENCODINGS}
+            assets = {}
+            for name, data in files.items():
+                if Path(name).suffix in suffixes:
+                    continue
+                variants = {suffixes[suffix]: files[name + suffix] for suffix in suffixes if name + suffix in files}
+                cache_control = REVALIDATE_CACHE if name == "index.html" else IMMUTABLE_CACHE
+                assets[name] = Asset(name, data, variants, cache_control)
+            self._index = assets.pop("index.html")
+            self._assets = assets
+        logger.info(f"Loaded {len(assets)} web UI assets ({self.mode})")
+        return len(assets)
+
+    def index(self):
+        """The page itself, revalidated on every load."""
+        if self._index is None:
+            self.load()
+        return self._index
+
+    def get(self, name):
+        """
+        Look up a fingerprinted asset.
+
+        Args:
+            name (str): Its path under ASSET_PREFIX
+
+        Returns:
+            Asset or None: The asset, or None if there is no such file
+        """
+        if self._assets is None:
+            self.load()
+        return self._assets.get(name)
+
+    def stats(self):
+        """
+        Get what is being served.
+
+        Returns:
+            dict: Whether the build was loaded or built in memory, and the
+            number and total size of the assets
+        """
+        assets = self._assets or {}
+        return {
+            "mode": self.mode,
+            "assets": len(assets),
+            "bytes": sum(len(asset.variants[None]) for asset in assets.values()),
+        }
+
+# Shared assets for the web UI routes
+web_assets = StaticAssets()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Build the Savin web UI into fingerprinted, precompressed files.")
+    parser.add_argument("--vendor", action="store_true", help="fetch the pinned third-party libraries first")
+    parser.add_argument("--refresh", action="store_true", help="with --vendor, fetch files already present again")
+    parser.add_argument("--no-brotli", action="store_true", help="only produce gzip variants")
+    parser.add_argument("--output", default=str(DIST_DIR), help=f"build directory (default: {DIST_DIR})")
+    return parser
+
+# Build the web UI when executed directly
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    args = build_parser().parse_args()
+    try:
+        if args.vendor:
+            for name, digest in vendor(refresh=args.refresh).items():
+                print(f"{name:32} sha256 {digest}")
+        files = build(use_brotli=not args.no_brotli)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    write_build(files, args.output)
+    for name, data in sorted(files.items()):
+        print(f"{name:48} {len(data):10,} bytes")
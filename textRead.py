@@ -5,10 +5,11 @@ import datetime
 import logging
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('NotesTaker')
 
+from notes_store import notes_store
+from notes_search import notes_index
+
 def get_notes_directory():
     """Get the directory where notes will be stored."""
     home_dir = Path.home()
@@ -21,6 +22,28 @@ def get_notes_directory():
     
     return notes_dir
 
+def export_note(note_id):
+    """
+    Write a stored note to a text file so it can be opened in an editor.
+    
+    Args:
+        note_id (int): The note's id
+        
+    Returns:
+        Path or None: Path to the exported file, or None if there is no such note
+    """
+    note = notes_store.get(note_id)
+    if note is None:
+        return None
+    
+    # In a subdirectory, so the legacy importer never picks them up
+    export_dir = get_notes_directory() / "opened"
+    export_dir.mkdir(exist_ok=True)
+    file_path = export_dir / f"note_{note_id}.txt"
+    with open(file_path, 'w') as f:
+        f.write(note["text"])
+    return file_path
+
 def write_in_notepad(text):
     """
     Write the given text to a notepad file.
@@ -32,19 +55,20 @@ def write_in_notepad(text):
         bool: True if the note was written successfully, False otherwise
     """
     try:
-        # Create a timestamped file name
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        notes_dir = get_notes_directory()
-        file_path = notes_dir / f"note_{timestamp}.txt"
+        # Append to the notes store; every note gets its own id
+        note = notes_store.add(text)
+        logger.info(f"Note {note['id']} saved")
         
-        # Write the text to the file
-        with open(file_path, 'w') as f:
-            f.write(text)
+        # Make it searchable right away
+        try:
+            notes_index.add(note["id"], text)
+        except Exception as e:
+            logger.error(f"Error indexing note {note['id']}: {str(e)}")
         
-        logger.info(f"Note written to: {file_path}")
-        
-        # Attempt to open the file with the default text editor
-        open_file_with_default_app(file_path)
+        # Attempt to open the note with the default text editor
+        file_path = export_note(note["id"])
+        if file_path:
+            open_file_with_default_app(file_path)
         
         return True
         
@@ -82,30 +106,51 @@ def list_recent_notes(limit=5):
         limit (int): Maximum number of notes to list
         
     Returns:
-        list: List of recent note files
+        list: Note dicts with id, timestamp and length, newest first
     """
     try:
-        notes_dir = get_notes_directory()
-        note_files = sorted(list(notes_dir.glob("note_*.txt")), key=os.path.getmtime, reverse=True)
-        
-        return note_files[:limit]
+        return notes_store.recent(limit)
         
     except Exception as e:
         logger.error(f"Error listing notes: {str(e)}")
         return []
 
-def get_note_content(file_path):
+def search_notes(query, limit=5):
+    """
+    Search the notes for the given words.
+    
+    Args:
+        query (str): Words to look for; the last one may be partial
+        limit (int): Maximum number of notes to return
+        
+    Returns:
+        list: Matching notes with id, timestamp, score and snippet, best first
+    """
+    try:
+        return notes_index.search(query, limit=limit)
+        
+    except Exception as e:
+        logger.error(f"Error searching notes: {str(e)}")
+        return []
+
+def get_note_content(note):
     """
-    Get the content of a note file.
+    Get the content of a note.
     
     Args:
-        file_path (str or Path): Path to the note file
+        note (int, dict, str or Path): A note id, a note from list_recent_notes,
+            or the path of a note file
         
     Returns:
         str: The content of the note
     """
     try:
-        with open(file_path, 'r') as f:
+        if isinstance(note, dict):
+            note = note["id"]
+        if isinstance(note, int):
+            stored = notes_store.get(note)
+            return stored["text"] if stored else ""
+        with open(note, 'r') as f:
             return f.read()
     except Exception as e:
         logger.error(f"Error reading note: {str(e)}")
@@ -125,7 +170,7 @@ if __name__ == "__main__":
     # Test listing recent notes
     print("\nRecent notes:")
     recent_notes = list_recent_notes()
-    for i, note_file in enumerate(recent_notes, 1):
-        print(f"{i}. {note_file.name}")
-        content = get_note_content(note_file)
+    for i, note in enumerate(recent_notes, 1):
+        print(f"{i}. Note {note['id']} ({note['timestamp']})")
+        content = get_note_content(note)
         print(f"   Content: {content[:50]}...")
\ No newline at end of file
@@ -0,0 +1,222 @@
+import datetime
+import logging
+import os
+import threading
+import time
+
+from metrics import model_warm
+
+logger = logging.getLogger('ModelWarmup')
+
+# Models to load at startup, comma-separated (default: every chat model tier)
+WARM_MODELS = [name.strip() for name in os.environ.get("SAVIN_WARM_MODELS", "").split(",") if name.strip()]
+# How long Ollama keeps a model loaded after its last request, in Ollama's
+# duration syntax ("30m", "2h", "-1" for forever)
+KEEP_ALIVE = os.environ.get("SAVIN_OLLAMA_KEEP_ALIVE", "30m")
+# Seconds between checks of which models are loaded
+CHECK_INTERVAL = float(os.environ.get("SAVIN_WARM_INTERVAL", "30"))
+# A model used this recently is loaded again if Ollama drops it
+TRAFFIC_WINDOW = float(os.environ.get("SAVIN_WARM_TRAFFIC_WINDOW", str(30 * 60)))
+# Loading a large model from disk can take a while
+LOAD_TIMEOUT = float(os.environ.get("SAVIN_WARM_TIMEOUT", "300"))
+
+def _is_loaded(model, loaded_names):
+    # Ollama reports "mistral:latest" for a model requested as "mistral"
+    return model in loaded_names or (":" not in model and f"{model}:latest" in loaded_names)
+
+def _timestamp(value):
+    return datetime.datetime.fromtimestamp(value).isoformat() if value else None
+
+class ModelWarmer:
+    """
+    Keeps the chat models loaded in Ollama.
+
+    At startup each model is loaded with an empty generation in a background
+    thread, so the first real query doesn't pay the load time and the server
+    is ready at once. Every generation carries keep_alive, so models stay
+    resident while traffic continues. A periodic check of Ollama's loaded
+    models tracks warm/cold state and reloads a model that was unloaded
+    while it was still in use.
+    """
+
+    def __init__(self, models=None, keep_alive=KEEP_ALIVE, interval=CHECK_INTERVAL,
+                 traffic_window=TRAFFIC_WINDOW, load_timeout=LOAD_TIMEOUT):
+        self.models = list(models or WARM_MODELS)
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.traffic_window = traffic_window
+        self.load_timeout = load_timeout
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = {}
+
+    def _model_state(self, model):
+        state = self._state.get(model)
+        if state is None:
+            state = self._state[model] = {
+                "state": "cold",
+                "loaded_at": None,
+                "load_seconds": None,
+                "expires_at": None,
+                "last_used_at": None,
+                "last_error": None,
+            }
+            model_warm.set(model, value=0)
+        return state
+
+    def _set(self, model, **update):
+        with self._lock:
+            state = self._model_state(model)
+            state.update(update)
+            model_warm.set(model, value=1 if state["state"] == "warm" else 0)
+
+    def warm(self, model):
+        """
+        Load one model into memory and wait until it is ready.
+
+        Args:
+            model (str): The model name
+
+        Returns:
+            bool: True if the model is loaded
+        """
+        from chat import ollama_client
+
+        self._set(model, state="warming")
+        logger.info(f"Loading {model} (keep_alive {self.keep_alive})")
+        start = time.perf_counter()
+        try:
+            result = ollama_client.load_model(model, self.keep_alive, timeout=self.load_timeout)
+        except Exception as e:
+            self._set(model, state="error", last_error=f"{type(e).__name__}: {e}")
+            logger.warning(f"Could not load {model}: {e}")
+            return False
+
+        elapsed = time.perf_counter() - start
+        # Ollama reports the load time itself; it is zero if already loaded
+        load_seconds = result.get("load_duration", 0) / 1e9 or elapsed
+        self._set(model, state="warm", loaded_at=time.time(), load_seconds=round(load_seconds, 3), last_error=None)
+        logger.info(f"{model} is loaded ({load_seconds:.2f}s)")
+        return True
+
+    def check(self):
+        """Refresh warm/cold state from Ollama and reload models still in use."""
+        from chat import ollama_client
+
+        try:
+            running = ollama_client.running_models()
+        except Exception as e:
+            logger.debug(f"Could not list loaded models: {e}")
+            return
+
+        loaded = {entry["name"]: entry.get("expires_at") for entry in running}
+        now = time.time()
+        for model in self.models:
+            with self._lock:
+                state = self._model_state(model)
+                current, last_used = state["state"], state["last_used_at"]
+            if current == "warming":
+                continue
+
+            if _is_loaded(model, loaded):
+                expires_at = loaded.get(model) or loaded.get(f"{model}:latest")
+                self._set(model, state="warm", expires_at=expires_at)
+                continue
+            if current == "error":
+                # Try again, e.g. once a missing model has been pulled
+                self.warm(model)
+                continue
+
+            self._set(model, state="cold", expires_at=None)
+            if current == "warm":
+                logger.info(f"{model} was unloaded by Ollama")
+            if last_used and now - last_used < self.traffic_window:
+                self.warm(model)
+
+    def available(self, model):
+        """
+        Check whether a model can serve generations.
+
+        Args:
+            model (str): The model name
+
+        Returns:
+            bool: False if the last attempt to load it failed
+        """
+        state = self._state.get(model)
+        return state is None or state["state"] != "error"
+
+    def note_use(self, model):
+        """
+        Record that a generation with a model succeeded.
+
+        Args:
+            model (str): The model name
+        """
+        with self._lock:
+            state = self._model_state(model)
+            state["last_used_at"] = time.time()
+            if state["state"] != "warm":
+                state["state"] = "warm"
+                state["last_error"] = None
+                model_warm.set(model, value=1)
+
+    def snapshot(self):
+        """
+        Get the state of every tracked model.
+
+        Returns:
+            dict: Model name -> state ("cold", "warming", "warm" or "error"),
+            load time, expiry and last use
+        """
+        with self._lock:
+            snapshot = {}
+            for model, state in self._state.items():
+                entry = dict(state)
+                entry["loaded_at"] = _timestamp(entry["loaded_at"])
+                entry["last_used_at"] = _timestamp(entry["last_used_at"])
+                snapshot[model] = entry
+            return snapshot
+
+    def _run(self):
+        for model in self.models:
+            if self._stop.is_set():
+                return
+            self.warm(model)
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Warm the models and start watching them in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.models:
+            from model_router import model_router
+            self.models = model_router.models()
+        with self._lock:
+            for model in self.models:
+                self._model_state(model)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+# Shared warmer for the chat models
+model_warmer = ModelWarmer()
+
+# If run directly, test the module
+if __name__ == "__main__":
+    model_warmer.start()
+    for _ in range(20):
+        print(model_warmer.snapshot())
+        if all(state["state"] in ("warm", "error") for state in model_warmer.snapshot().values()):
+            break
+        time.sleep(1)
+    model_warmer.check()
+    print(model_warmer.snapshot())
@@ -0,0 +1,558 @@
+// Initialize 3D scene
+const scene = new THREE.Scene();
+const camera = new THREE.PerspectiveCamera(75, window.innerWidth / window.innerHeight, 0.1, 1000);
+const renderer = new THREE.WebGLRenderer({ canvas: document.getElementById('canvas'), alpha: true });
+renderer.setSize(window.innerWidth, window.innerHeight);
+
+// Create ambient light
+const ambientLight = new THREE.AmbientLight(0xffffff, 0.5);
+scene.add(ambientLight);
+
+// Add directional light
+const directionalLight = new THREE.DirectionalLight(0xffffff, 0.8);
+directionalLight.position.set(0, 10, 10);
+scene.add(directionalLight);
+
+// Create a group for the character
+const characterGroup = new THREE.Group();
+scene.add(characterGroup);
+
+// Create head (sphere)
+const headGeometry = new THREE.SphereGeometry(1.2, 32, 32);
+const headMaterial = new THREE.MeshPhongMaterial({ 
+  color: 0xFFB6C1,
+  shininess: 30
+});
+const head = new THREE.Mesh(headGeometry, headMaterial);
+characterGroup.add(head);
+
+// Create eyes
+const eyeGeometry = new THREE.SphereGeometry(0.2, 32, 32);
+const eyeMaterial = new THREE.MeshPhongMaterial({ color: 0x000000 });
+
+const leftEye = new THREE.Mesh(eyeGeometry, eyeMaterial);
+leftEye.position.set(-0.4, 0.2, 1);
+characterGroup.add(leftEye);
+
+const rightEye = new THREE.Mesh(eyeGeometry, eyeMaterial);
+rightEye.position.set(0.4, 0.2, 1);
+characterGroup.add(rightEye);
+
+// Create mouth
+const mouthGeometry = new THREE.TorusGeometry(0.3, 0.05, 16, 32, Math.PI);
+const mouthMaterial = new THREE.MeshPhongMaterial({ color: 0xFF1493 });
+const mouth = new THREE.Mesh(mouthGeometry, mouthMaterial);
+mouth.position.z = 1;
+mouth.position.y = -0.4;
+mouth.rotation.x = Math.PI / 2;
+characterGroup.add(mouth);
+
+// Create hair
+const hairGeometry = new THREE.ConeGeometry(1.3, 1.5, 32);
+const hairMaterial = new THREE.MeshPhongMaterial({ color: 0x8A2BE2 });
+const hair = new THREE.Mesh(hairGeometry, hairMaterial);
+hair.position.y = 1.2;
+hair.rotation.x = Math.PI;
+characterGroup.add(hair);
+
+// Create decorative elements (ears/earrings)
+const earGeometry = new THREE.SphereGeometry(0.2, 32, 32);
+const earMaterial = new THREE.MeshPhongMaterial({ color: 0xFFB6C1 });
+
+const leftEar = new THREE.Mesh(earGeometry, earMaterial);
+leftEar.position.set(-1.2, 0, 0);
+characterGroup.add(leftEar);
+
+const rightEar = new THREE.Mesh(earGeometry, earMaterial);
+rightEar.position.set(1.2, 0, 0);
+characterGroup.add(rightEar);
+
+// Create earrings
+const earringGeometry = new THREE.TorusGeometry(0.1, 0.03, 16, 32);
+const earringMaterial = new THREE.MeshPhongMaterial({ color: 0xFFD700 });
+
+const leftEarring = new THREE.Mesh(earringGeometry, earringMaterial);
+leftEarring.position.set(-1.2, -0.3, 0);
+leftEarring.rotation.x = Math.PI / 2;
+characterGroup.add(leftEarring);
+
+const rightEarring = new THREE.Mesh(earringGeometry, earringMaterial);
+rightEarring.position.set(1.2, -0.3, 0);
+rightEarring.rotation.x = Math.PI / 2;
+characterGroup.add(rightEarring);
+
+// Create particles
+const particlesGeometry = new THREE.BufferGeometry();
+const particleCount = 100;
+
+const positions = new Float32Array(particleCount * 3);
+const colors = new Float32Array(particleCount * 3);
+
+for (let i = 0; i < particleCount; i++) {
+  const i3 = i * 3;
+  // Positions
+  positions[i3] = (Math.random() - 0.5) * 15;
+  positions[i3 + 1] = (Math.random() - 0.5) * 15;
+  positions[i3 + 2] = (Math.random() - 0.5) * 15;
+
+  // Colors
+  colors[i3] = Math.random();
+  colors[i3 + 1] = Math.random();
+  colors[i3 + 2] = Math.random();
+}
+
+particlesGeometry.setAttribute('position', new THREE.BufferAttribute(positions, 3));
+particlesGeometry.setAttribute('color', new THREE.BufferAttribute(colors, 3));
+
+const particlesMaterial = new THREE.PointsMaterial({
+  size: 0.1,
+  vertexColors: true,
+  transparent: true,
+  opacity: 0.8
+});
+
+const particles = new THREE.Points(particlesGeometry, particlesMaterial);
+scene.add(particles);
+
+// Position camera
+camera.position.z = 5;
+
+// Animation loop
+function animate() {
+  requestAnimationFrame(animate);
+
+  // Rotate character slightly
+  characterGroup.rotation.y += 0.005;
+
+  // Make character bob up and down
+  characterGroup.position.y = Math.sin(Date.now() * 0.001) * 0.2;
+
+  // Rotate particles
+  particles.rotation.y += 0.001;
+  particles.rotation.x += 0.0005;
+
+  renderer.render(scene, camera);
+}
+
+animate();
+
+window.addEventListener('resize', () => {
+  const newWidth = window.innerWidth;
+  const newHeight = window.innerHeight;
+
+  camera.aspect = newWidth / newHeight;
+  camera.updateProjectionMatrix();
+
+  renderer.setSize(newWidth, newHeight);
+});
+
+// Chat functionality
+const messagesContainer = document.getElementById('messages');
+const userInput = document.getElementById('user-input');
+const sendButton = document.getElementById('send-btn');
+const micButton = document.getElementById('mic-btn');
+const statusIndicator = document.getElementById('status');
+const statusText = document.getElementById('status-text');
+const featurePills = document.querySelectorAll('.feature-pill');
+
+// One conversation per tab, so follow-up questions keep their context
+let sessionId = sessionStorage.getItem('savinSessionId');
+if (!sessionId) {
+  sessionId = window.crypto && crypto.randomUUID
+    ? crypto.randomUUID()
+    : Date.now().toString(36) + Math.random().toString(36).slice(2);
+  sessionStorage.setItem('savinSessionId', sessionId);
+}
+
+// Replace the addMessage function in your HTML file with this improved version
+function addMessage(text, isUser = false) {
+const messageDiv = document.createElement('div');
+messageDiv.classList.add('message');
+
+if (isUser) {
+  messageDiv.classList.add('user-message');
+  messageDiv.textContent = text;
+} else {
+  messageDiv.classList.add('bot-message');
+  const avatarDiv = document.createElement('div');
+  avatarDiv.classList.add('bot-avatar');
+
+  const avatarImg = document.createElement('img');
+  avatarImg.src = '/api/placeholder/50/50';
+  avatarImg.alt = 'Bot Avatar';
+  avatarImg.classList.add('avatar-img');
+
+  avatarDiv.appendChild(avatarImg);
+  messageDiv.appendChild(avatarDiv);
+  messageDiv.textContent = text;
+
+// Animate character when bot speaks
+  gsap.to(mouth.scale, {
+    x: 1.2, y: 1.5, z: 1.2,
+    duration: 0.2,
+    repeat: 3,
+    yoyo: true
+  });
+}
+
+messagesContainer.appendChild(messageDiv);
+messagesContainer.scrollTop = messagesContainer.scrollHeight;
+
+// Text-to-speech for bot messages (if supported)
+if (!isUser && window.speechSynthesis) {
+  speakText(text);
+}
+}
+
+// Add this new function to handle speaking text reliably
+let speechQueue = [];
+let isSpeaking = false;
+
+function speakText(text) {
+// Cancel any ongoing speech
+window.speechSynthesis.cancel();
+
+// Split long text into sentences to prevent cutting off
+const sentences = text.match(/[^.!?]+[.!?]+/g) || [text];
+
+// Queue up all sentences
+sentences.forEach(sentence => {
+  speechQueue.push(sentence.trim());
+});
+
+// Start speaking if not already speaking
+if (!isSpeaking) {
+  processSpeechQueue();
+}
+}
+
+function processSpeechQueue() {
+if (speechQueue.length === 0) {
+  isSpeaking = false;
+  return;
+}
+
+isSpeaking = true;
+const nextSentence = speechQueue.shift();
+const speech = new SpeechSynthesisUtterance(nextSentence);
+speech.rate = 1.0;
+speech.pitch = 1.2;
+speech.volume = 1;
+
+// Load voices and select a female voice
+const voices = window.speechSynthesis.getVoices();
+
+// If voices are available, select a female voice
+if (voices.length > 0) {
+  const femaleVoice = voices.find(voice => 
+    voice.name.toLowerCase().includes('female') || 
+    voice.name.toLowerCase().includes('zira') ||
+    voice.name.toLowerCase().includes('samantha')
+  );
+
+  if (femaleVoice) {
+    speech.voice = femaleVoice;
+  }
+} else {
+// If voices aren't loaded yet, wait and try again
+  window.speechSynthesis.onvoiceschanged = function() {
+    const newVoices = window.speechSynthesis.getVoices();
+    const femaleVoice = newVoices.find(voice => 
+      voice.name.toLowerCase().includes('female') || 
+      voice.name.toLowerCase().includes('zira') ||
+      voice.name.toLowerCase().includes('samantha')
+    );
+
+    if (femaleVoice) {
+      speech.voice = femaleVoice;
+    }
+  };
+}
+
+speech.onend = function() {
+  // Continue with the next sentence
+  processSpeechQueue();
+};
+
+speech.onerror = function() {
+  // Continue even if there's an error
+  processSpeechQueue();
+};
+
+window.speechSynthesis.speak(speech);
+}
+
+// Make sure voices are loaded early
+if (window.speechSynthesis) {
+// Force load voices
+speechSynthesis.getVoices();
+
+// Setup event listener for when voices are loaded
+speechSynthesis.onvoiceschanged = function() {
+  speechSynthesis.getVoices();
+};
+}
+// Create an empty bot message that streamed text is appended to
+function addStreamingMessage() {
+  const messageDiv = document.createElement('div');
+  messageDiv.classList.add('message', 'bot-message');
+  messagesContainer.appendChild(messageDiv);
+  messagesContainer.scrollTop = messagesContainer.scrollHeight;
+  return messageDiv;
+}
+
+// Queue a sentence without interrupting what is already being spoken
+function enqueueSpeech(sentence) {
+  if (!window.speechSynthesis || sentence.trim() === '') return;
+  speechQueue.push(sentence.trim());
+  if (!isSpeaking) {
+    processSpeechQueue();
+  }
+  gsap.to(mouth.scale, {
+    x: 1.2, y: 1.5, z: 1.2,
+    duration: 0.2,
+    repeat: 3,
+    yoyo: true
+  });
+}
+
+// Thrown when the stream never opened, so the command did not run and is
+// safe to send again
+class StreamUnavailableError extends Error {}
+
+// Stream a response over server-sent events, speaking each sentence as it completes
+async function streamCommand(text) {
+  let response;
+  try {
+    response = await fetch('http://localhost:5000/api/process_command/stream', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ query: text, session_id: sessionId })
+    });
+  } catch (error) {
+    throw new StreamUnavailableError(`Streaming request failed: ${error.message}`);
+  }
+  if (!response.ok || !response.body) {
+    throw new StreamUnavailableError(`Streaming request failed: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let messageDiv = null;
+  let buffer = '';
+  let pendingSpeech = '';
+
+  window.speechSynthesis && window.speechSynthesis.cancel();
+  speechQueue = [];
+  isSpeaking = false;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let eventName = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach(line => {
+        if (line.startsWith('event:')) eventName = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      if (!data || eventName !== 'message') continue;
+
+      const chunk = JSON.parse(data).text || '';
+      if (!messageDiv) {
+        messageDiv = addStreamingMessage();
+        statusIndicator.classList.remove('active');
+      }
+      messageDiv.textContent += chunk;
+      messagesContainer.scrollTop = messagesContainer.scrollHeight;
+
+      // Hand every finished sentence to speech synthesis right away
+      pendingSpeech += chunk;
+      const sentences = pendingSpeech.match(/[^.!?]+[.!?]+(\s+|$)/g);
+      if (sentences) {
+        sentences.forEach(enqueueSpeech);
+        pendingSpeech = pendingSpeech.slice(sentences.join('').length);
+      }
+    }
+  }
+
+  enqueueSpeech(pendingSpeech);
+  statusIndicator.classList.remove('active');
+}
+
+// Handle user input
+function handleUserInput() {
+  const text = userInput.value.trim();
+  if (text === '') return;
+
+  addMessage(text, true);
+  userInput.value = '';
+
+  // Animate thinking
+  statusIndicator.classList.add('active');
+  statusText.textContent = 'Thinking...';
+
+  // Send the request to the backend, falling back to a single response if
+  // the stream never opened. Once it has, the command may already have run
+  // (opened an app, saved a note), so sending it again could repeat it.
+  streamCommand(text).catch(streamError => {
+    if (!(streamError instanceof StreamUnavailableError)) {
+      console.error('Streaming failed:', streamError);
+      statusIndicator.classList.remove('active');
+      addMessage("I lost the connection while answering. Please try again.");
+      return;
+    }
+    console.warn('Streaming failed, retrying without streaming:', streamError);
+    fetch('http://localhost:5000/api/process_command', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ query: text, session_id: sessionId }) // Use the user's input
+    })
+    .then(response => response.json())
+    .then(data => {
+      console.log("Response from backend:", data);
+      addMessage(data.response); // Display the response from the backend
+      statusIndicator.classList.remove('active'); // Hide the status indicator
+    })
+    .catch(error => {
+      console.error('Error:', error);
+      statusIndicator.classList.remove('active');
+      addMessage("I'm having trouble connecting right now. Please try again later.");
+    });
+  });
+}
+
+// Event listeners
+sendButton.addEventListener('click', handleUserInput);
+
+userInput.addEventListener('keypress', (e) => {
+  if (e.key === 'Enter') {
+    handleUserInput();
+  }
+});
+
+// Voice recognition
+let recognition;
+if (window.webkitSpeechRecognition || window.SpeechRecognition) {
+  const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+  recognition = new SpeechRecognition();
+  recognition.continuous = false;
+  recognition.interimResults = true;
+
+  // Interim transcripts are sent once they stop changing for a moment,
+  // so the server can start answering while the user is still speaking
+  let speculateTimer = null;
+  let gotFinalResult = false;
+
+  function speculate(transcript) {
+    fetch('http://localhost:5000/api/speculate', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ transcript: transcript, session_id: sessionId })
+    }).catch(error => console.debug('Speculation request failed:', error));
+  }
+
+  recognition.onstart = () => {
+    gotFinalResult = false;
+    micButton.classList.add('listening');
+    statusIndicator.classList.add('active');
+    statusText.textContent = 'Listening...';
+  };
+
+  recognition.onend = () => {
+    micButton.classList.remove('listening');
+    statusIndicator.classList.remove('active');
+    clearTimeout(speculateTimer);
+    if (!gotFinalResult) {
+      // Nothing was said after all; drop any speculative work
+      speculate('');
+    }
+  };
+
+  recognition.onresult = (event) => {
+    const results = Array.from(event.results);
+    const transcript = results.map(result => result[0].transcript).join('');
+    userInput.value = transcript;
+    clearTimeout(speculateTimer);
+
+    if (results[results.length - 1].isFinal) {
+      gotFinalResult = true;
+      handleUserInput();
+    } else {
+      speculateTimer = setTimeout(() => speculate(transcript), 300);
+    }
+  };
+
+  micButton.addEventListener('click', () => {
+    if (micButton.classList.contains('listening')) {
+      recognition.stop();
+    } else {
+      recognition.start();
+    }
+  });
+} else {
+  micButton.addEventListener('click', () => {
+    alert('Sorry, speech recognition is not supported in your browser.');
+  });
+}
+
+// Character mood updates
+function updateCharacterMood(mood) {
+  switch(mood) {
+    case 'happy':
+      gsap.to(mouth.position, { y: -0.3, duration: 0.5 });
+      gsap.to(mouth.scale, { x: 1.2, y: 1, z: 1, duration: 0.5 });
+      break;
+    case 'thinking':
+      gsap.to(mouth.position, { y: -0.4, duration: 0.5 });
+      gsap.to(mouth.scale, { x: 0.8, y: 1.2, z: 1, duration: 0.5 });
+      gsap.to(head.rotation, { 
+        z: 0.1, 
+        duration: 0.5, 
+        onComplete: () => {
+          gsap.to(head.rotation, { z: -0.1, duration: 0.5, yoyo: true, repeat: 3 });
+        }
+      });
+      break;
+    case 'neutral':
+    default:
+      gsap.to(mouth.position, { y: -0.4, duration: 0.5 });
+      gsap.to(mouth.scale, { x: 1, y: 1, z: 1, duration: 0.5 });
+      gsap.to(head.rotation, { z: 0, duration: 0.5 });
+      break;
+  }
+}
+
+// Set initial mood
+updateCharacterMood('happy');
+
+// Make character look at cursor
+document.addEventListener('mousemove', (e) => {
+  const mouseX = (e.clientX / window.innerWidth) * 2 - 1;
+  const mouseY = -(e.clientY / window.innerHeight) * 2 + 1;
+
+  gsap.to(characterGroup.rotation, {
+    x: mouseY * 0.2,
+    y: mouseX * 0.3,
+    duration: 0.5
+  });
+
+  gsap.to(leftEye.position, {
+    x: -0.4 + mouseX * 0.05,
+    z: 1 + mouseY * 0.05,
+    duration: 0.2
+  });
+
+  gsap.to(rightEye.position, {
+    x: 0.4 + mouseX * 0.05,
+    z: 1 + mouseY * 0.05,
+    duration: 0.2
+  });
+});